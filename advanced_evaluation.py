@@ -15,6 +15,8 @@ from plotly.subplots import make_subplots
 from sklearn.model_selection import learning_curve
 from sklearn.metrics import precision_recall_curve, roc_curve, auc
 from sklearn.calibration import calibration_curve
+from sklearn.base import clone
+from modules import execution
 
 # Optional imports avec gestion d'erreur
 try:
@@ -49,7 +51,9 @@ def shap_analysis(model, X_test, feature_names=None, max_display=20):
                 else:
                     explainer = shap.KernelExplainer(model_core, X_processed[:100])
                 
-                shap_values = explainer.shap_values(X_processed)
+                # un seul calcul : le budget d'exécution entier pour les threads BLAS/OpenMP
+                with execution.limits(1):
+                    shap_values = explainer.shap_values(X_processed)
                 
                 if isinstance(shap_values, list) and len(shap_values) == 2:
                     shap_values = shap_values[1]  # Classe positive
@@ -222,11 +226,15 @@ def learning_curve_analysis(model, X, y, cv=5):
             
             scoring = 'accuracy' if unique_count < 20 else 'r2'
             
-            train_sizes, train_scores, val_scores = learning_curve(
-                model, X, y, cv=cv, n_jobs=-1, 
-                train_sizes=np.linspace(0.1, 1.0, 10),
-                scoring=scoring
-            )
+            # plis en parallèle (processus) : chaque modèle reste mono-worker pour ne pas dépasser le budget
+            estimator = clone(model)
+            execution.configure(estimator, jobs=1)
+            with execution.limits(min(cv, execution.n_jobs()), processes=True) as n_jobs:
+                train_sizes, train_scores, val_scores = learning_curve(
+                    estimator, X, y, cv=cv, n_jobs=n_jobs,
+                    train_sizes=np.linspace(0.1, 1.0, 10),
+                    scoring=scoring
+                )
             
             train_mean = np.mean(train_scores, axis=1)
             train_std = np.std(train_scores, axis=1)
@@ -0,0 +1,150 @@
+# modules/boosting.py
+"""
+Boosting par histogrammes pour les gros jeux de données.
+- HistGradientBoosting (scikit-learn), LightGBM et XGBoost (`tree_method="hist"`) si installés
+- Catégorielles natives : codes ordinaux (modalités rares regroupées) au lieu du one-hot,
+  manquants laissés aux modèles (pas d'imputation)
+- Arrêt précoce sur une part de validation tirée de l'entraînement ; multithreading via n_jobs
+  (budget d'exécution) ou OpenMP (threadpoolctl) pour HistGradientBoosting
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin, RegressorMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, OrdinalEncoder
+
+try:
+    import lightgbm
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    LIGHTGBM_AVAILABLE = False
+
+try:
+    import xgboost
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    XGBOOST_AVAILABLE = False
+
+HIST_BACKENDS = ["hist_gradient_boosting"] + (["lightgbm"] if LIGHTGBM_AVAILABLE else []) + (["xgboost"] if XGBOOST_AVAILABLE else [])
+DENSE_ONLY_BACKENDS = ["hist_gradient_boosting"]   # refusent les matrices creuses (CSR)
+NATIVE_MAX_CATEGORIES = 255    # modalités par colonne (limite des histogrammes), les plus rares regroupées
+MAX_ITER = 500                 # itérations maximales, l'arrêt précoce décide du nombre retenu
+VALIDATION_FRACTION = 0.1
+EARLY_STOPPING_ROUNDS = 20
+
+
+def native_preprocessor(num_cols: list, cat_cols: list) -> ColumnTransformer:
+    """Numériques telles quelles, catégorielles en codes ordinaux (placées en dernier, inconnues -> manquant)."""
+    transformers = []
+    if num_cols:
+        transformers.append(("num", "passthrough", num_cols))
+    if cat_cols:
+        transformers.append(("cat", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=np.nan,
+                                                   encoded_missing_value=np.nan, max_categories=NATIVE_MAX_CATEGORIES), cat_cols))
+    return ColumnTransformer(transformers=transformers, remainder="drop", verbose_feature_names_out=False, sparse_threshold=0.0)
+
+
+def categorical_mask(num_cols: list, cat_cols: list) -> list:
+    """Colonnes catégorielles dans la sortie de native_preprocessor."""
+    return [False] * len(num_cols) + [True] * len(cat_cols)
+
+
+class _EarlyStoppingBooster(BaseEstimator):
+    """LightGBM / XGBoost avec arrêt précoce sur une part de validation et catégorielles natives."""
+
+    def __init__(self, backend="lightgbm", categorical=None, max_iter=MAX_ITER, learning_rate=0.1, max_depth=None,
+                 validation_fraction=VALIDATION_FRACTION, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                 n_jobs=None, random_state=42):
+        self.backend = backend
+        self.categorical = categorical
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.validation_fraction = validation_fraction
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _native_frame(self, X) -> pd.DataFrame:
+        """Codes ordinaux -> dtype category (mêmes catégories à l'entraînement et à la prédiction)."""
+        if not any(self.categorical or []) or not isinstance(X, np.ndarray):
+            return X
+        frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])])
+        for i, is_cat in enumerate(self.categorical):
+            if is_cat:
+                codes = np.nan_to_num(X[:, i], nan=-1).astype(np.int64)   # -1 : manquant
+                frame[f"f{i}"] = pd.Categorical.from_codes(codes, categories=np.arange(NATIVE_MAX_CATEGORIES))
+        return frame
+
+    def _booster(self, n_classes=None):
+        params = dict(n_estimators=self.max_iter, learning_rate=self.learning_rate, n_jobs=self.n_jobs,
+                      random_state=self.random_state)
+        if self.backend == "lightgbm":
+            cls = lightgbm.LGBMRegressor if n_classes is None else lightgbm.LGBMClassifier
+            return cls(max_depth=self.max_depth or -1, verbose=-1, **params)
+        cls = xgboost.XGBRegressor if n_classes is None else xgboost.XGBClassifier
+        return cls(tree_method="hist", max_depth=self.max_depth, enable_categorical=True,
+                   early_stopping_rounds=self.early_stopping_rounds, **params)
+
+    def _fit(self, X, y, n_classes=None):
+        stratify = y if n_classes is not None and np.bincount(y).min() >= 2 else None
+        X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=self.validation_fraction,
+                                                      random_state=self.random_state, stratify=stratify)
+        X_fit, X_val = self._native_frame(X_fit), self._native_frame(X_val)
+        self.booster_ = self._booster(n_classes)
+        if self.backend == "lightgbm":
+            self.booster_.fit(X_fit, y_fit, eval_set=[(X_val, y_val)],
+                              callbacks=[lightgbm.early_stopping(self.early_stopping_rounds, verbose=False)])
+            self.n_iter_ = int(self.booster_.best_iteration_ or self.max_iter)
+        else:
+            self.booster_.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+            self.n_iter_ = int(self.booster_.best_iteration) + 1
+        return self
+
+    @property
+    def feature_importances_(self):
+        return self.booster_.feature_importances_
+
+
+class EarlyStoppingClassifier(ClassifierMixin, _EarlyStoppingBooster):
+    def fit(self, X, y):
+        self.encoder_ = LabelEncoder().fit(y)   # XGBoost exige des classes 0..k-1
+        self.classes_ = self.encoder_.classes_
+        return self._fit(X, self.encoder_.transform(y), len(self.classes_))
+
+    def predict(self, X):
+        return self.encoder_.inverse_transform(np.asarray(self.booster_.predict(self._native_frame(X))).astype(int))
+
+    def predict_proba(self, X):
+        return self.booster_.predict_proba(self._native_frame(X))
+
+
+class EarlyStoppingRegressor(RegressorMixin, _EarlyStoppingBooster):
+    def fit(self, X, y):
+        return self._fit(X, np.asarray(y, dtype="float64"))
+
+    def predict(self, X):
+        return self.booster_.predict(self._native_frame(X))
+
+
+def make_hist_model(backend: str, task: str, categorical=None, max_iter=MAX_ITER, learning_rate=0.1, max_depth=0, random_state=42):
+    """Modèle de boosting par histogrammes ; categorical : masque des colonnes catégorielles natives."""
+    max_depth = None if max_depth == 0 else max_depth
+    classification = task == "classification"
+    if backend == "hist_gradient_boosting":
+        cls = HistGradientBoostingClassifier if classification else HistGradientBoostingRegressor
+        return cls(max_iter=max_iter, learning_rate=learning_rate, max_depth=max_depth,
+                   categorical_features=categorical if categorical and any(categorical) else None,
+                   early_stopping=True, validation_fraction=VALIDATION_FRACTION,
+                   n_iter_no_change=EARLY_STOPPING_ROUNDS, random_state=random_state)
+    cls = EarlyStoppingClassifier if classification else EarlyStoppingRegressor
+    return cls(backend=backend, categorical=categorical, max_iter=max_iter, learning_rate=learning_rate,
+               max_depth=max_depth, random_state=random_state)
+
+
+def n_iterations(model):
+    """Itérations retenues par l'arrêt précoce (None si le modèle n'en a pas)."""
+    return getattr(model, "n_iter_", None)
@@ -0,0 +1,183 @@
+# modules/cleaning.py
+"""
+Corrections du Prétraitement sous forme de transformateur ajusté et sérialisable.
+Les valeurs apprises (imputations, bornes d'écrêtage / winsorisation, encodeurs cible)
+sont figées à l'ajustement ; le transformateur s'applique ensuite à de nouveaux lots,
+bloc par bloc et hors Streamlit, avec le même plan compilé et le même schéma de log
+que `preprocessing.apply_corrections_with_log`.
+
+Exemple (hors interface) :
+    python -m modules.cleaning outputs/models/cleaning_base.pkl nouveau_lot.csv lot_corrige.parquet
+"""
+
+import os
+import gzip
+import argparse
+import joblib
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.pipeline import Pipeline
+from modules import preprocessing, outliers, dataset
+from modules.utils import helpers
+
+CHUNK_ROWS = 200_000
+TRANSFORMER_DIR = "outputs/models"
+LOG_COLUMNS = ["colonne", "correction_appliquee", "nb_valeurs_modifiees"]
+
+
+class CleaningTransformer(BaseEstimator, TransformerMixin):
+    """
+    corrections : {colonne: correction} tel que choisi dans le Prétraitement
+    target : variable cible (encodage cible) ; duplicate_subset : clé des doublons exacts
+    Les quasi-doublons et les aberrants multivariés dépendent du lot entier : ils ne sont
+    pas rejoués (journalisés comme non calculés). Les doublons sont retirés au sein de chaque bloc.
+    """
+
+    def __init__(self, corrections=None, target=None, duplicate_subset=None):
+        self.corrections = corrections
+        self.target = target
+        self.duplicate_subset = duplicate_subset
+
+    # ------------------------
+    # Ajustement
+    # ------------------------
+    def fit(self, X, y=None, stats=None, outliers_report=None):
+        self.fit_transform_with_log(X, stats=stats, outliers_report=outliers_report)
+        return self
+
+    def fit_transform_with_log(self, X: pd.DataFrame, stats=None, outliers_report=None, near_labels=None):
+        """Ajuste sur X et retourne (X corrigé, log) comme apply_corrections_with_log (encodage cible hors pli)."""
+        corrections = dict(self.corrections or {})
+        # bornes des corrections d'aberrants figées avec le transformateur
+        needed = [c for c, corr in corrections.items() if corr in preprocessing.CORRECTIONS_ABERRANTES and c in X.columns]
+        summary = outliers_report["colonnes"] if outliers_report is not None else None
+        missing = [c for c in needed if summary is None or c not in summary.index]
+        if missing:
+            computed = outliers.outlier_summary(X, columns=missing)
+            summary = computed if summary is None else pd.concat([summary, computed])
+        self.outliers_report_ = {"colonnes": summary.loc[needed] if summary is not None else outliers.outlier_summary(X, columns=[]),
+                                 "multivarie": None}
+
+        report = dict(outliers_report or {}, colonnes=self.outliers_report_["colonnes"])
+        plan = preprocessing.compile_correction_plan(X, corrections, stats, self.target, self.duplicate_subset,
+                                                     near_labels, report)
+        out = preprocessing.execute_correction_plan(X, plan)
+        self.fill_ = plan["fill"]
+        self.encoders_ = plan["encoders"]
+        self.columns_in_ = list(X.columns)
+        self.columns_out_ = list(out.columns)
+        return out, pd.DataFrame(plan["log"], columns=LOG_COLUMNS)
+
+    # ------------------------
+    # Application à de nouveaux lots
+    # ------------------------
+    def transform_with_log(self, X: pd.DataFrame):
+        plan = preprocessing.compile_correction_plan(
+            X, dict(self.corrections or {}), None, self.target, self.duplicate_subset, None,
+            self.outliers_report_, learned={"fill": self.fill_, "encoders": self.encoders_},
+        )
+        return preprocessing.execute_correction_plan(X, plan), pd.DataFrame(plan["log"], columns=LOG_COLUMNS)
+
+    def transform(self, X):
+        return self.transform_with_log(X)[0]
+
+
+def chain(transformers) -> Pipeline:
+    """Enchaîne les transformateurs des étapes successives de l'historique des corrections."""
+    return Pipeline([(f"etape_{i + 1}", t) for i, t in enumerate(transformers)])
+
+
+def transform_with_log(transformer, X: pd.DataFrame):
+    """Applique un CleaningTransformer ou une chaîne (chain) ; les logs des étapes sont concaténés."""
+    steps = [t for _, t in transformer.steps] if isinstance(transformer, Pipeline) else [transformer]
+    logs = []
+    for step in steps:
+        X, log = step.transform_with_log(X)
+        logs.append(log)
+    return X, pd.concat(logs, ignore_index=True) if logs else pd.DataFrame(columns=LOG_COLUMNS)
+
+
+def merge_logs(logs) -> pd.DataFrame:
+    """Cumule les logs des blocs : effectifs additionnés, libellés (ex. 'colonne supprimée') conservés."""
+    totals = {}
+    for log in logs:
+        for record in log.to_dict("records"):
+            key = (record["colonne"], record["correction_appliquee"])
+            value = record["nb_valeurs_modifiees"]
+            if key in totals and isinstance(value, (int, float)) and isinstance(totals[key], (int, float)):
+                totals[key] += value
+            else:
+                totals.setdefault(key, value)
+    return pd.DataFrame([{"colonne": c, "correction_appliquee": corr, "nb_valeurs_modifiees": v}
+                         for (c, corr), v in totals.items()], columns=LOG_COLUMNS)
+
+
+# ------------------------
+# Persistance et application à des fichiers
+# ------------------------
+def save_transformer(transformer, name: str, directory=TRANSFORMER_DIR) -> str:
+    return helpers.save_model(transformer, os.path.join(directory, f"cleaning_{name}.pkl"))
+
+
+def load_transformer(path: str):
+    return joblib.load(path)
+
+
+def read_chunks(path: str, chunksize=CHUNK_ROWS, **read_kwargs):
+    """Blocs d'un fichier CSV (éventuellement compressé), Parquet ou Excel."""
+    lower = path.lower()
+    if lower.endswith(".parquet"):
+        yield from dataset.LazyDataset(path).iter_chunks(chunksize)
+    elif lower.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(path, **read_kwargs)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        with pd.read_csv(path, chunksize=chunksize, **read_kwargs) as reader:
+            yield from reader
+
+
+def apply_to_file(transformer, source: str, destination: str, chunksize=CHUNK_ROWS, **read_kwargs) -> pd.DataFrame:
+    """
+    Corrige un fichier bloc par bloc et écrit le résultat (Parquet, CSV ou CSV gzip selon l'extension).
+    Retourne le log cumulé.
+    """
+    logs = []
+
+    def corrected():
+        for chunk in read_chunks(source, chunksize, **read_kwargs):
+            out, log = transform_with_log(transformer, chunk)
+            logs.append(log)
+            yield out
+
+    helpers.ensure_dir(os.path.dirname(destination) or ".")
+    if destination.lower().endswith(".parquet"):
+        dataset.write_chunks(corrected(), destination)
+    else:
+        opener = gzip.open if destination.lower().endswith(".gz") else open
+        with opener(destination, "wt", newline="", encoding="utf-8") as f:
+            for i, out in enumerate(corrected()):
+                out.to_csv(f, index=False, header=(i == 0))
+    return merge_logs(logs)
+
+
+def apply_to_dataset(transformer, handle, name: str, directory=preprocessing.EXPORT_DIR):
+    """
+    Corrige toutes les lignes d'un jeu hors mémoire (dataset.LazyDataset) bloc par bloc,
+    et non l'échantillon utilisé dans l'interface. Retourne (LazyDataset corrigé, log cumulé).
+    """
+    destination = os.path.join(directory, f"{os.path.splitext(os.path.basename(handle.path))[0]}_{name}.parquet")
+    log = apply_to_file(transformer, handle.path, destination)
+    return dataset.LazyDataset(destination), log
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Applique un transformateur de nettoyage à un fichier, bloc par bloc.")
+    parser.add_argument("transformer")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--sep", default=None)
+    args = parser.parse_args()
+    read_kwargs = {"sep": args.sep} if args.sep and not args.source.lower().endswith((".parquet", ".xlsx", ".xls")) else {}
+    print(apply_to_file(load_transformer(args.transformer), args.source, args.destination, args.chunksize, **read_kwargs).to_string(index=False))
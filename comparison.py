@@ -0,0 +1,159 @@
+# modules/comparison.py
+"""
+Comparaison de familles de modèles en validation croisée.
+Le préprocesseur est ajusté une seule fois sur l'entraînement ; la matrice encodée est partagée
+(memmap joblib) par un pool de processus qui évalue les candidats pli par pli. Après chaque tour,
+les candidats nettement battus sont abandonnés ; un budget de temps global arrête la comparaison
+(les plis déjà évalués comptent). Le meilleur candidat est réajusté sur tout l'entraînement.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import KFold, StratifiedKFold
+from sklearn.pipeline import Pipeline
+from modules import execution, boosting
+
+CV_FOLDS = 5
+TIME_BUDGET_S = 120
+MIN_FOLDS_BEFORE_ABANDON = 3   # plis communs avec le meilleur avant de pouvoir abandonner un candidat
+ABANDON_CONFIDENCE = 0.975      # niveau (unilatéral) du test apparié contre le meilleur
+ABANDON_MARGIN = 0.01           # écart relatif minimal au score du meilleur pour abandonner
+SCORINGS = {
+    "classification": ["accuracy", "balanced_accuracy", "f1_weighted"],
+    "regression": ["r2", "neg_root_mean_squared_error", "neg_mean_absolute_error"],
+}
+LEADERBOARD_COLUMNS = ["modele", "score_moyen", "ecart_type", "plis", "temps_ajustement_s", "statut"]
+
+
+def candidate_models(task: str, base_models: dict, random_state=42) -> dict:
+    """Familles candidates : modèles de base (ceux de run_modeling) et boosting par histogrammes installés."""
+    out = dict(base_models)
+    for backend in boosting.HIST_BACKENDS:
+        # matrice partagée déjà encodée : pas de catégorielles natives ici
+        out[backend] = boosting.make_hist_model(backend, task, random_state=random_state)
+    return out
+
+
+def _folds(y: np.ndarray, task: str, cv: int, random_state: int) -> list:
+    counts = pd.Series(y).value_counts()
+    if task == "classification" and counts.min() >= cv:
+        return list(StratifiedKFold(cv, shuffle=True, random_state=random_state).split(np.zeros(len(y)), y))
+    return list(KFold(cv, shuffle=True, random_state=random_state).split(np.zeros(len(y))))
+
+
+def _fit_fold(name, estimator, Xt, y, train_idx, val_idx, scoring):
+    """Exécuté dans un worker : ajuste un candidat sur un pli, retourne (nom, score, durée, erreur)."""
+    start = time.perf_counter()
+    try:
+        model = clone(estimator).fit(Xt[train_idx], y[train_idx])
+        score = float(get_scorer(scoring)(model, Xt[val_idx], y[val_idx]))
+        return name, score, time.perf_counter() - start, None
+    except Exception as e:
+        return name, None, time.perf_counter() - start, str(e)
+
+
+def _abandon_losers(scores: dict, status: dict, fold: int):
+    """
+    Test apparié contre le meilleur sur les plis communs : un candidat est abandonné si
+    l'écart moyen par pli dépasse la marge même diminué de t × erreur type (ddof=1),
+    et seulement après MIN_FOLDS_BEFORE_ABANDON plis communs.
+    scores : {candidat: {pli: score}}.
+    """
+    alive = [n for n, s in status.items() if s == "en cours" and scores[n]]
+    if len(alive) < 2:
+        return
+    means = {n: np.mean(list(scores[n].values())) for n in alive}
+    best = max(alive, key=means.get)
+    margin = ABANDON_MARGIN * abs(means[best])
+    for n in alive:
+        shared = sorted(set(scores[n]) & set(scores[best]))
+        if n == best or len(shared) < MIN_FOLDS_BEFORE_ABANDON:
+            continue
+        diffs = np.array([scores[best][k] - scores[n][k] for k in shared])
+        stderr = diffs.std(ddof=1) / np.sqrt(len(diffs))
+        if diffs.mean() - stats.t.ppf(ABANDON_CONFIDENCE, len(diffs) - 1) * stderr > margin:
+            status[n] = f"abandonné (pli {fold})"
+
+
+def compare_models(X_train: pd.DataFrame, y_train: pd.Series, preprocessor, candidates: dict, task: str,
+                   scoring=None, cv=CV_FOLDS, time_budget=TIME_BUDGET_S, random_state=42, progress=None):
+    """
+    Compare les candidats {nom: estimateur} sur le même préprocesseur ajusté.
+    progress : fonction optionnelle (fraction, message) appelée après chaque tour de plis.
+    Retourne (leaderboard, pipeline du meilleur réajusté sur tout l'entraînement ou None).
+    """
+    scoring = scoring or SCORINGS[task][0]
+    deadline = time.perf_counter() + time_budget
+    y = np.asarray(y_train)
+    with execution.limits(1):
+        Xt = preprocessor.fit_transform(X_train, y_train)   # une seule fois pour tous les candidats
+    folds = _folds(y, task, cv, random_state)
+
+    estimators = {}
+    for name, estimator in candidates.items():
+        estimators[name] = clone(estimator)
+        execution.configure(estimators[name], jobs=1)   # le parallélisme est porté par les plis
+    scores = {name: {} for name in candidates}   # candidat -> {pli: score}
+    fit_times = {name: 0.0 for name in candidates}
+    status = {name: "en cours" for name in candidates}
+    if sparse.issparse(Xt):
+        for name in boosting.DENSE_ONLY_BACKENDS:
+            if name in status:
+                status[name] = "ignoré : matrice creuse"
+
+    with execution.limits(execution.n_jobs(), processes=True) as workers:
+        for k, (train_idx, val_idx) in enumerate(folds, start=1):
+            alive = [n for n, s in status.items() if s == "en cours"]
+            remaining = deadline - time.perf_counter()
+            if not alive or remaining <= 0:
+                break
+            results = Parallel(n_jobs=workers, timeout=remaining, return_as="generator_unordered")(
+                delayed(_fit_fold)(n, estimators[n], Xt, y, train_idx, val_idx, scoring) for n in alive
+            )
+            try:
+                for name, score, duration, error in results:
+                    fit_times[name] += duration
+                    if error is not None:
+                        status[name] = f"erreur : {error}"
+                    else:
+                        scores[name][k] = score
+                    if time.perf_counter() > deadline:
+                        break
+            except TimeoutError:
+                pass
+            finally:
+                results.close()   # tâches restantes annulées si le budget est épuisé
+            if k < len(folds):   # après le dernier pli, plus rien à économiser
+                _abandon_losers(scores, status, k)
+            if progress is not None:
+                progress(k / len(folds), f"Pli {k}/{len(folds)} — {sum(s == 'en cours' for s in status.values())} candidat(s) en lice")
+
+    for name, s in status.items():
+        if s == "en cours":
+            status[name] = "terminé" if len(scores[name]) == len(folds) else "budget de temps épuisé"
+
+    leaderboard = pd.DataFrame([{
+        "modele": name,
+        "score_moyen": np.mean(list(scores[name].values())) if scores[name] else np.nan,
+        "ecart_type": np.std(list(scores[name].values()), ddof=1) if len(scores[name]) > 1 else np.nan,
+        "plis": len(scores[name]),
+        "temps_ajustement_s": round(fit_times[name], 2),
+        "statut": status[name],
+    } for name in candidates], columns=LEADERBOARD_COLUMNS)
+    # candidats menés à leur terme (ou arrêtés par le budget) devant les abandons, puis par score
+    leaderboard["_rang"] = leaderboard["statut"].str.startswith(("terminé", "budget")).map({True: 0, False: 1})
+    leaderboard = (leaderboard.sort_values(["_rang", "score_moyen"], ascending=[True, False], na_position="last")
+                   .drop(columns="_rang").reset_index(drop=True))
+
+    ranked = leaderboard[leaderboard["plis"] > 0]
+    if ranked.empty:
+        return leaderboard, None
+    best = clone(candidates[ranked.iloc[0]["modele"]])
+    with execution.limits(estimator=best):
+        best.fit(Xt, y)
+    return leaderboard, Pipeline([("preprocessor", preprocessor), ("model", best)])
@@ -0,0 +1,166 @@
+# modules/correlation.py
+"""
+Moteur de corrélation pour tables larges.
+La matrice de Pearson est construite à partir de statistiques suffisantes accumulées
+bloc par bloc (fonctionne donc sur un DataFrame comme sur un flux de blocs / LazyDataset),
+avec gestion des valeurs manquantes par paires comme `DataFrame.corr`.
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import linkage, leaves_list
+from scipy.spatial.distance import squareform
+from modules.utils import helpers
+
+CHUNK_ROWS = 100_000
+TOP_K = 20
+HEATMAP_MAX_COLS = 30
+ANNOT_MAX_COLS = 15
+CACHE_MAX_ENTRIES = 8
+
+_CACHE = OrderedDict()  # (source, méthode) -> matrice de corrélation
+
+
+class CorrelationAccumulator:
+    """
+    Statistiques suffisantes pour la corrélation de Pearson par paires :
+    effectifs, sommes, sommes des carrés (par paire de présence) et produits croisés.
+    Les valeurs sont décalées par les moyennes du premier bloc pour la stabilité numérique.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.s = np.zeros((k, k))    # s[i, j] = somme de x_i sur les lignes où x_j est présent
+        self.ss = np.zeros((k, k))   # idem pour x_i²
+        self.sxy = np.zeros((k, k))  # somme de x_i * x_j sur les lignes où les deux sont présents
+
+    def update(self, chunk: pd.DataFrame):
+        values = chunk[self.columns].to_numpy(dtype="float64", na_value=np.nan)
+        mask = np.isfinite(values)
+        if self.shift is None:
+            with np.errstate(invalid="ignore"):
+                counts = mask.sum(axis=0)
+                self.shift = np.where(counts > 0, np.where(mask, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+        x = np.where(mask, values - self.shift, 0.0)
+        m = mask.astype("float64")
+        self.n += m.T @ m
+        self.s += x.T @ m
+        self.ss += (x * x).T @ m
+        self.sxy += x.T @ x
+        return self
+
+    def merge(self, other: "CorrelationAccumulator"):
+        """Fusionne un accumulateur calculé sur d'autres blocs (même décalage requis)."""
+        if self.shift is None:
+            self.shift = other.shift
+        elif other.shift is not None and not np.allclose(self.shift, other.shift):
+            raise ValueError("Accumulateurs avec des décalages différents : utiliser le même premier bloc")
+        self.n += other.n; self.s += other.s; self.ss += other.ss; self.sxy += other.sxy
+        return self
+
+    def corr(self, min_periods=2) -> pd.DataFrame:
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = n * self.sxy - self.s * self.s.T
+            var_i = n * self.ss - self.s ** 2
+            r = cov / np.sqrt(var_i * var_i.T)
+        r[n < min_periods] = np.nan
+        r = np.clip(r, -1.0, 1.0)
+        np.fill_diagonal(r, np.where(np.diag(var_i) > 0, 1.0, np.nan))
+        return pd.DataFrame(r, index=self.columns, columns=self.columns)
+
+
+def _iter_source(source, chunk_rows=CHUNK_ROWS, columns=None):
+    """Blocs d'un DataFrame (tranches de lignes) ou d'une source itérable (LazyDataset, générateur)."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield source.iloc[start:start + chunk_rows]
+    elif hasattr(source, "iter_chunks"):
+        yield from source.iter_chunks(chunk_rows, columns=columns)
+    else:
+        yield from source
+
+
+def numeric_columns(source) -> list:
+    """Colonnes numériques (hors booléens) d'un DataFrame ou d'un LazyDataset, d'après le schéma seul."""
+    return [c for c, dtype in source.dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+
+
+def pearson(source, columns=None, chunk_rows=CHUNK_ROWS) -> pd.DataFrame:
+    """Matrice de Pearson (valeurs manquantes exclues par paire) calculée par blocs."""
+    if columns is None and hasattr(source, "iter_chunks"):
+        # hors mémoire : seules les colonnes numériques sont lues du fichier
+        columns = numeric_columns(source)
+    acc = None
+    for chunk in _iter_source(source, chunk_rows, columns):
+        if acc is None:
+            cols = columns or chunk.select_dtypes(include="number").columns.tolist()
+            acc = CorrelationAccumulator(cols)
+        acc.update(chunk)
+    return acc.corr() if acc is not None else pd.DataFrame()
+
+
+def spearman(df: pd.DataFrame, columns=None, chunk_rows=CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Spearman = Pearson sur les rangs. Les rangs demandent toute la colonne :
+    pour une source hors mémoire, passer un échantillon (ex. LazyDataset.sample()).
+    """
+    cols = columns or df.select_dtypes(include="number").columns.tolist()
+    return pearson(df[cols].rank(method="average"), cols, chunk_rows)
+
+
+def correlation_matrix(source, method="pearson", columns=None) -> pd.DataFrame:
+    """Matrice de corrélation mise en cache par empreinte de la source et méthode."""
+    if isinstance(source, pd.DataFrame):
+        source_key = helpers.cached_fingerprint(source)
+    else:
+        source_key = getattr(source, "path", id(source))
+    key = (source_key, method, tuple(columns) if columns else None)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    if method == "spearman":
+        data = source if isinstance(source, pd.DataFrame) else source.sample(columns=columns or numeric_columns(source))
+        corr = spearman(data, columns)
+    else:
+        corr = pearson(source, columns)
+    _CACHE[key] = corr
+    while len(_CACHE) > CACHE_MAX_ENTRIES:
+        _CACHE.popitem(last=False)
+    return corr
+
+
+def top_k_pairs(corr: pd.DataFrame, k=TOP_K) -> pd.DataFrame:
+    """Les k paires de variables les plus corrélées (en valeur absolue), sans doublon ni diagonale."""
+    values = corr.to_numpy()
+    i, j = np.triu_indices_from(values, k=1)
+    r = values[i, j]
+    keep = np.isfinite(r)
+    i, j, r = i[keep], j[keep], r[keep]
+    order = np.argsort(-np.abs(r))[:k]
+    return pd.DataFrame({
+        "variable_1": corr.index[i[order]],
+        "variable_2": corr.columns[j[order]],
+        "correlation": r[order],
+    })
+
+
+def heatmap_columns(corr: pd.DataFrame, pairs: pd.DataFrame, max_cols=HEATMAP_MAX_COLS) -> list:
+    """Colonnes des paires les plus fortes (au plus max_cols), ordonnées par classification hiérarchique."""
+    cols = list(dict.fromkeys(pd.concat([pairs["variable_1"], pairs["variable_2"]]).tolist()))
+    if not cols:
+        cols = corr.columns.tolist()
+    cols = cols[:max_cols]
+    if len(cols) < 3:
+        return cols
+    sub = corr.loc[cols, cols].fillna(0.0).to_numpy()
+    dist = 1.0 - np.abs(sub)
+    np.fill_diagonal(dist, 0.0)
+    dist = (dist + dist.T) / 2
+    order = leaves_list(linkage(squareform(np.clip(dist, 0.0, None), checks=False), method="average"))
+    return [cols[i] for i in order]
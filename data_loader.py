@@ -3,45 +3,683 @@
 
 # modules/data_loader.py
 import pandas as pd
-import io
+import numpy as np
+import os
+import re
+import csv
+import glob
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import streamlit as st
+from modules.utils import helpers
+from modules import dataset
 
-def load_file(uploaded_file, sep=",", sheet_name=None):
+# Optional imports avec gestion d'erreur
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+# ------------------------
+# Paramètres de lecture par blocs
+# ------------------------
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024  # au-delà : lecture par blocs automatique
+CHUNK_SIZE = 200_000                          # lignes par bloc
+SAMPLE_ROWS = 50_000                          # échantillon de tête pour déduire les dtypes
+CATEGORY_MAX_RATIO = 0.5                      # n_unique / n_lignes max pour passer en category
+CATEGORY_MAX_LEVELS = 10_000                  # nb max de modalités pour une colonne category
+
+# ------------------------
+# Cache disque des fichiers parsés
+# ------------------------
+CACHE_DIR = "outputs/cache/uploads"
+CACHE_MAX_BYTES = 2 * 1024 ** 3               # taille max du cache (éviction LRU au-delà)
+DATASET_DIR = "outputs/cache/datasets"        # jeux de données hors mémoire (Parquet)
+
+# ------------------------
+# Détection du format CSV sur un échantillon d'octets
+# ------------------------
+SNIFF_BYTES = 64 * 1024
+SNIFF_ENCODINGS = ("utf-8-sig", "cp1252", "latin-1")
+SNIFF_DELIMITERS = ",;\t|"
+_DECIMAL_COMMA = re.compile(r"^-?\d+,\d+$")
+_DECIMAL_DOT = re.compile(r"^-?\d+\.\d+$")
+_NUMBER = re.compile(r"^-?\d+([.,]\d+)?([eE][-+]?\d+)?$")
+
+
+def sniff_csv(uploaded_file, sample_bytes=SNIFF_BYTES) -> dict:
+    """
+    Inspecte les premiers octets d'un CSV et retourne les options de lecture :
+    encodage, séparateur, marque décimale, caractère de citation et ligne d'en-tête.
+    Le résultat se passe tel quel à pd.read_csv (une seule lecture du fichier).
+    """
+    pos = uploaded_file.tell()
+    uploaded_file.seek(0)
+    sample = uploaded_file.read(sample_bytes)
+    uploaded_file.seek(pos)
+
+    # ne garder que des lignes complètes (évite un caractère multi-octets tronqué)
+    if len(sample) == sample_bytes and b"\n" in sample:
+        sample = sample[: sample.rfind(b"\n") + 1]
+
+    encoding, text = "latin-1", None
+    for enc in SNIFF_ENCODINGS:
+        try:
+            text = sample.decode(enc)
+            encoding = enc
+            break
+        except UnicodeDecodeError:
+            continue
+    if text is None:
+        text = sample.decode("latin-1")
+
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(text, delimiters=SNIFF_DELIMITERS)
+        sep, quotechar = dialect.delimiter, dialect.quotechar or '"'
+    except csv.Error:
+        # repli : séparateur le plus fréquent et régulier sur les premières lignes
+        lines = [l for l in text.splitlines()[:50] if l.strip()]
+        counts = {d: [l.count(d) for l in lines] for d in SNIFF_DELIMITERS}
+        sep = max(counts, key=lambda d: (min(counts[d] or [0]) > 0, sum(counts[d])))
+        quotechar = '"'
+
+    rows = list(csv.reader(text.splitlines()[:200], delimiter=sep, quotechar=quotechar))
+    # en-tête par défaut : Sniffer.has_header répond « non » pour tout CSV entièrement textuel,
+    # on ne le suit que si la première ligne contient aussi des nombres (preuve forte de données)
+    try:
+        has_header = sniffer.has_header(text)
+    except csv.Error:
+        has_header = True
+    if not has_header and rows:
+        has_header = not any(_NUMBER.match(f.strip()) for f in rows[0])
+
+    decimal = "."
+    if sep != ",":
+        fields = [f.strip() for row in rows for f in row]
+        n_comma = sum(1 for f in fields if _DECIMAL_COMMA.match(f))
+        n_dot = sum(1 for f in fields if _DECIMAL_DOT.match(f))
+        if n_comma > n_dot:
+            decimal = ","
+
+    return {
+        "encoding": encoding,
+        "sep": sep,
+        "decimal": decimal,
+        "quotechar": quotechar,
+        "header": 0 if has_header else None,
+    }
+
+
+def infer_compact_dtypes(sample: pd.DataFrame, category_max_ratio=CATEGORY_MAX_RATIO, category_max_levels=CATEGORY_MAX_LEVELS) -> dict:
+    """
+    Déduit un plan de dtypes compacts à partir d'un échantillon de tête.
+    Retourne {colonne: 'integer' | 'float' | 'category' | 'keep'}.
+    """
+    plan = {}
+    n = max(len(sample), 1)
+    for col in sample.columns:
+        s = sample[col]
+        if pd.api.types.is_bool_dtype(s):
+            plan[col] = "keep"
+        elif pd.api.types.is_integer_dtype(s):
+            plan[col] = "integer"
+        elif pd.api.types.is_float_dtype(s):
+            plan[col] = "float"
+        elif pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            n_unique = s.nunique(dropna=True)
+            if n_unique <= category_max_levels and n_unique / n <= category_max_ratio:
+                plan[col] = "category"
+            else:
+                plan[col] = "keep"
+        else:
+            plan[col] = "keep"
+    return plan
+
+
+def _downcast_float(s: pd.Series) -> pd.Series:
+    """float64 -> float32 uniquement si la conversion est sans perte."""
+    values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+    with np.errstate(over="ignore", invalid="ignore"):
+        as32 = values.astype(np.float32)
+    lossless = (as32.astype(np.float64) == values) | np.isnan(values)
+    if lossless.all():
+        return pd.Series(as32, index=s.index, name=s.name)
+    return s
+
+
+def _compact_chunk(chunk: pd.DataFrame, plan: dict, categories: dict) -> pd.DataFrame:
+    """
+    Applique le plan de dtypes à un bloc.
+    `categories` accumule les modalités connues par colonne (mis à jour en place) ;
+    une colonne dont la cardinalité explose repasse en 'keep'.
+    """
+    for col in chunk.columns:
+        kind = plan.get(col, "keep")
+        s = chunk[col]
+        if kind == "integer" and pd.api.types.is_integer_dtype(s):
+            chunk[col] = pd.to_numeric(s, downcast="integer")
+        elif kind in ("integer", "float") and pd.api.types.is_float_dtype(s):
+            chunk[col] = _downcast_float(s)
+        elif kind == "category":
+            known = categories.setdefault(col, pd.Index([]))
+            new_levels = pd.Index(s.dropna().unique()).difference(known)
+            if len(known) + len(new_levels) > CATEGORY_MAX_LEVELS:
+                plan[col] = "keep"
+                categories.pop(col, None)
+                continue
+            if len(new_levels):
+                known = known.append(new_levels)
+                categories[col] = known
+            chunk[col] = pd.Categorical(s, categories=known)
+    return chunk
+
+
+def _concat_compact_chunks(chunks: list, plan: dict, categories: dict) -> pd.DataFrame:
+    """Concatène les blocs compactés en alignant les modalités des colonnes category."""
+    if not chunks:
+        return pd.DataFrame()
+    for col, known in categories.items():
+        for chunk in chunks:
+            # ajout de modalités en fin de liste : les codes existants restent valides
+            chunk[col] = chunk[col].cat.set_categories(known)
+    for col, kind in plan.items():
+        if kind == "keep" and col not in categories:
+            for chunk in chunks:
+                if isinstance(chunk[col].dtype, pd.CategoricalDtype):
+                    chunk[col] = chunk[col].astype(object)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_csv_streaming(uploaded_file, sep=",", chunksize=CHUNK_SIZE, sample_rows=SAMPLE_ROWS, **read_kwargs):
+    """
+    Lecture CSV par blocs avec dtypes compacts.
+    - le plan de dtypes est déduit des `sample_rows` premières lignes
+    - chaque bloc est compacté avant d'être conservé (pas de copie int64/object complète)
+    - une barre de progression affiche lignes lues et octets consommés
+    """
+    total_bytes = getattr(uploaded_file, "size", None)
+    progress = st.progress(0.0, text="Lecture par blocs…")
+
+    plan = None
+    categories = {}
+    chunks = []
+    n_rows = 0
+    reader = pd.read_csv(uploaded_file, sep=sep, chunksize=sample_rows or chunksize, **read_kwargs)
+    try:
+        for chunk in reader:
+            if plan is None:
+                plan = infer_compact_dtypes(chunk)
+                reader.chunksize = chunksize
+            chunks.append(_compact_chunk(chunk, plan, categories))
+            n_rows += len(chunk)
+
+            read_bytes = uploaded_file.tell() if hasattr(uploaded_file, "tell") else None
+            if total_bytes and read_bytes is not None:
+                frac = min(read_bytes / total_bytes, 1.0)
+                progress.progress(frac, text=f"{n_rows:,} lignes lues — {read_bytes / 1e6:,.1f} / {total_bytes / 1e6:,.1f} Mo")
+            else:
+                progress.progress(0.0, text=f"{n_rows:,} lignes lues")
+    finally:
+        reader.close()
+
+    df = _concat_compact_chunks(chunks, plan or {}, categories)
+    progress.progress(1.0, text=f"{n_rows:,} lignes lues")
+    return df
+
+
+# ------------------------
+# Optimisation mémoire d'un DataFrame déjà chargé
+# ------------------------
+def optimize_memory(df: pd.DataFrame, category_max_ratio=CATEGORY_MAX_RATIO, arrow_strings=True):
+    """
+    Réduit l'empreinte mémoire d'un DataFrame :
+    entiers et flottants rétrogradés sans perte, textes répétitifs en category,
+    autres textes en chaînes Arrow (si pyarrow est disponible et arrow_strings=True).
+    Retourne (DataFrame optimisé, rapport par colonne avant/après en octets).
+    """
+    before = df.memory_usage(deep=True, index=False)
+    dtypes_before = df.dtypes
+
+    out = df.copy(deep=False)  # les colonnes sont remplacées, l'original reste intact
+    plan = infer_compact_dtypes(out, category_max_ratio=category_max_ratio)
+    out = _compact_chunk(out, plan, {})
+    if arrow_strings and PYARROW_AVAILABLE:
+        for col, kind in plan.items():
+            if kind == "keep" and pd.api.types.is_object_dtype(out[col]) and pd.api.types.infer_dtype(out[col], skipna=True) == "string":
+                out[col] = out[col].astype("string[pyarrow]")
+
+    after = out.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "colonne": df.columns,
+        "dtype_avant": dtypes_before.astype(str).values,
+        "dtype_apres": out.dtypes.astype(str).values,
+        "octets_avant": before.values,
+        "octets_apres": after.values,
+    })
+    report["gain_%"] = (100 * (1 - report["octets_apres"] / report["octets_avant"].where(report["octets_avant"] > 0))).round(1)
+    return out, report
+
+
+# ------------------------
+# Empreinte d'un fichier envoyé, calculée une fois par envoi
+# ------------------------
+def upload_digest(uploaded_file) -> str:
+    """
+    Empreinte du contenu d'un fichier envoyé, mémorisée dans la session par identifiant d'envoi
+    (UploadedFile.file_id, sinon nom et taille) : les reruns ne relisent pas le fichier.
+    """
+    upload_id = getattr(uploaded_file, "file_id", None) or (getattr(uploaded_file, "name", None), getattr(uploaded_file, "size", None))
+    memo = st.session_state.setdefault("_upload_digests", {})
+    if upload_id not in memo:
+        memo.clear()   # un seul fichier envoyé à la fois : pas d'accumulation
+        memo[upload_id] = helpers.hash_file(uploaded_file)
+    return memo[upload_id]
+
+
+# ------------------------
+# Excel : ouverture unique en lecture seule + métadonnées en cache
+# ------------------------
+_EXCEL_META_CACHE = {}  # empreinte du fichier -> [{"feuille", "lignes", "colonnes"}]
+
+
+def excel_sheet_info(uploaded_file) -> list:
+    """
+    Liste les feuilles d'un classeur .xlsx avec leurs dimensions.
+    Le classeur est ouvert en lecture seule (sans parser les cellules) et le résultat
+    est mémorisé par empreinte de contenu : les reruns Streamlit ne rouvrent rien.
+    """
+    digest = upload_digest(uploaded_file)
+    if digest in _EXCEL_META_CACHE:
+        return _EXCEL_META_CACHE[digest]
+
+    uploaded_file.seek(0)
+    wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        info = [{"feuille": ws.title, "lignes": ws.max_row, "colonnes": ws.max_column} for ws in wb.worksheets]
+    finally:
+        wb.close()
+    uploaded_file.seek(0)
+    _EXCEL_META_CACHE[digest] = info
+    return info
+
+
+def read_excel_streaming(uploaded_file, sheet_name=None, chunksize=CHUNK_SIZE, sample_rows=SAMPLE_ROWS):
+    """
+    Lecture d'une feuille .xlsx ligne à ligne (openpyxl read-only) avec dtypes compacts.
+    Seule la feuille choisie est parcourue ; les lignes sont regroupées en blocs
+    compactés selon le même plan de dtypes que la lecture CSV par blocs.
+    """
+    uploaded_file.seek(0)
+    wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        if sheet_name is None or isinstance(sheet_name, int):
+            ws = wb.worksheets[sheet_name or 0]
+        else:
+            ws = wb[sheet_name]
+        total_rows = ws.max_row
+        progress = st.progress(0.0, text=f"Lecture de la feuille {ws.title}…")
+
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        columns = [h if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+        plan = None
+        categories = {}
+        chunks = []
+        buffer = []
+        n_rows = 0
+        block_size = sample_rows or chunksize
+
+        def flush():
+            nonlocal plan
+            chunk = pd.DataFrame(buffer, columns=columns).infer_objects()
+            if plan is None:
+                plan = infer_compact_dtypes(chunk)
+            chunks.append(_compact_chunk(chunk, plan, categories))
+            buffer.clear()
+
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buffer.append(row)
+            n_rows += 1
+            if len(buffer) >= block_size:
+                flush()
+                block_size = chunksize
+                if total_rows:
+                    progress.progress(min(n_rows / total_rows, 1.0), text=f"{n_rows:,} / {total_rows:,} lignes lues")
+        if buffer:
+            flush()
+    finally:
+        wb.close()
+
+    df = _concat_compact_chunks(chunks, plan or {}, categories)
+    progress.progress(1.0, text=f"{n_rows:,} lignes lues")
+    return df
+
+
+# ------------------------
+# Cache Arrow (clé = empreinte du contenu + options de lecture)
+# ------------------------
+def cache_key(uploaded_file, **options) -> str:
+    """Clé de cache : empreinte du contenu du fichier et options de parsing."""
+    digest = upload_digest(uploaded_file)
+    opts = json.dumps(options, sort_keys=True, default=str)
+    return f"{digest}_{hashlib.blake2b(opts.encode(), digest_size=8).hexdigest()}"
+
+
+def _cache_path(key: str, cache_dir=CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"{key}.arrow")
+
+
+def cache_get(key: str, cache_dir=CACHE_DIR):
+    """Relit un DataFrame du cache (fichier Arrow memory-mappé) ou None."""
+    path = _cache_path(key, cache_dir)
+    if not PYARROW_AVAILABLE or not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        os.utime(path)  # marque l'entrée comme récemment utilisée (LRU)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    except Exception:
+        return None
+
+
+def cache_put(key: str, df: pd.DataFrame, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """Écrit le DataFrame au format Arrow IPC puis applique l'éviction LRU."""
+    if not PYARROW_AVAILABLE:
+        return None
+    helpers.ensure_dir(cache_dir)
+    path = _cache_path(key, cache_dir)
+    tmp_path = f"{path}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    except Exception:
+        # colonnes non sérialisables (types mixtes…) : pas de mise en cache
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    evict_cache(cache_dir, max_bytes)
+    return path
+
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """Supprime les entrées les moins récemment utilisées tant que le cache dépasse max_bytes."""
+    helpers.evict_lru(cache_dir, max_bytes, extensions=(".arrow",))
+
+
+def load_file(uploaded_file, sep=None, sheet_name=None, streaming=None, chunksize=CHUNK_SIZE, use_cache=True, optimize=False,
+              has_header=None):
     """
     Lit un fichier CSV ou Excel envoyé via Streamlit file_uploader.
     Retourne un DataFrame.
-    
-    - sep : séparateur du CSV (par défaut ",")
+
+    - sep : séparateur du CSV (None = détection automatique de l'encodage, du séparateur,
+      de la marque décimale, du caractère de citation et de l'en-tête)
     - sheet_name : nom ou index de la feuille Excel (par défaut None = première feuille)
+    - has_header : première ligne du CSV = noms de colonnes (None = détection automatique)
+    - streaming : lecture CSV par blocs avec dtypes compacts
+      (None = automatique au-delà de STREAMING_THRESHOLD_BYTES)
+    - chunksize : nombre de lignes par bloc en mode streaming
+    - use_cache : réutilise le résultat déjà parsé pour un contenu et des options identiques
+    - optimize : applique `optimize_memory` après lecture et affiche le gain par colonne
     """
     if uploaded_file is None:
         return None
-    
+
     filename = uploaded_file.name.lower()
     df = None
 
+    if streaming is None:
+        size = getattr(uploaded_file, "size", 0) or 0
+        streaming = size > STREAMING_THRESHOLD_BYTES
+
+    key = None
+    if use_cache and PYARROW_AVAILABLE:
+        # la lecture par blocs produit des dtypes compacts : elle fait partie de la clé
+        key = cache_key(uploaded_file, sep=sep, sheet_name=sheet_name, optimize=optimize, streaming=streaming,
+                        has_header=has_header)
+        df = cache_get(key)
+        if df is not None:
+            st.success(f"Données chargées depuis le cache — {df.shape[0]} lignes × {df.shape[1]} colonnes")
+            return df
+
     try:
         if filename.endswith(".csv"):
-            # lecture CSV avec séparateur paramétrable
-            try:
-                df = pd.read_csv(uploaded_file, sep=sep)
-            except Exception:
-                uploaded_file.seek(0)
-                content = uploaded_file.read()
-                df = pd.read_csv(io.StringIO(content.decode('utf-8', errors='ignore')), sep=sep)
+            # options détectées sur un échantillon d'octets, puis une seule lecture
+            options = sniff_csv(uploaded_file)
+            if sep is not None:
+                options["sep"] = sep
+            if has_header is not None:
+                options["header"] = 0 if has_header else None
+            st.caption(
+                f"Format détecté — encodage : {options['encoding']} | séparateur : {options['sep']!r} | "
+                f"décimale : {options['decimal']!r} | en-tête : {'oui' if options['header'] == 0 else 'non'}"
+            )
+            uploaded_file.seek(0)
+            if streaming:
+                df = read_csv_streaming(uploaded_file, chunksize=chunksize, **options)
+            else:
+                df = pd.read_csv(uploaded_file, **options)
 
         elif filename.endswith((".xls", ".xlsx")):
-            # lecture Excel avec choix de feuille
-            df = pd.read_excel(uploaded_file, sheet_name=sheet_name)
+            # lecture Excel avec choix de feuille (.xlsx : une seule passe en lecture seule)
+            if filename.endswith(".xlsx") and OPENPYXL_AVAILABLE:
+                df = read_excel_streaming(uploaded_file, sheet_name=sheet_name, chunksize=chunksize)
+            else:
+                df = pd.read_excel(uploaded_file, sheet_name=sheet_name or 0)
 
         else:
             st.error("Format de fichier non supporté. Veuillez charger un CSV ou Excel.")
             return None
 
-        st.success(f"Données chargées — {df.shape[0]} lignes × {df.shape[1]} colonnes")
+        if optimize:
+            df, report = optimize_memory(df)
+            with st.expander(f"🧹 Optimisation mémoire — {report['octets_avant'].sum() / 1e6:,.1f} Mo → {report['octets_apres'].sum() / 1e6:,.1f} Mo"):
+                st.dataframe(report)
+
+        if key is not None:
+            cache_put(key, df)
+
+        mem_mb = df.memory_usage(deep=True).sum() / 1e6
+        st.success(f"Données chargées — {df.shape[0]} lignes × {df.shape[1]} colonnes ({mem_mb:,.1f} Mo en mémoire)")
 
     except Exception as e:
         st.error(f"Erreur lecture fichier: {e}")
         raise
 
     return df
+
+
+# ------------------------
+# Mode hors mémoire : poignée LazyDataset au lieu d'un DataFrame
+# ------------------------
+def open_dataset(uploaded_file, sep=None, sheet_name=None, chunksize=CHUNK_SIZE, dataset_dir=DATASET_DIR, has_header=None):
+    """
+    Convertit le fichier en Parquet sur disque (une seule fois par contenu)
+    et retourne un `dataset.LazyDataset` : aperçu, échantillons et itération par blocs
+    sans charger le fichier complet en mémoire.
+    """
+    if uploaded_file is None:
+        return None
+    if not dataset.PYARROW_AVAILABLE:
+        st.error("Le mode hors mémoire nécessite pyarrow (`pip install pyarrow`).")
+        return None
+
+    filename = uploaded_file.name.lower()
+    helpers.ensure_dir(dataset_dir)
+    path = os.path.join(dataset_dir, f"{cache_key(uploaded_file, sep=sep, sheet_name=sheet_name, has_header=has_header)}.parquet")
+    if os.path.exists(path):
+        handle = dataset.LazyDataset(path)
+        st.success(f"Jeu de données hors mémoire réutilisé — {handle.n_rows} lignes × {len(handle.columns)} colonnes")
+        return handle
+
+    try:
+        with st.spinner("Conversion en Parquet par blocs…"):
+            if filename.endswith(".csv"):
+                options = sniff_csv(uploaded_file)
+                if sep is not None:
+                    options["sep"] = sep
+                if has_header is not None:
+                    options["header"] = 0 if has_header else None
+                handle = dataset.from_csv(uploaded_file, path, chunksize=chunksize, **options)
+            elif filename.endswith((".xls", ".xlsx")):
+                # Excel est borné à ~1M lignes : lecture en mémoire puis écriture sur disque
+                df = load_file(uploaded_file, sheet_name=sheet_name, use_cache=False)
+                handle = dataset.from_dataframe(df, path, chunksize=chunksize)
+            else:
+                st.error("Format de fichier non supporté. Veuillez charger un CSV ou Excel.")
+                return None
+    except Exception as e:
+        st.error(f"Erreur lecture fichier: {e}")
+        raise
+
+    st.success(f"Jeu de données hors mémoire prêt — {handle.n_rows} lignes × {len(handle.columns)} colonnes "
+               f"({handle.nbytes_on_disk() / 1e6:,.1f} Mo sur disque)")
+    return handle
+
+
+# ------------------------
+# Ingestion multi-fichiers (dossier ou motif glob de partitions)
+# ------------------------
+PARTITION_EXTENSIONS = (".csv", ".xlsx", ".xls", ".parquet")
+DATA_ROOT_ENV = "DATA_TOOL_DATA_ROOT"
+DATA_ROOT = os.environ.get(DATA_ROOT_ENV, "data")   # seules les partitions sous cette racine sont lues
+
+
+def _within(path: str, root: str) -> bool:
+    root = os.path.realpath(root)
+    return os.path.commonpath([os.path.realpath(path), root]) == root
+
+
+def list_partitions(source: str, root=DATA_ROOT) -> list:
+    """
+    Fichiers CSV/Excel/Parquet d'un dossier (récursif) ou correspondant à un motif glob,
+    relatif à `root` ; tout chemin qui sort de la racine (.., lien symbolique, chemin absolu) est ignoré.
+    """
+    source = os.path.join(root, source)
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*")
+        paths = glob.glob(pattern, recursive=True)
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(PARTITION_EXTENSIONS) and _within(p, root))
+
+
+def _read_partition(path: str, sep=None, sheet_name=None):
+    """Lecture d'une partition dans un processus fils : retourne (chemin, DataFrame compacté, secondes)."""
+    start = time.perf_counter()
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        with open(path, "rb") as f:
+            options = sniff_csv(f)
+            if sep is not None:
+                options["sep"] = sep
+            df = pd.read_csv(f, **options)
+    elif lower.endswith((".xls", ".xlsx")):
+        df = pd.read_excel(path, sheet_name=sheet_name or 0)
+    else:
+        df = pd.read_parquet(path)
+    df = _compact_chunk(df, infer_compact_dtypes(df), {})
+    return path, df, time.perf_counter() - start
+
+
+def _unify_partitions(frames: list) -> pd.DataFrame:
+    """Aligne les dtypes des partitions (union des modalités category) puis concatène."""
+    for col in frames[0].columns:
+        is_cat = [isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames]
+        if all(is_cat):
+            cats = frames[0][col].cat.categories
+            for f in frames[1:]:
+                cats = cats.append(f[col].cat.categories.difference(cats))
+            for f in frames:
+                f[col] = f[col].cat.set_categories(cats)
+        elif any(is_cat):
+            for f, cat in zip(frames, is_cat):
+                if cat:
+                    f[col] = f[col].astype(object)
+    # entiers de largeurs différentes / entiers + flottants : promotion par pd.concat
+    return pd.concat(frames, ignore_index=True)
+
+
+def _dtype_family(dtype) -> str:
+    """Famille de dtype comparée entre partitions (les largeurs entier / flottant sont unifiées à la concaténation)."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return "booléen"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numérique"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "date"
+    return "texte"
+
+
+def partition_schema(df: pd.DataFrame) -> list:
+    """Schéma comparé entre partitions : [(colonne, famille de dtype)] dans l'ordre des colonnes."""
+    return [(col, _dtype_family(dtype)) for col, dtype in df.dtypes.items()]
+
+
+def load_partitions(source: str, sep=None, sheet_name=None, max_workers=None, root=DATA_ROOT):
+    """
+    Lit en parallèle (pool de processus) toutes les partitions d'un dossier ou d'un motif glob
+    (relatif à `root`) et concatène avec des dtypes unifiés.
+    Chaque partition est comparée dès sa lecture à la première lue (noms, ordre et familles de dtypes) :
+    au premier schéma différent ou à la première erreur de lecture, les lectures restantes sont annulées.
+    Retourne (DataFrame, rapport par fichier).
+    """
+    paths = list_partitions(source, root=root)
+    if not paths:
+        st.error(f"Aucun fichier CSV/Excel/Parquet trouvé pour : {source} (racine autorisée : {os.path.abspath(root)})")
+        return None, None
+
+    results = {}
+    reference = None
+    failure = None
+    progress = st.progress(0.0, text=f"Lecture de {len(paths)} fichiers…")
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_read_partition, p, sep, sheet_name): p for p in paths}
+        for i, fut in enumerate(as_completed(futures), start=1):
+            try:
+                path, df, seconds = fut.result()
+            except Exception as e:
+                failure = f"Erreur de lecture de {futures[fut]} : {e}"
+                break
+            results[path] = (df, seconds)
+            schema = partition_schema(df)
+            if reference is None:
+                reference = (path, schema)
+            elif schema != reference[1]:
+                diff = sorted(set(schema) ^ set(reference[1])) or "ordre des colonnes"
+                failure = f"Schéma de {path} différent de {reference[0]} : {diff}"
+                break
+            progress.progress(i / len(paths), text=f"{i} / {len(paths)} fichiers lus")
+        if failure is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    report = pd.DataFrame([
+        {"fichier": p, "lignes": len(results[p][0]), "colonnes": results[p][0].shape[1], "secondes": round(results[p][1], 3)}
+        for p in paths if p in results
+    ])
+    if failure is not None:
+        st.error(failure)
+        return None, report
+
+    df = _unify_partitions([results[p][0] for p in paths])
+    st.success(f"Données chargées — {len(paths)} fichiers, {df.shape[0]} lignes × {df.shape[1]} colonnes")
+    return df, report
@@ -1,7 +1,7 @@
 # app.py
 import streamlit as st
 import pandas as pd
-from modules import data_loader, eda, preprocessing, modeling, evaluation, reporting
+from modules import data_loader, dataset, eda, preprocessing, modeling, evaluation, reporting, summaries, sketches, history, duplicates, outliers, cleaning, execution
 from sklearn.model_selection import train_test_split
 
 # ------------------------
@@ -73,38 +73,175 @@ section = st.sidebar.radio(
     ["📥 Chargement", "🔎 EDA", "🛠️ Prétraitement", "🤖 Modélisation", "📈 Évaluation", "📝 Reporting"]
 )
 
+# budget d'exécution de la session (borné par DATA_TOOL_N_JOBS du déploiement)
+with st.sidebar.expander("⚙️ Exécution"):
+    max_jobs = execution.deployment_budget()
+    session_jobs = st.number_input("Cœurs alloués à la session", 1, max_jobs, max_jobs, key="n_jobs")
+    execution.set_budget(session_jobs)
+    budget = execution.summary()
+    st.caption(
+        f"Parallélisme effectif : n_jobs = {budget['budget_session']}, threads BLAS/OpenMP = {budget['budget_session']} / workers "
+        f"(déploiement : {budget['budget_deploiement']} sur {budget['coeurs_disponibles']} cœurs disponibles, "
+        f"{budget['coeurs_reserves']} réservés par les calculs en cours de toutes les sessions)"
+    )
+    if budget["bibliotheques_natives"]:
+        st.caption("Bibliothèques natives bornées : " + ", ".join(budget["bibliotheques_natives"]))
+
 # ------------------------
 # Sections
 # ------------------------
 if section == "📥 Chargement":
     st.header("📥 Chargement des données")
     uploaded = st.file_uploader("Charger un fichier (CSV ou Excel)", type=["csv", "xlsx", "xls"])
-    sep = ","; sheet = None
+    sep = None; sheet = None; streaming = False; has_header = None
     if uploaded:
         if uploaded.name.lower().endswith(".csv"):
-            sep = st.selectbox("Séparateur CSV", options=[",", ";", "\t"], index=0)
+            sep_choice = st.selectbox("Séparateur CSV", options=["auto", ",", ";", "\t"], index=0)
+            sep = None if sep_choice == "auto" else sep_choice
+            header_choice = st.selectbox("Première ligne = noms de colonnes", options=["auto", "oui", "non"], index=0)
+            has_header = None if header_choice == "auto" else header_choice == "oui"
+            streaming = st.checkbox("⚡ Lecture par blocs (dtypes compacts, gros fichiers)", value=uploaded.size > data_loader.STREAMING_THRESHOLD_BYTES)
         elif uploaded.name.lower().endswith((".xls", ".xlsx")):
-            xls = pd.ExcelFile(uploaded)
-            sheet = st.selectbox("Choisissez la feuille Excel", options=xls.sheet_names)
-        df = data_loader.load_file(uploaded, sep=sep, sheet_name=sheet)
-        if df is not None:
-            st.session_state["data"] = df
-            st.success("✅ Données chargées avec succès !")
-            st.dataframe(df.head())
+            if uploaded.name.lower().endswith(".xlsx"):
+                sheets_info = data_loader.excel_sheet_info(uploaded)
+                sheet_names = [info["feuille"] for info in sheets_info]
+                st.caption(" | ".join(f"{info['feuille']} : {info['lignes']} × {info['colonnes']}" for info in sheets_info))
+            else:
+                sheet_names = pd.ExcelFile(uploaded).sheet_names
+            sheet = st.selectbox("Choisissez la feuille Excel", options=sheet_names)
+        out_of_core = st.checkbox("🗄️ Mode hors mémoire (fichier converti en Parquet, EDA sur échantillon)", value=False)
+        if out_of_core:
+            handle = data_loader.open_dataset(uploaded, sep=sep, sheet_name=sheet, has_header=has_header)
+            if handle is not None:
+                st.session_state["dataset"] = handle
+                st.session_state["data"] = handle.sample(dataset.SAMPLE_ROWS)
+                st.info(f"ℹ️ Les onglets suivants travaillent sur un échantillon de {len(st.session_state['data'])} lignes sur {handle.n_rows}.")
+                st.dataframe(handle.head())
+        else:
+            optimize = st.checkbox("🧹 Optimiser la mémoire (downcast numérique, category, chaînes Arrow)", value=False)
+            df = data_loader.load_file(uploaded, sep=sep, sheet_name=sheet, streaming=streaming, optimize=optimize,
+                                         has_header=has_header)
+            if df is not None:
+                st.session_state["data"] = df
+                st.session_state.pop("dataset", None)
+                st.success("✅ Données chargées avec succès !")
+                st.dataframe(df.head())
+
+    with st.expander("📂 Ingestion multi-fichiers (dossier ou motif de partitions)"):
+        source = st.text_input(f"Dossier ou motif glob relatif à {data_loader.DATA_ROOT}/ (ex. 2024-*.csv)")
+        if source and st.button("📥 Charger les partitions"):
+            df, report = data_loader.load_partitions(source)
+            if report is not None:
+                st.dataframe(report)
+            if df is not None:
+                st.session_state["data"] = df
+                st.session_state.pop("dataset", None)
+                st.dataframe(df.head())
+
+    with st.expander("📚 Suivi incrémental par lots (profil cumulé)"):
+        dataset_id = st.text_input("Identifiant du jeu de données suivi", value=st.session_state.get("summary_id", ""))
+        batch_label = st.text_input("Libellé du lot (ex. 2024-06)")
+        if dataset_id and "data" in st.session_state and st.button("➕ Ajouter les données chargées comme nouveau lot"):
+            try:
+                summary = summaries.update_summary(dataset_id, st.session_state["data"], label=batch_label or None)
+                st.session_state["summary_id"] = dataset_id
+                st.success(f"✅ Lot fusionné — {summary.n_rows} lignes cumulées sur {len(summary.batches)} lots")
+            except ValueError as e:
+                st.warning(f"⚠️ Lot non fusionné : {e}")
+        if dataset_id:
+            stored = summaries.load_summary(dataset_id)
+            if stored is not None:
+                st.dataframe(pd.DataFrame(stored.batches))
+                st.dataframe(stored.to_frame())
 
 elif section == "🔎 EDA":
     st.header("🔎 Analyse exploratoire (EDA)")
     if "data" in st.session_state:
-        eda.run_eda(st.session_state["data"])
+        eda.run_eda(st.session_state["data"], dataset=st.session_state.get("dataset"))
     else:
         st.warning("⚠️ Chargez d'abord les données dans l'onglet Chargement.")
 
 elif section == "🛠️ Prétraitement":
     st.header("🛠️ Prétraitement")
     if "data" in st.session_state:
-        df = st.session_state["data"]
-        profile = eda.generate_profile(df)
-        issues = preprocessing.detect_and_propose_corrections(profile, df)
+        # nouvelles données : l'historique repart des données d'origine (même contenu : conservé)
+        hist = history.session_history(st.session_state)
+
+        with st.expander(f"🕓 Historique des corrections (version {hist.current})"):
+            st.dataframe(hist.versions())
+            st.caption(f"Deltas en mémoire : {hist.nbytes() / 1e6:.2f} Mo")
+            col_undo, col_redo = st.columns(2)
+            moved = False
+            if col_undo.button("↩️ Annuler", disabled=not hist.can_undo):
+                hist.undo(); moved = True
+            if col_redo.button("↪️ Rétablir", disabled=not hist.can_redo):
+                hist.redo(); moved = True
+            target = st.selectbox("Revenir à la version", options=list(hist.nodes), index=list(hist.nodes).index(hist.current))
+            if target != hist.current and st.button("🔀 Basculer sur cette version"):
+                hist.checkout(target); moved = True
+            if moved:
+                st.rerun()
+            if len(hist.nodes) > 1:
+                col_a, col_b = st.columns(2)
+                version_a = col_a.selectbox("Version A", options=list(hist.nodes), key="compare_a")
+                version_b = col_b.selectbox("Version B", options=list(hist.nodes), index=len(hist.nodes) - 1, key="compare_b")
+                if st.button("🔍 Comparer les versions"):
+                    comparison = hist.compare(version_a, version_b)
+                    st.write({k: v for k, v in comparison.items() if k != "cellules"})
+                    st.dataframe(comparison["cellules"])
+
+        # les corrections s'enchaînent sur la version courante
+        df = hist.frame()
+        if "dataset" in st.session_state:
+            st.info(f"ℹ️ Mode hors mémoire : détection et corrections sur un échantillon de {len(st.session_state['data'])} lignes "
+                    f"sur {st.session_state['dataset'].n_rows} ; le bouton « Appliquer les corrections au jeu complet » les rejoue sur toutes les lignes, par blocs.")
+        approx = st.checkbox("≈ Statistiques approchées (sketches HyperLogLog / KLL / Space-Saving)", value="dataset" in st.session_state)
+        stats = None
+        if approx:
+            # jeu hors mémoire : sketches calculés par blocs sur toutes les lignes tant qu'aucune correction
+            # n'est appliquée (version 0) ; ensuite sur la version courante, clé = version + empreinte
+            source = st.session_state["dataset"] if "dataset" in st.session_state and hist.current == 0 else df
+            stats_key = (getattr(source, "path", None), hist.current, eda.data_fingerprint(df))
+            if st.session_state.get("sketches_key") != stats_key:
+                with st.spinner("Calcul des sketches…"):
+                    st.session_state["sketches"] = sketches.column_sketches(source)
+                st.session_state["sketches_key"] = stats_key
+            stats = st.session_state["sketches"]
+        description = preprocessing.scan_anomalies(df, stats=stats)
+        if "summary_id" in st.session_state:
+            if st.checkbox(f"📚 Détecter sur l'historique cumulé ({st.session_state['summary_id']})", value=False):
+                stored = summaries.load_summary(st.session_state["summary_id"])
+                if stored is not None:
+                    description = stored.to_description()
+        with st.expander("🔁 Doublons (clé de colonnes, quasi-doublons)"):
+            duplicate_subset = st.multiselect("Colonnes clés des doublons exacts (vide = toutes)", df.columns.tolist(), key="duplicate_subset") or None
+            if duplicate_subset:
+                clusters_key = (eda.data_fingerprint(df), tuple(duplicate_subset))
+                if st.session_state.get("duplicate_clusters", (None,))[0] != clusters_key:
+                    st.session_state["duplicate_clusters"] = (clusters_key, duplicates.duplicate_clusters(df, duplicate_subset).head(50))
+                st.dataframe(st.session_state["duplicate_clusters"][1])
+            text_cols = st.multiselect("Colonnes texte pour les quasi-doublons (MinHash / LSH)", df.select_dtypes(include=["object", "string", "category"]).columns.tolist(), key="near_duplicate_cols")
+            threshold = st.slider("Similarité minimale (Jaccard)", 0.5, 1.0, duplicates.THRESHOLD, 0.05)
+            near_key = (eda.data_fingerprint(df), tuple(text_cols), threshold)
+            if text_cols and st.button("🔎 Rechercher les quasi-doublons"):
+                with st.spinner("Signatures MinHash…"):
+                    st.session_state["near_duplicates"] = (near_key, duplicates.near_duplicate_clusters(df, text_cols, threshold))
+            near_labels = None
+            if st.session_state.get("near_duplicates", (None,))[0] == near_key:
+                near_labels, clusters = st.session_state["near_duplicates"][1]
+                st.write(f"{len(clusters)} groupes de quasi-doublons")
+                st.dataframe(clusters.head(50))
+        multivariate = st.checkbox("🌲 Valeurs aberrantes multivariées (IsolationForest sur échantillon)", value=False)
+        outliers_key = (eda.data_fingerprint(df), multivariate)
+        if st.session_state.get("outliers_key") != outliers_key:
+            with st.spinner("Détection des valeurs aberrantes…"):
+                st.session_state["outliers_report"] = outliers.outlier_report(df, multivariate=multivariate)
+            st.session_state["outliers_key"] = outliers_key
+        outliers_report = st.session_state["outliers_report"]
+        with st.expander("📏 Valeurs aberrantes (IQR / z robuste)"):
+            st.dataframe(outliers_report["colonnes"])
+        issues = preprocessing.detect_and_propose_corrections(description, df, duplicate_subset=duplicate_subset, near_labels=near_labels,
+                                                              outliers_report=outliers_report)
         if issues:
             st.subheader("🚨 Anomalies détectées et corrections proposées")
             corrections_dict = {}
@@ -114,28 +251,54 @@ elif section == "🛠️ Prétraitement":
                 st.markdown(f"**Colonne : `{col}`**"); st.write(f"Anomalies : {anomalies}")
                 choice = st.selectbox(f"Choisir correction pour `{col}`", ["Ne pas appliquer de correction"] + issue["propositions"], key=f"choice_{col}")
                 corrections_dict[col] = choice
+            target = None
+            if "Encodage cible (hors pli)" in corrections_dict.values():
+                target = st.selectbox("Variable cible (pour l'encodage cible)", df.columns.tolist(), key="encoding_target")
             if st.button("✅ Appliquer toutes les corrections sélectionnées"):
                 valid_corrections = {col: corr for col, corr in corrections_dict.items() if corr != "Ne pas appliquer de correction"}
                 if valid_corrections:
-                    df_corrige, log_df = preprocessing.apply_corrections_with_log(df, valid_corrections)
-                    st.session_state["clean_data"] = df_corrige
+                    # mêmes corrections, apprises sous forme de transformateur réutilisable sur de nouveaux lots
+                    transformer = cleaning.CleaningTransformer(valid_corrections, target=target, duplicate_subset=duplicate_subset)
+                    df_corrige, log_df = transformer.fit_transform_with_log(df, stats=stats, outliers_report=outliers_report,
+                                                                            near_labels=near_labels)
+                    hist.commit(df_corrige, label=", ".join(f"{col}: {corr}" for col, corr in valid_corrections.items()), log=log_df,
+                                transformer=transformer)
                     st.session_state["correction_log"] = log_df
                     st.success("✅ Toutes les corrections appliquées !")
-                    st.subheader("📋 Tableau récapitulatif des corrections")
-                    st.dataframe(log_df)
-                    preprocessing.download_df(df_corrige, label="Télécharger la base corrigée", file_name="base_corrigee", file_format="excel")
-                    preprocessing.download_df(log_df, label="Télécharger le log des corrections", file_name="log_corrections", file_format="excel")
                 else:
                     st.info("Aucune correction sélectionnée à appliquer.")
         else:
             st.info("✅ Aucune anomalie détectée !")
+
+        # récapitulatif de la version courante ; exports générés seulement au clic
+        if hist.current and hist.nodes[hist.current]["log"] is not None:
+            st.subheader("📋 Tableau récapitulatif des corrections")
+            st.dataframe(hist.nodes[hist.current]["log"])
+            export_format = st.selectbox("Format d'export de la base corrigée", list(preprocessing.EXPORT_FORMATS), format_func=lambda f: preprocessing.EXPORT_FORMATS[f][2])
+            preprocessing.download_df(hist.frame(), label="Télécharger la base corrigée", file_name="base_corrigee", file_format=export_format)
+            preprocessing.download_df(hist.nodes[hist.current]["log"], label="Télécharger le log des corrections", file_name="log_corrections", file_format="excel")
+            steps = hist.transformers()
+            if steps and "dataset" in st.session_state and st.button("🗄️ Appliquer les corrections au jeu complet (par blocs)"):
+                with st.spinner("Correction par blocs…"):
+                    full, full_log = cleaning.apply_to_dataset(cleaning.chain(steps), st.session_state["dataset"], f"v{hist.current}")
+                st.success(f"✅ Jeu complet corrigé — {full.n_rows} lignes : {full.path}")
+                st.dataframe(full_log)
+            if steps and st.button("💾 Enregistrer le transformateur de nettoyage"):
+                path = cleaning.save_transformer(cleaning.chain(steps), f"v{hist.current}")
+                st.success(f"Transformateur enregistré : {path}")
+                st.caption(f"Application à un nouveau lot : python -m modules.cleaning {path} nouveau_lot.csv lot_corrige.parquet")
     else:
         st.warning("⚠️ Chargez d'abord les données.")
 
 elif section == "🤖 Modélisation":
     st.header("🤖 Modélisation")
-    df_to_use = st.session_state.get("clean_data", st.session_state.get("data"))
+    df_to_use = history.corrected_frame(st.session_state)
+    if df_to_use is None:
+        df_to_use = st.session_state.get("data")
     if df_to_use is not None:
+        if "dataset" in st.session_state:
+            st.info(f"ℹ️ Mode hors mémoire : entraînement sur un échantillon de {len(df_to_use)} lignes "
+                    f"sur {st.session_state['dataset'].n_rows}.")
         res = modeling.run_modeling(df_to_use)
         st.success("✅ Modèle entraîné et jeux train/test créés avec succès !")
         st.subheader("📌 Pipeline"); st.write(res["pipeline"])
@@ -0,0 +1,241 @@
+# modules/dataset.py
+"""
+Jeu de données hors mémoire.
+Le fichier chargé est converti une fois en Parquet sur disque (par blocs) ;
+les étapes ne matérialisent ensuite que ce dont elles ont besoin :
+aperçu, échantillon pour l'EDA et les graphiques, itération par blocs.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Optional imports avec gestion d'erreur
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+CHUNK_SIZE = 200_000      # lignes par bloc (écriture et itération)
+SAMPLE_ROWS = 100_000     # taille par défaut des échantillons pour EDA / graphiques
+
+
+class LazyDataset:
+    """Poignée sur un fichier Parquet lu en memory-map, sans chargement complet."""
+
+    def __init__(self, path: str):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow est requis pour le mode hors mémoire (`pip install pyarrow`)")
+        self.path = path
+        self._file = pq.ParquetFile(path, memory_map=True)
+
+    # ------------------------
+    # Métadonnées (aucune lecture de données)
+    # ------------------------
+    @property
+    def n_rows(self) -> int:
+        return self._file.metadata.num_rows
+
+    @property
+    def columns(self) -> list:
+        return self._file.schema_arrow.names
+
+    @property
+    def shape(self) -> tuple:
+        return (self.n_rows, len(self.columns))
+
+    @property
+    def dtypes(self) -> pd.Series:
+        return self._file.schema_arrow.empty_table().to_pandas().dtypes
+
+    def nbytes_on_disk(self) -> int:
+        return os.path.getsize(self.path)
+
+    def __repr__(self):
+        return f"LazyDataset({self.path!r}, {self.n_rows} lignes × {len(self.columns)} colonnes)"
+
+    # ------------------------
+    # Vues matérialisées à la demande
+    # ------------------------
+    def head(self, n=5, columns=None) -> pd.DataFrame:
+        """Premières lignes : seul le premier groupe de lignes utile est lu."""
+        for batch in self._file.iter_batches(batch_size=n, columns=columns):
+            return batch.to_pandas()
+        return self._empty(columns)
+
+    def _empty(self, columns=None) -> pd.DataFrame:
+        """DataFrame vide avec les colonnes et dtypes du fichier."""
+        table = self._file.schema_arrow.empty_table()
+        return (table.select(columns) if columns is not None else table).to_pandas()
+
+    def iter_chunks(self, chunksize=CHUNK_SIZE, columns=None):
+        """Itère sur le jeu de données par blocs de `chunksize` lignes (DataFrames)."""
+        for batch in self._file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+
+    def sample(self, n=SAMPLE_ROWS, columns=None, random_state=42) -> pd.DataFrame:
+        """
+        Échantillon aléatoire uniforme de `n` lignes.
+        Les positions sont tirées une fois puis prélevées groupe de lignes par groupe
+        de lignes : la mémoire reste bornée par la taille d'un groupe.
+        """
+        if n >= self.n_rows:
+            return self.to_pandas(columns=columns)
+        if n <= 0:
+            return self._empty(columns)
+        rng = np.random.default_rng(random_state)
+        positions = np.sort(rng.choice(self.n_rows, size=n, replace=False))
+
+        parts = []
+        offset = 0
+        for i in range(self._file.num_row_groups):
+            rg_rows = self._file.metadata.row_group(i).num_rows
+            lo, hi = np.searchsorted(positions, [offset, offset + rg_rows])
+            if hi > lo:
+                table = self._file.read_row_group(i, columns=columns)
+                parts.append(table.take(pa.array(positions[lo:hi] - offset)))
+            offset += rg_rows
+        return pa.concat_tables(parts).to_pandas() if parts else self._empty(columns)
+
+    def to_pandas(self, columns=None) -> pd.DataFrame:
+        """Matérialise tout le jeu de données (ou certaines colonnes) en mémoire."""
+        return self._file.read(columns=columns).to_pandas()
+
+
+# ------------------------
+# Construction du fichier Parquet
+# ------------------------
+def _arrow_schema(sample: pd.DataFrame) -> "pa.Schema":
+    """Schéma Arrow élargi déduit d'un échantillon (entiers en int64, textes en string)."""
+    fields = []
+    for col in sample.columns:
+        s = sample[col]
+        if pd.api.types.is_bool_dtype(s):
+            typ = pa.bool_()
+        elif pd.api.types.is_integer_dtype(s):
+            typ = pa.int64()
+        elif pd.api.types.is_float_dtype(s):
+            typ = pa.float64()
+        elif pd.api.types.is_datetime64_any_dtype(s):
+            typ = pa.timestamp("ns")
+        else:
+            typ = pa.string()
+        fields.append(pa.field(str(col), typ))
+    return pa.schema(fields)
+
+
+def _incompatible_fields(chunk: pd.DataFrame, schema) -> list:
+    """Colonnes non textuelles du schéma que le bloc ne peut pas respecter (ex. texte dans une colonne numérique)."""
+    bad = []
+    for field in schema:
+        if pa.types.is_string(field.type):
+            continue
+        try:
+            pa.Array.from_pandas(chunk[field.name]).cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            bad.append(field.name)
+    return bad
+
+
+def _widen(schema, names: list) -> "pa.Schema":
+    """Schéma où les colonnes `names` passent en texte."""
+    return pa.schema([pa.field(f.name, pa.string()) if f.name in names else f for f in schema])
+
+
+def _rewrite(path: str, schema) -> "pq.ParquetWriter":
+    """
+    Réécrit les groupes de lignes déjà écrits avec le schéma élargi (colonnes converties en texte)
+    et retourne un writer ouvert sur le nouveau fichier, prêt pour les blocs suivants.
+    """
+    previous = f"{path}.prev"
+    os.replace(path, previous)
+    writer = pq.ParquetWriter(path, schema)
+    source = pq.ParquetFile(previous)
+    for i in range(source.num_row_groups):
+        writer.write_table(source.read_row_group(i).cast(schema))
+    source.close()
+    os.remove(previous)
+    return writer
+
+
+def _to_table(chunk: pd.DataFrame, schema) -> "pa.Table":
+    chunk.columns = [str(c) for c in chunk.columns]
+    for field in schema:
+        if pa.types.is_string(field.type):
+            chunk[field.name] = chunk[field.name].astype("string")
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    try:
+        # ex. colonne entière devenue float à cause de NaN : la conversion sûre réussit
+        return table.cast(schema)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"Schéma incohérent entre blocs : {e}") from e
+
+
+def write_chunks(chunks, path: str) -> LazyDataset:
+    """
+    Écrit un itérable de DataFrames dans un fichier Parquet (un groupe de lignes par bloc).
+    Le schéma vient du premier bloc ; si un bloc suivant apporte du texte dans une colonne
+    numérique, la colonne passe en texte et les groupes déjà écrits sont réécrits.
+    """
+    tmp_path = f"{path}.tmp"
+    writer = None
+    try:
+        for chunk in chunks:
+            chunk.columns = [str(c) for c in chunk.columns]
+            if writer is None:
+                schema = _arrow_schema(chunk)
+                writer = pq.ParquetWriter(tmp_path, schema)
+            bad = _incompatible_fields(chunk, schema)
+            if bad:
+                schema = _widen(schema, bad)
+                writer.close()
+                writer = _rewrite(tmp_path, schema)
+            writer.write_table(_to_table(chunk, schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("Aucune donnée à écrire")
+    os.replace(tmp_path, path)
+    return LazyDataset(path)
+
+
+def write_stream(chunks, sink, file_format="parquet"):
+    """
+    Écrit un itérable de DataFrames dans un fichier binaire ouvert (Parquet ou Feather / Arrow IPC),
+    un bloc converti à la fois, avec le schéma élargi déduit du premier bloc.
+    """
+    writer = None
+    try:
+        for chunk in chunks:
+            chunk = chunk.copy()
+            if writer is None:
+                schema = _arrow_schema(chunk)
+                writer = pq.ParquetWriter(sink, schema) if file_format == "parquet" else pa.ipc.new_file(sink, schema)
+            writer.write_table(_to_table(chunk, schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def from_dataframe(df: pd.DataFrame, path: str, chunksize=CHUNK_SIZE) -> LazyDataset:
+    """Convertit un DataFrame déjà en mémoire en jeu de données sur disque."""
+    return write_chunks((df.iloc[i:i + chunksize].copy() for i in range(0, max(len(df), 1), chunksize)), path)
+
+
+def from_csv(fileobj, path: str, chunksize=CHUNK_SIZE, **read_kwargs) -> LazyDataset:
+    """
+    Convertit un CSV en Parquet bloc par bloc, sans jamais le charger entièrement.
+    Les colonnes texte de l'échantillon de tête sont forcées en texte sur tous les blocs
+    pour garder un schéma stable.
+    """
+    fileobj.seek(0)
+    head = pd.read_csv(fileobj, nrows=min(chunksize, 10_000), **read_kwargs)
+    text_cols = {c: "string" for c in head.columns
+                 if not (pd.api.types.is_numeric_dtype(head[c]) or pd.api.types.is_bool_dtype(head[c]))}
+    fileobj.seek(0)
+    reader = pd.read_csv(fileobj, chunksize=chunksize, dtype=text_cols, **read_kwargs)
+    with reader:
+        return write_chunks(reader, path)
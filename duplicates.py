@@ -0,0 +1,194 @@
+# modules/duplicates.py
+"""
+Moteur de doublons.
+- Doublons exacts : empreinte 64 bits par ligne (vectorisée, par blocs) sur un sous-ensemble
+  de colonnes choisi, puis vérification des collisions éventuelles.
+- Quasi-doublons : MinHash sur les 3-grammes de caractères des colonnes texte normalisées
+  et LSH par bandes ; les paires candidates vérifiées forment des groupes (composantes connexes).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+CHUNK_ROWS = 200_000       # lignes hachées à la fois
+NEAR_CHUNK_ROWS = 20_000   # lignes traitées à la fois pour les signatures MinHash
+NUM_PERM = 64              # taille des signatures MinHash
+SHINGLE = 3                # n-grammes de caractères
+MAX_CHARS = 200            # texte normalisé tronqué au-delà (borne le nombre de n-grammes)
+THRESHOLD = 0.8            # similarité de Jaccard minimale entre quasi-doublons
+CLUSTER_PREVIEW = 10       # étiquettes de lignes affichées par groupe
+
+_MIX = np.uint64(0xFF51AFD7ED558CCD)
+
+
+# ------------------------
+# Doublons exacts
+# ------------------------
+def row_hashes(source, subset=None, chunk_rows=CHUNK_ROWS) -> np.ndarray:
+    """Empreintes 64 bits des lignes (DataFrame par tranches ou source par blocs / LazyDataset)."""
+    if isinstance(source, pd.DataFrame):
+        frame = source[subset] if subset else source
+        chunks = (frame.iloc[i:i + chunk_rows] for i in range(0, len(frame), chunk_rows))
+    elif hasattr(source, "iter_chunks"):
+        chunks = source.iter_chunks(chunk_rows, columns=subset)
+    else:
+        chunks = (chunk[subset] if subset else chunk for chunk in source)
+    parts = [pd.util.hash_pandas_object(chunk, index=False).to_numpy() for chunk in chunks]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint64)
+
+
+def _first_positions(hashes: np.ndarray) -> np.ndarray:
+    """Position de la première ligne portant la même empreinte."""
+    codes, _ = pd.factorize(hashes)
+    first = np.full(codes.max() + 1 if len(codes) else 0, len(codes), dtype=np.int64)
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    return first[codes]
+
+
+def duplicate_mask(df: pd.DataFrame, subset=None, verify=True) -> pd.Series:
+    """
+    Lignes en double (la première occurrence est conservée), comme `df.duplicated(subset)`.
+    verify : compare réellement les lignes candidates à leur première occurrence (collisions 64 bits).
+    """
+    subset = list(subset) if subset else None
+    hashes = row_hashes(df, subset)
+    first = _first_positions(hashes)
+    dup = first != np.arange(len(df))
+    if verify and dup.any():
+        frame = df[subset] if subset else df
+        pos = np.flatnonzero(dup)
+        a = frame.iloc[pos].reset_index(drop=True)
+        b = frame.iloc[first[pos]].reset_index(drop=True)
+        same = ((a == b) | (a.isna() & b.isna())).all(axis=1).to_numpy()
+        dup[pos[~same]] = False
+    return pd.Series(dup, index=df.index)
+
+
+def duplicate_clusters(df: pd.DataFrame, subset=None) -> pd.DataFrame:
+    """Groupes de doublons exacts : une ligne par groupe (taille, lignes concernées)."""
+    hashes = row_hashes(df, list(subset) if subset else None)
+    first = _first_positions(hashes)
+    sizes = np.bincount(first, minlength=len(df))
+    firsts = np.flatnonzero(sizes > 1)
+    if not len(firsts):
+        return pd.DataFrame(columns=["groupe", "taille", "lignes"])
+    # seules les lignes des groupes de taille > 1, triées par groupe (tri stable : ordre des lignes conservé)
+    pos = np.flatnonzero(sizes[first] > 1)
+    order = pos[np.argsort(first[pos], kind="stable")]
+    starts = np.flatnonzero(np.r_[True, first[order][1:] != first[order][:-1]])
+    ends = np.r_[starts[1:], len(order)]
+    index = df.index.to_numpy()
+    members = [index[order[a:min(a + CLUSTER_PREVIEW, b)]].tolist() for a, b in zip(starts, ends)]
+    return pd.DataFrame({
+        "groupe": np.arange(len(firsts)),
+        "taille": sizes[firsts],
+        "lignes": members,
+    }).sort_values("taille", ascending=False, ignore_index=True)
+
+
+# ------------------------
+# Quasi-doublons (MinHash / LSH)
+# ------------------------
+def normalize_text(df: pd.DataFrame, columns) -> pd.Series:
+    """Concatène les colonnes texte puis normalise : minuscules, sans accents ni ponctuation, espaces réduits."""
+    text = df[columns[0]].astype("string").fillna("")
+    for c in columns[1:]:
+        text = text + " " + df[c].astype("string").fillna("")
+    text = text.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    text = text.str.lower().str.replace(r"[^\w\s]", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+    return text.str.slice(0, MAX_CHARS)
+
+
+def _lsh_bands(num_perm: int, threshold: float):
+    """(bandes, lignes par bande) dont le seuil (1/b)^(1/r) est le plus proche de `threshold`."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def minhash_signatures(text: pd.Series, num_perm=NUM_PERM, shingle=SHINGLE, seed=0) -> np.ndarray:
+    """Signatures MinHash (n, num_perm) des n-grammes de caractères, calculées par tranches de lignes."""
+    seeds = np.random.default_rng(seed).integers(1, 2 ** 63, size=num_perm, dtype=np.uint64)
+    out = np.empty((len(text), num_perm), dtype=np.uint64)
+    for start in range(0, len(text), NEAR_CHUNK_ROWS):
+        block = text.iloc[start:start + NEAR_CHUNK_ROWS].reset_index(drop=True)
+        lengths = block.str.len().to_numpy()
+        rows, grams = [], []
+        # n-grammes extraits par décalage (vectorisé sur toutes les lignes du bloc)
+        for k in range(max(int(lengths.max(initial=0)) - shingle + 1, 1)):
+            # textes plus courts qu'un n-gramme : le texte entier compte pour un n-gramme
+            valid = np.flatnonzero((lengths >= k + shingle) | ((k == 0) & (lengths > 0) & (lengths < shingle)))
+            if not len(valid):
+                break
+            rows.append(valid)
+            grams.append(pd.util.hash_array(block.iloc[valid].str.slice(k, k + shingle).to_numpy(dtype=object)))
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        grams = np.concatenate(grams) if grams else np.empty(0, dtype=np.uint64)
+        sig = np.full((len(block), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        if len(rows):
+            # n-grammes regroupés par ligne : un minimum par segment (reduceat) pour chaque permutation
+            order = np.argsort(rows, kind="stable")
+            rows, grams = rows[order], grams[order]
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            with np.errstate(over="ignore"):
+                for p, s in enumerate(seeds):
+                    sig[rows[starts], p] = np.minimum.reduceat((grams ^ s) * _MIX, starts)
+        out[start:start + len(block)] = sig
+    return out
+
+
+def near_duplicate_clusters(df: pd.DataFrame, columns, threshold=THRESHOLD, num_perm=NUM_PERM):
+    """
+    Groupes de quasi-doublons sur les colonnes texte `columns`.
+    Retourne (étiquettes, groupes) : étiquette de groupe par ligne (-1 = aucun quasi-doublon)
+    et un tableau des groupes (taille, similarité estimée minimale, exemple, lignes).
+    """
+    text = normalize_text(df, list(columns))
+    sig = minhash_signatures(text, num_perm)
+    n_bands, rows_per_band = _lsh_bands(num_perm, threshold)
+
+    # paires candidates : lignes partageant une bande, reliées au premier membre du seau
+    src, dst = [], []
+    for b in range(n_bands):
+        band = pd.util.hash_pandas_object(pd.DataFrame(sig[:, b * rows_per_band:(b + 1) * rows_per_band]), index=False).to_numpy()
+        first = _first_positions(band)
+        linked = np.flatnonzero(first != np.arange(len(band)))
+        src.append(linked); dst.append(first[linked])
+    src = np.concatenate(src) if src else np.empty(0, dtype=np.int64)
+    dst = np.concatenate(dst) if dst else np.empty(0, dtype=np.int64)
+
+    # vérification : similarité de Jaccard estimée par les signatures
+    if len(src):
+        pairs = np.unique(np.column_stack([src, dst]), axis=0)
+        src, dst = pairs[:, 0], pairs[:, 1]
+    similarity = (sig[src] == sig[dst]).mean(axis=1) if len(src) else np.empty(0)
+    keep = (similarity >= threshold) & (text.to_numpy()[src] != "")
+    src, dst, similarity = src[keep], dst[keep], similarity[keep]
+
+    n = len(df)
+    graph = sparse.coo_matrix((np.ones(len(src)), (src, dst)), shape=(n, n))
+    _, components = connected_components(graph, directed=False)
+    sizes = np.bincount(components, minlength=n)
+    in_cluster = sizes[components] > 1
+    label_values = np.full(n, -1, dtype=np.int64)
+    label_values[in_cluster] = pd.factorize(components[in_cluster])[0]
+    labels = pd.Series(label_values, index=df.index, name="quasi_doublon")
+
+    if not in_cluster.any():
+        return labels, pd.DataFrame(columns=["groupe", "taille", "similarite_min", "exemple", "lignes"])
+    min_sim = pd.Series(similarity).groupby(labels.to_numpy()[src]).min()
+    grouped = pd.Series(df.index.to_numpy()[in_cluster]).groupby(labels.to_numpy()[in_cluster])
+    clusters = pd.DataFrame({
+        "groupe": grouped.size().index,
+        "taille": grouped.size().to_numpy(),
+        "similarite_min": min_sim.reindex(grouped.size().index).round(3).to_numpy(),
+        "exemple": text.groupby(labels.to_numpy()).first().reindex(grouped.size().index).to_numpy(),
+        "lignes": grouped.apply(lambda s: s.tolist()[:CLUSTER_PREVIEW]).to_numpy(),
+    })
+    return labels, clusters.sort_values("taille", ascending=False, ignore_index=True)
+
+
+def cluster_duplicate_mask(labels: pd.Series) -> pd.Series:
+    """Lignes à supprimer dans des groupes de quasi-doublons (le premier membre de chaque groupe est conservé)."""
+    return (labels >= 0) & labels.duplicated()
@@ -1,18 +1,184 @@
 # eda.py
 # modules/eda.py
 
+import os
+import json
+import hashlib
+import uuid
+import time
+import joblib
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from ydata_profiling import ProfileReport
 from io import BytesIO
+from modules.utils import helpers
+from modules import histograms, correlation
 
-def generate_profile(df: pd.DataFrame):
-    profile = ProfileReport(df, title="Profiling EDA", explorative=True)
+# ------------------------
+# Cache des rapports de profiling (clé = empreinte des données + configuration)
+# ------------------------
+PROFILE_CACHE_DIR = "outputs/cache/profiles"
+PROFILE_CACHE_MAX_BYTES = 500 * 1024 ** 2
+PROFILE_CONFIG = {"title": "Profiling EDA", "explorative": True}
+
+
+def generate_profile(df: pd.DataFrame, **config):
+    profile = ProfileReport(df, **{**PROFILE_CONFIG, **config})
     return profile
 
-def run_eda(df: pd.DataFrame):
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Empreinte du DataFrame, mémorisée pour l'objet courant (évite de re-hasher à chaque rerun)."""
+    return helpers.cached_fingerprint(df)
+
+
+def profile_cache_dir(shared=True) -> str:
+    """Dossier du cache : partagé entre utilisateurs ou propre à la session Streamlit."""
+    if shared:
+        return PROFILE_CACHE_DIR
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    return os.path.join(PROFILE_CACHE_DIR, "sessions", session_id)
+
+
+def profile_key(df: pd.DataFrame, config=None, sample_rows=None, columns=None) -> str:
+    cfg = json.dumps({"config": {**PROFILE_CONFIG, **(config or {})}, "sample_rows": sample_rows, "columns": columns},
+                     sort_keys=True, default=str)
+    return f"{data_fingerprint(df)}_{hashlib.blake2b(cfg.encode(), digest_size=8).hexdigest()}"
+
+
+def get_or_create_profile(df: pd.DataFrame, config=None, shared=True, sample_rows=None, columns=None) -> dict:
+    """
+    Retourne les artefacts du rapport pour ces données et cette configuration :
+    {"html": chemin du rapport, "description": chemin du dict de description,
+     "cached": bool, "seconds": durée réelle du profiling (None si servi depuis le cache)}.
+    Un rapport déjà calculé est servi depuis le disque ; sinon il est généré
+    (sur `sample_rows` lignes et `columns` si fournis) puis stocké,
+    et le cache est borné en taille (éviction LRU).
+    """
+    cache_dir = helpers.ensure_dir(profile_cache_dir(shared))
+    key = profile_key(df, config, sample_rows, columns)
+    html_path = os.path.join(cache_dir, f"{key}.html")
+    desc_path = os.path.join(cache_dir, f"{key}.description.pkl")
+
+    if os.path.exists(html_path):
+        os.utime(html_path)
+        if os.path.exists(desc_path):
+            os.utime(desc_path)
+        return {"html": html_path, "description": desc_path if os.path.exists(desc_path) else None, "cached": True, "seconds": None}
+
+    start = time.perf_counter()
+    data = df[columns] if columns else df
+    if sample_rows and sample_rows < len(data):
+        data = data.sample(sample_rows, random_state=0)
+    prof = generate_profile(data, **(config or {}))
+    tmp_path = os.path.join(cache_dir, f"{key}.tmp.html")  # ydata impose l'extension .html
+    prof.to_file(tmp_path)
+    os.replace(tmp_path, html_path)
+    try:
+        joblib.dump(prof.get_description(), desc_path)
+    except Exception:
+        desc_path = None
+
+    seconds = time.perf_counter() - start
+
+    # budget global : cache partagé et dossiers de toutes les sessions confondus
+    helpers.evict_lru(PROFILE_CACHE_DIR, PROFILE_CACHE_MAX_BYTES, extensions=(".html", ".pkl"), recursive=True)
+    return {"html": html_path, "description": desc_path, "cached": False, "seconds": seconds}
+
+
+def load_profile_description(df: pd.DataFrame, config=None, shared=True, sample_rows=None, columns=None):
+    """Description (dict ydata) du rapport en cache pour ces données, ou None."""
+    path = os.path.join(profile_cache_dir(shared), f"{profile_key(df, config, sample_rows, columns)}.description.pkl")
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+# ------------------------
+# Choix adaptatif de la configuration de profiling (budget de temps)
+# ------------------------
+PROFILE_TIME_BUDGET_S = 60
+PROFILE_SAMPLE_THRESHOLD = 1_000_000   # au-delà : profiling sur échantillon quel que soit le mode
+PROFILE_MIN_SAMPLE = 10_000
+WIDE_TABLE_COLS = 50                   # au-delà : corrélations désactivées
+PROFILE_OVERHEAD_S = 2.0
+# coût par cellule (s) et coût des corrélations par ligne × colonne² (s), ordre de grandeur
+PROFILE_MODES = {
+    "explorative": {"config": {"explorative": True}, "cell_cost": 1e-4, "corr_cost": 5e-8},
+    "standard": {"config": {"explorative": False, "interactions": None}, "cell_cost": 4e-5, "corr_cost": 2e-8},
+    "minimal": {"config": {"explorative": False, "minimal": True}, "cell_cost": 1e-5, "corr_cost": 0.0},
+}
+NO_CORRELATIONS = {"correlations": None, "interactions": None}
+
+
+def estimate_profile_seconds(mode: str, n_rows: int, n_cols: int, correlations=True) -> float:
+    """Estimation grossière de la durée du profiling, recalibrée par les durées observées."""
+    spec = PROFILE_MODES[mode]
+    seconds = PROFILE_OVERHEAD_S + spec["cell_cost"] * n_rows * n_cols
+    if correlations:
+        seconds += spec["corr_cost"] * n_rows * n_cols ** 2
+    return seconds * st.session_state.get("profile_calibration", 1.0)
+
+
+def choose_profile_plan(n_rows: int, n_cols: int, time_budget_s=PROFILE_TIME_BUDGET_S, mode="auto", max_columns=None) -> dict:
+    """
+    Choisit mode, configuration ydata et taille d'échantillon selon la taille des données :
+    mode le plus riche qui tient dans le budget, corrélations coupées sur les tables larges,
+    échantillonnage des lignes au-delà du seuil ou si même le mode minimal dépasse le budget.
+    """
+    n_cols = min(n_cols, max_columns) if max_columns else n_cols
+    correlations = n_cols <= WIDE_TABLE_COLS
+    rows = min(n_rows, PROFILE_SAMPLE_THRESHOLD)
+
+    candidates = list(PROFILE_MODES) if mode == "auto" else [mode]
+    chosen = None
+    for name in candidates:
+        if estimate_profile_seconds(name, rows, n_cols, correlations) <= time_budget_s:
+            chosen = name
+            break
+    if chosen is None:
+        chosen = candidates[-1]
+        # lignes max pour tenir le budget (coût linéaire en nombre de lignes)
+        per_row = estimate_profile_seconds(chosen, 1, n_cols, correlations) - PROFILE_OVERHEAD_S * st.session_state.get("profile_calibration", 1.0)
+        budget = time_budget_s - PROFILE_OVERHEAD_S
+        rows = max(PROFILE_MIN_SAMPLE, int(budget / per_row)) if per_row > 0 and budget > 0 else PROFILE_MIN_SAMPLE
+        rows = min(rows, n_rows)
+
+    config = dict(PROFILE_MODES[chosen]["config"])
+    if not correlations:
+        config.update(NO_CORRELATIONS)
+    return {
+        "mode": chosen,
+        "config": config,
+        "sample_rows": rows if rows < n_rows else None,
+        "correlations": correlations,
+        "estimated_seconds": estimate_profile_seconds(chosen, rows, n_cols, correlations),
+        "calibration": st.session_state.get("profile_calibration", 1.0),
+    }
+
+
+def record_profile_runtime(plan: dict, actual_seconds: float):
+    """
+    Met à jour le facteur de calibration (moyenne glissante réel / estimé).
+    Le nouveau facteur reste en attente : il ne s'applique qu'au prochain jeu de données
+    (activate_calibration), pour ne pas changer le plan — ni la clé du rapport — des données courantes.
+    """
+    if not actual_seconds or not plan.get("estimated_seconds"):
+        return
+    used = plan.get("calibration", 1.0)
+    raw_estimate = plan["estimated_seconds"] / used
+    calibration = st.session_state.get("profile_calibration_next", used)
+    st.session_state["profile_calibration_next"] = 0.5 * calibration + 0.5 * (actual_seconds / raw_estimate)
+
+
+def activate_calibration(fingerprint: str):
+    """Nouveau jeu de données : la calibration apprise sur les précédents devient active."""
+    if st.session_state.get("calibration_data") != fingerprint:
+        if "profile_calibration_next" in st.session_state:
+            st.session_state["profile_calibration"] = st.session_state["profile_calibration_next"]
+        st.session_state["calibration_data"] = fingerprint
+
+def run_eda(df: pd.DataFrame, dataset=None):
     st.subheader("Aperçu général")
     st.write("Dimensions :", df.shape)
     st.dataframe(df.head())
@@ -23,20 +189,57 @@ def run_eda(df: pd.DataFrame):
     # --------------------------
     # Rapport de profiling
     # --------------------------
-    if "report_generated" not in st.session_state:
-        st.session_state.report_generated = False
+    with st.expander("⚙️ Mode de profiling", expanded=False):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            mode = st.selectbox("Mode", ["auto"] + list(PROFILE_MODES), index=0)
+        with c2:
+            time_budget = int(st.number_input("Budget de temps (s)", 5, 3600, PROFILE_TIME_BUDGET_S))
+        with c3:
+            max_columns = int(st.number_input("Colonnes max (0 = toutes)", 0, max(df.shape[1], 1), 0))
+    # plan figé pour ces données et ces réglages : les reruns retrouvent la même clé de rapport
+    fingerprint = data_fingerprint(df)
+    activate_calibration(fingerprint)
+    settings = (fingerprint, mode, time_budget, max_columns)
+    frozen = st.session_state.get("profile_plan")
+    if frozen is not None and frozen["settings"] == settings:
+        plan = frozen["plan"]
+    else:
+        plan = choose_profile_plan(df.shape[0], df.shape[1], time_budget, mode, max_columns or None)
+        st.session_state.profile_plan = {"settings": settings, "plan": plan}
+    columns = df.columns[:max_columns].tolist() if max_columns else None
+    sample_txt = f"échantillon de {plan['sample_rows']} lignes" if plan["sample_rows"] else "toutes les lignes"
+    corr_txt = "" if plan["correlations"] else ", corrélations désactivées (table large)"
+    st.caption(f"Mode retenu : **{plan['mode']}** — {sample_txt}{corr_txt} — durée estimée ≈ {plan['estimated_seconds']:.0f} s")
+
+    # le rapport affiché doit correspondre aux données courantes et au plan choisi
+    key = profile_key(df, plan["config"], plan["sample_rows"], columns)
+    if st.session_state.get("report_key") != key:
+        st.session_state.report_key = key
+        st.session_state.report_paths = None
+        st.session_state.show_report = False
     if "show_report" not in st.session_state:
         st.session_state.show_report = False
 
-    if not st.session_state.report_generated:
+    shared = st.checkbox("Partager le cache de profiling entre sessions", value=True)
+    paths = st.session_state.report_paths
+    if paths is not None and not os.path.exists(paths["html"]):
+        # entrée évincée du cache entre-temps
+        paths = st.session_state.report_paths = None
+    if paths is None:
         if st.button("📊 Générer le rapport de Profiling"):
-            prof = generate_profile(df)
-            prof.to_file("profiling_report.html")
-            st.session_state.report_generated = True
+            with st.spinner("Profiling en cours…"):
+                paths = get_or_create_profile(df, plan["config"], shared, plan["sample_rows"], columns)
+            record_profile_runtime(plan, paths["seconds"])
+            paths["estimated_seconds"] = plan["estimated_seconds"]
+            st.session_state.report_paths = paths
             st.session_state.show_report = True
 
-    if st.session_state.report_generated:
-        st.success("✅ Rapport de profiling généré.")
+    if paths is not None:
+        if paths["cached"]:
+            st.success("✅ Rapport de profiling servi depuis le cache.")
+        else:
+            st.success(f"✅ Rapport de profiling généré — durée estimée {paths['estimated_seconds']:.1f} s, réelle {paths['seconds']:.1f} s.")
         col1, col2, col3 = st.columns([1,1,1])
         with col1:
             if st.button("👁️ Afficher le rapport"):
@@ -45,11 +248,11 @@ def run_eda(df: pd.DataFrame):
             if st.button("🙈 Masquer le rapport"):
                 st.session_state.show_report = False
         with col3:
-            with open("profiling_report.html", "rb") as f:
+            with open(paths["html"], "rb") as f:
                 st.download_button(label="💾 Télécharger le rapport HTML", data=f, file_name="profiling_report.html", mime="text/html")
 
         if st.session_state.show_report:
-            with open("profiling_report.html", "r", encoding="utf-8") as f:
+            with open(paths["html"], "r", encoding="utf-8") as f:
                 report_html = f.read()
             st.components.v1.html(report_html, height=800, scrolling=True)
 
@@ -66,10 +269,11 @@ def run_eda(df: pd.DataFrame):
         else:
             to_plot = [col_choice]
 
+        # bornes / effectifs / KDE de toutes les colonnes en une passe (cache partagé avec le reporting)
+        hists = histograms.get_histograms(df)
         for col in to_plot:
             fig, ax = plt.subplots()
-            sns.histplot(df[col].dropna(), kde=True, ax=ax)
-            ax.set_title(f"Histogramme de {col}")
+            histograms.plot_histogram(hists[col], ax, title=f"Histogramme de {col}")
             st.pyplot(fig)
             plt.close(fig)
 
@@ -97,10 +301,28 @@ def run_eda(df: pd.DataFrame):
 
         if st.session_state.show_corr:
             st.subheader("Matrice de corrélation")
-            corr = df.corr(numeric_only=True)
+            c1, c2 = st.columns(2)
+            with c1:
+                method = st.selectbox("Méthode", ["pearson", "spearman"], index=0)
+            with c2:
+                k = int(st.number_input("Nombre de paires (top-k)", 5, 200, correlation.TOP_K))
+            # jeu hors mémoire : Pearson calculé par blocs sur toutes les lignes
+            source = dataset if dataset is not None else df
+            corr = correlation.correlation_matrix(source, method=method)
+            if dataset is not None:
+                st.caption("Corrélations calculées sur le jeu complet (par blocs)" if method == "pearson"
+                           else "Corrélations de Spearman calculées sur un échantillon")
+
+            pairs = correlation.top_k_pairs(corr, k)
+            st.markdown("**Paires les plus corrélées**")
+            st.dataframe(pairs.round(3))
+
+            cols = correlation.heatmap_columns(corr, pairs)
             # arrondir pour lisibilité
-            corr_display = corr.round(3)
-            fig, ax = plt.subplots(figsize=(8, 6))
-            sns.heatmap(corr_display, annot=True, cmap="coolwarm", center=0, ax=ax)
+            corr_display = corr.loc[cols, cols].round(3)
+            size = max(6, 0.35 * len(cols))
+            fig, ax = plt.subplots(figsize=(size + 2, size))
+            sns.heatmap(corr_display, annot=len(cols) <= correlation.ANNOT_MAX_COLS, cmap="coolwarm", center=0, vmin=-1, vmax=1, ax=ax)
+            ax.set_title(f"Heatmap classée — {len(cols)} colonnes des paires les plus fortes")
             st.pyplot(fig)
             plt.close(fig)
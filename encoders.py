@@ -0,0 +1,190 @@
+# modules/encoders.py
+"""
+Encodeurs à mémoire bornée pour les variables catégorielles à forte cardinalité.
+- HashingEncoder : hashing trick vectorisé, sortie creuse de largeur fixe (aucun vocabulaire stocké)
+- OutOfFoldTargetEncoder : moyenne de la cible lissée, calculée hors pli sur le jeu
+  d'entraînement (pas de fuite de la cible), une colonne par variable (ou par classe)
+Les deux sont des transformateurs scikit-learn (utilisables dans run_modeling) et
+servent aussi de corrections dans le Prétraitement.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.model_selection import KFold, StratifiedKFold
+
+HASH_FEATURES = 2 ** 12        # largeur de la sortie hashée (toutes colonnes confondues)
+HASH_BUCKETS = 1024            # modalités après hashing d'une colonne (correction)
+TARGET_SMOOTHING = 10.0        # poids (en lignes) de la moyenne globale dans le lissage
+TARGET_FOLDS = 5
+HIGH_CARDINALITY_LEVELS = 50   # au-delà, run_modeling n'utilise plus le one-hot en mode auto
+
+_MIX = np.uint64(0xFF51AFD7ED558CCD)
+
+
+def _as_frame(X) -> pd.DataFrame:
+    return X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+
+
+def _column_hash(values: pd.Series, salt: int) -> np.ndarray:
+    """Empreintes 64 bits d'une colonne, différentes d'une colonne à l'autre (sel)."""
+    h = pd.util.hash_array(values.astype(str).to_numpy(dtype=object))
+    with np.errstate(over="ignore"):
+        return (h ^ np.uint64(salt)) * _MIX
+
+
+def hash_buckets(s: pd.Series, n_buckets=HASH_BUCKETS) -> pd.Series:
+    """
+    Remplace chaque modalité par un indice de seau dans [0, n_buckets) (manquants conservés).
+    Sortie en dtype category (mêmes catégories pour tous les lots) : les seaux restent des
+    modalités nominales, encodées par run_modeling et non standardisées comme un nombre.
+    """
+    buckets = (_column_hash(s, 0) % np.uint64(n_buckets)).astype(np.int64)
+    codes = np.where(s.notna().to_numpy(), buckets, -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=np.arange(n_buckets)), index=s.index, name=s.name)
+
+
+class HashingEncoder(BaseEstimator, TransformerMixin):
+    """Hashing trick : une entrée non nulle par colonne et par ligne dans une matrice creuse CSR."""
+
+    def __init__(self, n_features=HASH_FEATURES, alternate_sign=True):
+        self.n_features = n_features
+        self.alternate_sign = alternate_sign
+
+    def fit(self, X, y=None):
+        X = _as_frame(X)
+        self.n_features_in_ = X.shape[1]
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        return self
+
+    def transform(self, X):
+        X = _as_frame(X)
+        n_rows, n_cols = X.shape
+        indices = np.empty((n_rows, n_cols), dtype=np.int64)
+        data = np.ones((n_rows, n_cols))
+        for j in range(n_cols):
+            h = _column_hash(X.iloc[:, j], j + 1)
+            indices[:, j] = (h % np.uint64(self.n_features)).astype(np.int64)
+            if self.alternate_sign:
+                # bit de poids fort : signe, compense en moyenne les collisions
+                data[:, j] = np.where(h >> np.uint64(63), -1.0, 1.0)
+        indptr = np.arange(0, n_rows * n_cols + 1, n_cols)
+        out = sparse.csr_matrix((data.ravel(), indices.ravel(), indptr), shape=(n_rows, self.n_features))
+        out.sum_duplicates()  # collisions d'une même ligne
+        return out
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray([f"hash_{i}" for i in range(self.n_features)], dtype=object)
+
+
+class OutOfFoldTargetEncoder(BaseEstimator, TransformerMixin):
+    """
+    Encodage par la moyenne de la cible, lissée vers la moyenne globale :
+        enc = (somme_cible + m * prior) / (effectif + m)
+    fit_transform renvoie des encodages hors pli (chaque ligne est encodée avec des
+    statistiques apprises sans elle) ; transform utilise les statistiques de tout l'entraînement.
+    Classification : une colonne par classe (une seule si binaire). Modalités inconnues -> prior.
+    """
+
+    def __init__(self, task="auto", smoothing=TARGET_SMOOTHING, n_splits=TARGET_FOLDS, random_state=42):
+        self.task = task
+        self.smoothing = smoothing
+        self.n_splits = n_splits
+        self.random_state = random_state
+
+    # ------------------------
+    # Cible -> matrice (n, k)
+    # ------------------------
+    def _target_matrix(self, y: pd.Series) -> np.ndarray:
+        task = self.task
+        if task == "auto":
+            task = "classification" if (pd.api.types.is_string_dtype(y) or y.dtype == "O" or y.nunique() <= 20) else "regression"
+        self.task_ = task
+        if task == "regression":
+            self.classes_ = None
+            return y.to_numpy(dtype="float64").reshape(-1, 1)
+        self.classes_ = np.asarray(pd.unique(y.dropna()))
+        onehot = (y.to_numpy()[:, None] == self.classes_[None, :]).astype("float64")
+        return onehot[:, 1:] if len(self.classes_) == 2 else onehot
+
+    @staticmethod
+    def _sums(codes: np.ndarray, T: np.ndarray, n_levels: int):
+        counts = np.bincount(codes, minlength=n_levels).astype("float64")
+        sums = np.column_stack([np.bincount(codes, weights=T[:, k], minlength=n_levels) for k in range(T.shape[1])])
+        return counts, sums
+
+    def _encode(self, counts, sums, prior):
+        m = self.smoothing
+        return (sums + m * prior) / (counts[:, None] + m)
+
+    def fit(self, X, y):
+        self._fit(X, y)
+        return self
+
+    def _fit(self, X, y):
+        X = _as_frame(X)
+        y = pd.Series(np.asarray(y))
+        T = self._target_matrix(y)
+        self.prior_ = T.mean(axis=0)
+        self.n_features_in_ = X.shape[1]
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.categories_, self.encodings_, codes_by_col = [], [], []
+        for j in range(X.shape[1]):
+            codes, uniques = pd.factorize(X.iloc[:, j].astype(str))
+            counts, sums = self._sums(codes, T, len(uniques))
+            self.categories_.append(pd.Index(uniques))
+            self.encodings_.append(self._encode(counts, sums, self.prior_))
+            codes_by_col.append((codes, counts, sums))
+        return T, codes_by_col
+
+    def transform(self, X):
+        X = _as_frame(X)
+        blocks = []
+        for j, (cats, enc) in enumerate(zip(self.categories_, self.encodings_)):
+            codes = cats.get_indexer(X.iloc[:, j].astype(str))
+            blocks.append(np.where(codes[:, None] >= 0, enc[np.maximum(codes, 0)], self.prior_))
+        return np.hstack(blocks)
+
+    def fit_transform(self, X, y=None, **fit_params):
+        X = _as_frame(X)
+        T, codes_by_col = self._fit(X, y)
+        n = len(X)
+        if self.task_ == "classification":
+            splitter = StratifiedKFold(self.n_splits, shuffle=True, random_state=self.random_state)
+            folds = list(splitter.split(np.zeros(n), pd.Series(np.asarray(y)).astype(str)))
+        else:
+            folds = list(KFold(self.n_splits, shuffle=True, random_state=self.random_state).split(np.zeros(n)))
+
+        k = T.shape[1]
+        out = np.empty((n, k * X.shape[1]))
+        for j, (codes, counts, sums) in enumerate(codes_by_col):
+            for _, fold in folds:
+                # statistiques hors pli = totaux - contribution du pli (une passe par pli)
+                f_counts, f_sums = self._sums(codes[fold], T[fold], len(counts))
+                oof_counts, oof_sums = counts - f_counts, sums - f_sums
+                prior = (T.sum(axis=0) - T[fold].sum(axis=0)) / max(n - len(fold), 1)
+                out[fold, j * k:(j + 1) * k] = self._encode(oof_counts, oof_sums, prior)[codes[fold]]
+        return out
+
+    def get_feature_names_out(self, input_features=None):
+        names = list(self.feature_names_in_)
+        if self.classes_ is None or len(self.classes_) == 2:
+            return np.asarray([f"{c}_te" for c in names], dtype=object)
+        return np.asarray([f"{c}_te_{cls}" for c in names for cls in self.classes_], dtype=object)
+
+
+def target_encode_column(s: pd.Series, y: pd.Series, **params):
+    """
+    Correction : encodage cible hors pli d'une colonne.
+    Les lignes sans cible sont encodées avec les statistiques de toutes les lignes connues.
+    Retourne (colonnes encodées, encodeur ajusté pour les lots suivants).
+    """
+    known = y.notna().to_numpy()
+    encoder = OutOfFoldTargetEncoder(**params)
+    fitted = encoder.fit_transform(s[known].to_frame(), y[known])
+    values = np.empty((len(s), fitted.shape[1]))
+    values[known] = fitted
+    if (~known).any():
+        values[~known] = encoder.transform(s[~known].to_frame())
+    return pd.DataFrame(values, index=s.index, columns=encoder.get_feature_names_out()), encoder
@@ -0,0 +1,158 @@
+# modules/execution.py
+"""
+Budget d'exécution partagé par l'entraînement, les courbes d'apprentissage, SHAP et IsolationForest.
+- Budget du déploiement : variable d'environnement DATA_TOOL_N_JOBS (défaut : cœurs disponibles)
+- Budget de session : réglé dans la barre latérale, borné par celui du déploiement
+Les cœurs du déploiement sont répartis entre les calculs en cours de toutes les sessions
+(compteur partagé par le processus) : chaque calcul reçoit au plus son budget de session parmi
+les cœurs libres et attend qu'un cœur se libère s'il n'y en a aucun. Les cœurs accordés fixent le
+`n_jobs` des estimateurs et la configuration joblib ; les threads BLAS/OpenMP, réglage global au
+processus, sont fixés en un seul point au plus petit besoin des calculs en cours.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from joblib import parallel_config
+from threadpoolctl import ThreadpoolController, threadpool_info
+
+N_JOBS_ENV = "DATA_TOOL_N_JOBS"
+BACKEND_ENV = "DATA_TOOL_JOBLIB_BACKEND"
+PROCESS_BACKEND = os.environ.get(BACKEND_ENV, "loky")   # workers des calculs multi-processus
+
+_session = threading.local()   # Streamlit exécute chaque session dans son propre thread
+
+# ------------------------
+# Répartition des cœurs entre les sessions (état du processus)
+# ------------------------
+_cores = threading.Condition()
+_reserved = 0            # cœurs accordés aux calculs en cours, toutes sessions confondues
+_native = {}             # calcul en cours dans ce processus -> threads BLAS/OpenMP voulus
+_native_restore = None   # limites natives d'origine, restaurées quand plus aucun calcul ne tourne
+_controller = None
+
+
+def available_cores() -> int:
+    """Cœurs utilisables par le processus (affinité CPU / conteneur si connue)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def deployment_budget() -> int:
+    cores = available_cores()
+    try:
+        value = int(os.environ.get(N_JOBS_ENV, cores))
+    except ValueError:
+        value = cores
+    return max(1, min(value if value > 0 else cores, cores))
+
+
+def set_budget(n_jobs=None) -> int:
+    """Budget de la session courante (None : budget du déploiement)."""
+    limit = deployment_budget()
+    _session.n_jobs = limit if n_jobs is None else max(1, min(int(n_jobs), limit))
+    return _session.n_jobs
+
+
+def n_jobs() -> int:
+    """
+    Budget effectif : dans un bloc `limits`, les cœurs accordés au calcul ;
+    sinon celui de la session s'il a été fixé, sinon celui du déploiement.
+    """
+    return getattr(_session, "granted", None) or getattr(_session, "n_jobs", None) or deployment_budget()
+
+
+def configure(estimator, jobs=None) -> int:
+    """
+    Fixe `n_jobs` sur l'estimateur et ses sous-estimateurs (pipelines, ColumnTransformer...).
+    Retourne le nombre de workers utilisés (1 si aucun paramètre n_jobs).
+    """
+    jobs = n_jobs() if jobs is None else jobs
+    params = {k: jobs for k in estimator.get_params(deep=True) if k == "n_jobs" or k.endswith("__n_jobs")}
+    if params:
+        estimator.set_params(**params)
+    return jobs if params else 1
+
+
+def _acquire(wanted: int) -> int:
+    """Réserve jusqu'à `wanted` cœurs parmi les cœurs libres du déploiement (attend s'il n'y en a aucun)."""
+    global _reserved
+    with _cores:
+        while deployment_budget() - _reserved < 1:
+            _cores.wait()
+        granted = max(1, min(wanted, deployment_budget() - _reserved))
+        _reserved += granted
+        return granted
+
+
+def _release(granted: int):
+    global _reserved
+    with _cores:
+        _reserved -= granted
+        _cores.notify_all()
+
+
+def _set_native(token, threads):
+    """
+    Limite BLAS/OpenMP du processus : la plus petite demande des calculs en cours
+    (threads=None retire le calcul). Un seul point de réglage, les sessions ne s'écrasent pas.
+    """
+    global _native_restore, _controller
+    with _cores:
+        if threads is None:
+            _native.pop(token, None)
+        else:
+            _native[token] = threads
+        if _controller is None:
+            _controller = ThreadpoolController()
+        if _native:
+            limiter = _controller.limit(limits=min(_native.values()))
+            if _native_restore is None:
+                _native_restore = limiter
+        elif _native_restore is not None:
+            _native_restore.restore_original_limits()
+            _native_restore = None
+
+
+@contextmanager
+def limits(outer_jobs=1, processes=False, estimator=None):
+    """
+    Réserve des cœurs pour un calcul (au plus le budget de la session) et les répartit :
+    `outer_jobs` workers joblib, et pour chacun cœurs // outer_jobs threads BLAS/OpenMP.
+    estimator : son `n_jobs` est fixé sur les cœurs accordés (workers = n_jobs, 1 s'il n'en a pas).
+    processes=True : workers multi-processus (loky), bornés chacun via inner_max_num_threads.
+    Les blocs imbriqués dans le même thread réutilisent les cœurs déjà accordés.
+    """
+    held = getattr(_session, "granted", None)
+    granted = held or _acquire(n_jobs())
+    _session.granted = granted
+    token = object()
+    try:
+        if estimator is not None:
+            outer_jobs = configure(estimator, jobs=granted)
+        outer = max(1, min(outer_jobs, granted))
+        inner = max(1, granted // outer)
+        config = {"backend": PROCESS_BACKEND, "inner_max_num_threads": inner} if processes else {}
+        if not processes:
+            _set_native(token, inner)
+        with parallel_config(n_jobs=outer, **config):
+            yield outer
+    finally:
+        if not processes:
+            _set_native(token, None)
+        _session.granted = held
+        if held is None:
+            _release(granted)
+
+
+def summary() -> dict:
+    """Parallélisme effectif, pour l'affichage (bibliothèques BLAS/OpenMP chargées comprises)."""
+    return {
+        "coeurs_disponibles": available_cores(),
+        "budget_deploiement": deployment_budget(),
+        "budget_session": n_jobs(),
+        "coeurs_reserves": _reserved,
+        "bibliotheques_natives": sorted({pool["internal_api"] for pool in threadpool_info()}),
+    }
@@ -1,7 +1,14 @@
 # helpers.py
 # modules/utils/helpers.py
 import os
+import hashlib
+import weakref
 import joblib
+import numpy as np
+import pandas as pd
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_FINGERPRINTS = {}  # id(df) -> (weakref, signature, empreinte)
 
 def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
@@ -11,3 +18,93 @@ def save_model(obj, path):
     ensure_dir(os.path.dirname(path))
     joblib.dump(obj, path)
     return path
+
+def hash_file(fileobj, block_size=8 * 1024 * 1024):
+    """Empreinte du contenu d'un fichier ouvert (lecture par blocs, position restaurée)."""
+    h = hashlib.blake2b(digest_size=16)
+    pos = fileobj.tell()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b""):
+        h.update(block)
+    fileobj.seek(pos)
+    return h.hexdigest()
+
+def dataframe_fingerprint(df):
+    """Empreinte d'un DataFrame (schéma + hash vectorisé des lignes, index compris)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(zip(map(str, df.columns), map(str, df.dtypes)))).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _column_signature(s, weights):
+    """Somme pondérée par position des valeurs brutes (numériques, dates, codes category) ou de leurs hash (textes)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        values = s.cat.codes.to_numpy().astype(np.int64).view(np.uint64)
+        extra = int(pd.util.hash_array(s.cat.categories.astype(str).to_numpy(dtype=object)).sum())
+    elif pd.api.types.is_integer_dtype(s.dtype) and isinstance(s.dtype, np.dtype):
+        values, extra = s.to_numpy().astype(np.int64).view(np.uint64), 0
+    elif pd.api.types.is_datetime64_any_dtype(s.dtype) and isinstance(s.dtype, np.dtype):
+        values, extra = s.to_numpy().view(np.int64).view(np.uint64), 0
+    elif pd.api.types.is_numeric_dtype(s.dtype):
+        values, extra = s.to_numpy(dtype=np.float64, na_value=np.nan).view(np.uint64), 0
+    else:
+        values, extra = pd.util.hash_pandas_object(s, index=False).to_numpy(), 0
+    with np.errstate(over="ignore"):
+        return int((values * weights).sum()) ^ extra
+
+def _signature(df):
+    """
+    Signature de tout le contenu (chaque cellule compte, à sa position) : les colonnes numériques,
+    dates et category ne sont pas hashées, seules les colonnes texte le sont.
+    """
+    with np.errstate(over="ignore"):
+        weights = (np.arange(len(df), dtype=np.uint64) * _MIX) | np.uint64(1)
+    index = df.index
+    if isinstance(index, pd.RangeIndex):
+        index_sig = (index.start, index.stop, index.step)
+    else:
+        index_sig = _column_signature(index.to_series(), weights)
+    columns = tuple(_column_signature(df.iloc[:, i], weights) for i in range(df.shape[1]))
+    return (df.shape, tuple(map(str, df.columns)), tuple(map(str, df.dtypes)), index_sig, columns)
+
+def cached_fingerprint(df):
+    """
+    dataframe_fingerprint mémorisé par objet : calculé une fois par DataFrame, puis resservi aux reruns.
+    L'identité est vérifiée par weakref (un id réutilisé après libération ne correspond pas)
+    et une signature de tout le contenu détecte les modifications en place (ex. df.loc[masque, col] = …).
+    """
+    key = id(df)
+    signature = _signature(df)
+    entry = _FINGERPRINTS.get(key)
+    if entry is not None and entry[0]() is df and entry[1] == signature:
+        return entry[2]
+    fp = dataframe_fingerprint(df)
+    _FINGERPRINTS[key] = (weakref.ref(df, lambda _, key=key: _FINGERPRINTS.pop(key, None)), signature, fp)
+    return fp
+
+def evict_lru(directory, max_bytes, extensions=None, recursive=False):
+    """
+    Supprime les fichiers les moins récemment utilisés (mtime) tant que le dossier dépasse max_bytes.
+    recursive=True : budget global sur le dossier et ses sous-dossiers (vidés puis supprimés).
+    """
+    if not os.path.isdir(directory):
+        return
+    entries = []
+    for root, dirs, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            if os.path.isfile(path) and (extensions is None or name.endswith(tuple(extensions))):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        if not recursive:
+            break
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+    if recursive:
+        for root, dirs, names in os.walk(directory, topdown=False):
+            if root != directory and not os.listdir(root):
+                os.rmdir(root)
@@ -0,0 +1,114 @@
+# modules/histograms.py
+"""
+Moteur d'histogrammes partagé par l'EDA et le reporting.
+Bornes et effectifs de toutes les colonnes numériques sont calculés en une passe
+vectorisée (un seul np.bincount), avec une KDE optionnelle estimée sur les bins ;
+les résultats sont mis en cache par empreinte du jeu de données.
+"""
+
+import warnings
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from modules.utils import helpers
+
+MAX_BINS = 100
+CACHE_MAX_ENTRIES = 16
+BLOCK_COLS = 32            # colonnes converties en float64 à la fois
+
+_CACHE = OrderedDict()  # (empreinte, bins, kde) -> {colonne: histogramme}
+
+
+def _auto_bins(n: int) -> int:
+    """Règle de Sturges bornée."""
+    return int(min(max(np.ceil(np.log2(max(n, 1)) + 1), 10), MAX_BINS))
+
+
+def _binned_kde(counts: np.ndarray, width: float, std: float, n: int) -> np.ndarray:
+    """KDE gaussienne approchée : convolution des effectifs par un noyau discrétisé (règle de Scott)."""
+    if n < 2 or not np.isfinite(std) or std <= 0 or width <= 0:
+        return counts.astype(float)
+    bandwidth = 1.06 * std * n ** (-1 / 5)
+    sigma_bins = bandwidth / width
+    half = int(np.ceil(4 * sigma_bins))
+    x = np.arange(-half, half + 1)
+    kernel = np.exp(-0.5 * (x / max(sigma_bins, 1e-12)) ** 2)
+    kernel /= kernel.sum()
+    # courbe à l'échelle des effectifs pour être superposée aux barres
+    return np.convolve(counts, kernel, mode="same")
+
+
+def compute_histograms(df: pd.DataFrame, bins=None, kde=True, columns=None, block_cols=BLOCK_COLS) -> dict:
+    """
+    Histogrammes de toutes les colonnes numériques en une passe vectorisée
+    (par blocs de `block_cols` colonnes pour borner la mémoire).
+    Retourne {colonne: {"edges", "counts", "kde", "n"}} (kde = None si kde=False).
+    """
+    if columns is None:
+        columns = df.select_dtypes(include="number").columns.tolist()
+    if not columns:
+        return {}
+    n_bins = bins or _auto_bins(len(df))
+    result = {}
+    for start in range(0, len(columns), block_cols):
+        block = columns[start:start + block_cols]
+        result.update(_histogram_block(df[block].to_numpy(dtype="float64", na_value=np.nan), block, n_bins, kde))
+    return result
+
+
+def _histogram_block(values: np.ndarray, columns: list, n_bins: int, kde: bool) -> dict:
+    finite = np.isfinite(values)
+    n = finite.sum(axis=0)
+    masked = np.where(finite, values, np.nan)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)  # colonnes entièrement manquantes
+        lo = np.nanmin(masked, axis=0) if len(values) else np.zeros(len(columns))
+        hi = np.nanmax(masked, axis=0) if len(values) else np.zeros(len(columns))
+        std = np.nanstd(masked, axis=0) if kde and len(values) else np.zeros(len(columns))
+    lo = np.where(np.isfinite(lo), lo, 0.0)
+    hi = np.where(np.isfinite(hi), hi, 0.0)
+    hi = np.where(hi > lo, hi, lo + 1.0)  # colonne constante : un intervalle unitaire
+    width = (hi - lo) / n_bins
+
+    # indice de bin de chaque valeur, décalé par colonne -> un seul bincount pour tout le bloc
+    with np.errstate(invalid="ignore"):
+        idx = np.floor((masked - lo) / width)
+    idx = np.clip(np.nan_to_num(idx, nan=0.0), 0, n_bins - 1).astype(np.int64)
+    idx += np.arange(len(columns)) * n_bins
+    counts = np.bincount(idx[finite], minlength=n_bins * len(columns)).reshape(len(columns), n_bins)
+
+    result = {}
+    for j, col in enumerate(columns):
+        result[col] = {
+            "edges": lo[j] + width[j] * np.arange(n_bins + 1),
+            "counts": counts[j],
+            "kde": _binned_kde(counts[j], width[j], std[j], int(n[j])) if kde else None,
+            "n": int(n[j]),
+        }
+    return result
+
+
+def get_histograms(df: pd.DataFrame, bins=None, kde=True) -> dict:
+    """compute_histograms avec cache par empreinte du jeu de données (LRU en mémoire, empreinte mémorisée)."""
+    key = (helpers.cached_fingerprint(df), bins, kde)   # empreinte calculée une fois par DataFrame
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    result = compute_histograms(df, bins=bins, kde=kde)
+    _CACHE[key] = result
+    while len(_CACHE) > CACHE_MAX_ENTRIES:
+        _CACHE.popitem(last=False)
+    return result
+
+
+def plot_histogram(hist: dict, ax, title=None):
+    """Trace un histogramme précalculé (barres + KDE éventuelle) sur un axe matplotlib."""
+    edges, counts = hist["edges"], hist["counts"]
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", alpha=0.6, edgecolor="white")
+    if hist.get("kde") is not None:
+        centers = (edges[:-1] + edges[1:]) / 2
+        ax.plot(centers, hist["kde"], color="C0")
+    ax.set_ylabel("Count")
+    if title:
+        ax.set_title(title)
+    return ax
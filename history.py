@@ -0,0 +1,253 @@
+# modules/history.py
+"""
+Historique des corrections sous forme de deltas colonnaires.
+Chaque étape ne conserve que ce qui a changé (lignes supprimées, colonnes supprimées,
+cellules modifiées) par rapport à sa version parente : la mémoire croît avec les
+modifications, pas avec la taille du jeu de données. Les versions forment un arbre
+(annuler puis appliquer d'autres corrections crée une branche) et sont reconstruites
+à la demande depuis les données d'origine.
+"""
+
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from modules.utils import helpers
+
+CACHE_VERSIONS = 1   # versions matérialisées gardées en mémoire (la version courante)
+
+
+def _changed_mask(before: pd.Series, after: pd.Series) -> np.ndarray:
+    """Cellules différentes entre deux colonnes alignées (deux manquants sont égaux)."""
+    try:
+        same = after == before
+    except TypeError:  # ex. catégories différentes
+        same = after.astype(object) == before.astype(object)
+    same = np.asarray(same.fillna(False), dtype=bool)
+    same |= after.isna().to_numpy() & before.isna().to_numpy()
+    return ~same
+
+
+class Delta:
+    """Différence entre une version et sa parente."""
+
+    def __init__(self, dropped_rows=None, dropped_columns=None, changes=None, added=None, columns=None):
+        self.dropped_rows = np.asarray(dropped_rows if dropped_rows is not None else [])
+        self.dropped_columns = list(dropped_columns or [])
+        self.changes = changes or {}   # colonne -> (étiquettes de lignes, valeurs ou valeur unique)
+        self.added = added or {}       # colonne ajoutée ou de type changé -> Series complète
+        self.columns = columns         # ordre des colonnes de la version (ex. colonne encodée insérée)
+
+    @classmethod
+    def between(cls, before: pd.DataFrame, after: pd.DataFrame) -> "Delta":
+        """Delta tel que `after` = `before` + delta (index uniques requis)."""
+        dropped_rows = before.index.difference(after.index).to_numpy()
+        dropped_columns = [c for c in before.columns if c not in after.columns]
+        # colonne nouvelle ou de type changé (ex. encodage) : conservée entière
+        added = {c: after[c] for c in after.columns if c not in before.columns or after[c].dtype != before[c].dtype}
+        positions = before.index.get_indexer(after.index)
+        if (positions < 0).any():
+            raise ValueError("La version corrigée contient des lignes absentes de la version parente")
+
+        changes = {}
+        for c in after.columns:
+            if c in added:
+                continue
+            b = before[c].take(positions)
+            b.index = after.index
+            a = after[c]
+            mask = _changed_mask(b, a)
+            if mask.any():
+                values = a.array[mask]
+                if pd.Series(values).nunique(dropna=False) == 1:
+                    values = values[0]  # ex. imputation : une seule valeur pour toutes les cellules
+                changes[c] = (a.index[mask].to_numpy(), values)
+        return cls(dropped_rows, dropped_columns, changes, added, list(after.columns))
+
+    @property
+    def n_changed_cells(self) -> int:
+        return int(sum(len(idx) for idx, _ in self.changes.values()))
+
+    @property
+    def nbytes(self) -> int:
+        total = self.dropped_rows.nbytes
+        for idx, values in self.changes.values():
+            total += idx.nbytes + (values.nbytes if hasattr(values, "nbytes") else 8)
+        total += sum(int(s.memory_usage(deep=True)) for s in self.added.values())
+        return int(total)
+
+
+class CorrectionHistory:
+    """Arbre des versions corrigées d'un DataFrame, avec annuler / rétablir."""
+
+    def __init__(self, base: pd.DataFrame):
+        if not base.index.is_unique:
+            raise ValueError("L'historique des corrections requiert un index sans doublon")
+        self.base = base
+        self.nodes = {0: {"parent": None, "delta": None, "label": "Données d'origine", "log": None, "transformer": None}}
+        self.current = 0
+        self._redo = []
+        self._cache = OrderedDict()
+
+    # ------------------------
+    # Navigation
+    # ------------------------
+    def commit(self, after: pd.DataFrame, label: str, log=None, transformer=None) -> int:
+        """
+        Enregistre `after` comme nouvelle version, enfant de la version courante.
+        transformer : étape de nettoyage ajustée qui produit `after` (cleaning.CleaningTransformer)
+        """
+        delta = Delta.between(self.frame(), after)
+        version = max(self.nodes) + 1
+        self.nodes[version] = {"parent": self.current, "delta": delta, "label": label, "log": log, "transformer": transformer}
+        self.current = version
+        self._redo = []
+        self._remember(version, after)
+        return version
+
+    def undo(self) -> int:
+        parent = self.nodes[self.current]["parent"]
+        if parent is not None:
+            self._redo.append(self.current)
+            self.current = parent
+        return self.current
+
+    def redo(self) -> int:
+        if self._redo:
+            self.current = self._redo.pop()
+        return self.current
+
+    def checkout(self, version: int) -> int:
+        if version not in self.nodes:
+            raise KeyError(f"Version inconnue : {version}")
+        self.current = version
+        self._redo = []
+        return self.current
+
+    @property
+    def can_undo(self) -> bool:
+        return self.nodes[self.current]["parent"] is not None
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def path(self, version: int) -> list:
+        """Versions de la racine (exclue) jusqu'à `version`."""
+        out = []
+        while version:
+            out.append(version)
+            version = self.nodes[version]["parent"]
+        return out[::-1]
+
+    def transformers(self, version=None) -> list:
+        """Étapes de nettoyage ajustées de la racine jusqu'à `version` (None si une étape n'en a pas)."""
+        version = self.current if version is None else version
+        steps = [self.nodes[v]["transformer"] for v in self.path(version)]
+        return None if any(t is None for t in steps) else steps
+
+    # ------------------------
+    # Reconstruction
+    # ------------------------
+    def _remember(self, version: int, df: pd.DataFrame):
+        self._cache[version] = df
+        self._cache.move_to_end(version)
+        while len(self._cache) > CACHE_VERSIONS:
+            self._cache.popitem(last=False)
+
+    def frame(self, version=None) -> pd.DataFrame:
+        """Reconstruit une version : une seule sélection lignes/colonnes puis les cellules modifiées."""
+        version = self.current if version is None else version
+        if version == 0:
+            return self.base
+        if version in self._cache:
+            self._cache.move_to_end(version)
+            return self._cache[version]
+
+        deltas = [self.nodes[v]["delta"] for v in self.path(version)]
+        dropped_rows = np.concatenate([d.dropped_rows for d in deltas]) if deltas else np.array([])
+        dropped_base = {c for d in deltas for c in d.dropped_columns if c in self.base.columns}
+        keep = ~self.base.index.isin(dropped_rows)
+        out = self.base.loc[keep, [c for c in self.base.columns if c not in dropped_base]]
+
+        for d in deltas:
+            for c, s in d.added.items():
+                out[c] = s.reindex(out.index)
+            for c in d.dropped_columns:
+                if c in out.columns:
+                    del out[c]
+            for c, (idx, values) in d.changes.items():
+                if c not in out.columns:
+                    continue
+                pos = out.index.get_indexer(idx)
+                alive = pos >= 0  # lignes supprimées par une étape ultérieure
+                col = out[c].copy()
+                col.iloc[pos[alive]] = values if np.ndim(values) == 0 else values[alive]
+                out[c] = col
+
+        if deltas and deltas[-1].columns is not None and list(out.columns) != deltas[-1].columns:
+            out = out[deltas[-1].columns]
+        self._remember(version, out)
+        return out
+
+    # ------------------------
+    # Résumés
+    # ------------------------
+    def versions(self) -> pd.DataFrame:
+        rows = []
+        for v, node in self.nodes.items():
+            d = node["delta"]
+            rows.append({
+                "version": v,
+                "parent": node["parent"],
+                "corrections": node["label"],
+                "lignes_supprimees": len(d.dropped_rows) if d else 0,
+                "colonnes_supprimees": len(d.dropped_columns) if d else 0,
+                "cellules_modifiees": d.n_changed_cells if d else 0,
+                "octets_delta": d.nbytes if d else 0,
+                "courante": v == self.current,
+            })
+        return pd.DataFrame(rows)
+
+    def nbytes(self) -> int:
+        """Mémoire occupée par les deltas (hors données d'origine et version en cache)."""
+        return sum(node["delta"].nbytes for node in self.nodes.values() if node["delta"] is not None)
+
+    def compare(self, version_a: int, version_b: int) -> dict:
+        """Compare deux versions (éventuellement sur des branches différentes)."""
+        a, b = self.frame(version_a), self.frame(version_b)
+        rows = a.index.intersection(b.index)
+        cols = [c for c in a.columns if c in b.columns]
+        cells = {c: int(_changed_mask(a.loc[rows, c], b.loc[rows, c]).sum()) for c in cols}
+        return {
+            "lignes_seulement_a": len(a.index.difference(b.index)),
+            "lignes_seulement_b": len(b.index.difference(a.index)),
+            "colonnes_seulement_a": [c for c in a.columns if c not in b.columns],
+            "colonnes_seulement_b": [c for c in b.columns if c not in a.columns],
+            "cellules": pd.DataFrame({"colonne": list(cells), "cellules_differentes": list(cells.values())}),
+        }
+
+
+# ------------------------
+# Session Streamlit
+# ------------------------
+def session_history(session_state) -> CorrectionHistory:
+    """
+    Historique des données chargées (session_state["data"]) : conservé si leur contenu est inchangé
+    (même empreinte, ex. rechargement depuis le cache), recréé sinon. Les données d'origine
+    ne sont gardées qu'en un exemplaire, celui de la session.
+    """
+    data = session_state["data"]
+    hist = session_state.get("history")
+    if hist is None or (hist.base is not data and helpers.cached_fingerprint(hist.base) != helpers.cached_fingerprint(data)):
+        hist = CorrectionHistory(data)
+        session_state["history"] = hist
+    hist.base = data
+    return hist
+
+
+def corrected_frame(session_state):
+    """Version corrigée courante (None sans données ou sans correction) : seule l'historique la conserve."""
+    if "data" not in session_state:
+        return None
+    hist = session_history(session_state)
+    return hist.frame() if hist.current else None
@@ -1,6 +1,7 @@
 # modules/modeling.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor, GradientBoostingClassifier, GradientBoostingRegressor
@@ -9,11 +10,16 @@ from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.impute import SimpleImputer
 import joblib
+import time
 from typing import Tuple, Any
 from modules.utils import helpers
+from modules import encoders, execution, comparison, boosting
 from modules.utils.metrics import classification_metrics, regression_metrics
 from math import isfinite
 
+SPARSE_DENSITY = 0.3              # densité sous laquelle la matrice encodée reste creuse (CSR)
+DENSE_MAX_BYTES = 256 * 1024**2   # mode auto : au-delà de cette taille dense estimée, matrice creuse
+
 def _format_metrics(d: dict, decimals=3):
     """Arrondit les valeurs numériques du dict pour l'affichage."""
     out = {}
@@ -28,6 +34,89 @@ def _format_metrics(d: dict, decimals=3):
             out[k] = v
     return out
 
+def split_categorical(X: pd.DataFrame, cat_cols: list, cat_encoding: str):
+    """Répartit les catégorielles : (one-hot, hashing / encodage cible, modalités par colonne)."""
+    n_levels = X[cat_cols].nunique(dropna=False) if cat_cols else pd.Series(dtype=int)
+    if cat_encoding == "one-hot":
+        return cat_cols, [], n_levels
+    if cat_encoding == "auto":
+        onehot_cols = [c for c in cat_cols if n_levels[c] <= encoders.HIGH_CARDINALITY_LEVELS]
+        return onehot_cols, [c for c in cat_cols if c not in onehot_cols], n_levels
+    return [], cat_cols, n_levels
+
+
+def estimate_encoded_size(n_rows: int, num_cols: list, onehot_levels: pd.Series, encoded_cols: list,
+                          cat_encoding: str, n_target_columns=1) -> dict:
+    """
+    Estimation de la matrice encodée avant entraînement :
+    largeur, non-nuls par ligne (numériques, une entrée par colonne one-hot / hashée / cible),
+    densité et mémoire en dense (float64) et en CSR (valeur float64 + indice int32 par non-nul).
+    """
+    if cat_encoding == "target (hors pli)":
+        encoded_width = encoded_nnz = len(encoded_cols) * n_target_columns
+    else:
+        encoded_width, encoded_nnz = (encoders.HASH_FEATURES if encoded_cols else 0), len(encoded_cols)
+    width = len(num_cols) + int(onehot_levels.sum()) + encoded_width
+    nnz = len(num_cols) + len(onehot_levels) + encoded_nnz
+    return {
+        "largeur": width,
+        "non_nuls_par_ligne": nnz,
+        "densite": nnz / width if width else 1.0,
+        "octets_dense": n_rows * width * 8,
+        "octets_creux": n_rows * nnz * 12 + (n_rows + 1) * 8,
+    }
+
+
+def choose_sparse(size: dict, matrix_mode="auto") -> bool:
+    """Mode auto : matrice creuse si elle est peu dense et que sa version dense serait volumineuse."""
+    if matrix_mode != "auto":
+        return matrix_mode == "creuse"
+    return size["densite"] < SPARSE_DENSITY and size["octets_dense"] > DENSE_MAX_BYTES
+
+
+def build_preprocessor(num_cols, onehot_cols, encoded_cols, cat_encoding="auto", do_scale=True, sparse_mode=False,
+                       task="classification", random_state=42) -> ColumnTransformer:
+    """Préprocesseur commun à l'entraînement simple et à la comparaison de modèles."""
+    num_steps = []
+    if num_cols:
+        num_steps = [("imputer", SimpleImputer(strategy="median"))]
+        if do_scale:
+            # mode creux : pas de centrage (les zéros restent des zéros)
+            num_steps.append(("scaler", StandardScaler(with_mean=not sparse_mode)))
+
+    transformers = []
+    if num_cols:
+        transformers.append(("num", Pipeline(num_steps), num_cols))
+    if onehot_cols:
+        cat_steps = [("imputer", SimpleImputer(strategy="most_frequent")), ("onehot", OneHotEncoder(handle_unknown="ignore", sparse_output=sparse_mode))]
+        transformers.append(("cat", Pipeline(cat_steps), onehot_cols))
+    if encoded_cols:
+        # manquants déjà convertis en texte ("nan") : une modalité comme une autre
+        if cat_encoding == "target (hors pli)":
+            transformers.append(("target", encoders.OutOfFoldTargetEncoder(task=task, random_state=random_state), encoded_cols))
+        else:
+            transformers.append(("hash", encoders.HashingEncoder(), encoded_cols))
+
+    # mode creux : sortie CSR conservée de bout en bout ; mode dense : matrice dense même avec le hashing
+    return ColumnTransformer(transformers=transformers, remainder="drop", verbose_feature_names_out=False,
+                             sparse_threshold=1.0 if sparse_mode else 0.0)
+
+
+def make_model(model_choice: str, task: str, random_state=42, rf_n_estimators=100, rf_max_depth=0,
+               gb_n_estimators=100, gb_max_depth=3, gb_lr=0.1, hist_max_iter=boosting.MAX_ITER, hist_lr=0.1,
+               hist_max_depth=0, categorical=None):
+    """Estimateur d'une famille de modèles ("auto" = random forest) ; categorical : catégorielles natives (boosting hist)."""
+    if model_choice in boosting.HIST_BACKENDS:
+        return boosting.make_hist_model(model_choice, task, categorical, hist_max_iter, hist_lr, hist_max_depth, random_state)
+    if model_choice in ["auto", "random_forest"]:
+        params = dict(n_estimators=rf_n_estimators, max_depth=None if rf_max_depth==0 else rf_max_depth, random_state=random_state)
+        return RandomForestClassifier(**params) if task=="classification" else RandomForestRegressor(**params)
+    if model_choice == "gradient_boosting":
+        params = dict(n_estimators=gb_n_estimators, max_depth=gb_max_depth, learning_rate=gb_lr, random_state=random_state)
+        return GradientBoostingClassifier(**params) if task=="classification" else GradientBoostingRegressor(**params)
+    return LogisticRegression(max_iter=1000) if task=="classification" else LinearRegression()
+
+
 def run_modeling(df: pd.DataFrame) -> dict:
     st.subheader("⚡ Modélisation interactive")
 
@@ -42,7 +131,8 @@ def run_modeling(df: pd.DataFrame) -> dict:
 
     task = st.selectbox("Type de tâche", ["auto", "classification", "regression"], index=0)
     if task == "auto":
-        if y.dtype == "O" or (y.nunique() <= 20 and y.nunique()/len(y) < 0.1):
+        # texte : object, string (chaînes Arrow de optimize_memory) ou category
+        if pd.api.types.is_string_dtype(y) or y.dtype == "O" or (y.nunique() <= 20 and y.nunique()/len(y) < 0.1):
             task = "classification"
         else:
             task = "regression"
@@ -51,8 +141,46 @@ def run_modeling(df: pd.DataFrame) -> dict:
     test_size = st.slider("Taille test (%)", 5, 50, 20) / 100.0
     random_state = int(st.number_input("Seed aléatoire", value=42))
 
-    model_choice = st.selectbox("Choisir un modèle", ["auto", "random_forest", "gradient_boosting", "linear/logistic"])
+    model_choice = st.selectbox(
+        "Choisir un modèle",
+        ["auto", "random_forest", "gradient_boosting", "linear/logistic"] + boosting.HIST_BACKENDS,
+        help="Boosting par histogrammes (hist_gradient_boosting, lightgbm, xgboost) : catégorielles natives, "
+             "multithreading et arrêt précoce ; adapté au-delà de ~100k lignes",
+    )
+    native = model_choice in boosting.HIST_BACKENDS
     do_scale = st.checkbox("⚙️ Standardiser les numériques", value=True)
+    cat_encoding = st.selectbox(
+        "Encodage des catégorielles",
+        ["auto", "one-hot", "hashing", "target (hors pli)"],
+        help=f"auto : one-hot jusqu'à {encoders.HIGH_CARDINALITY_LEVELS} modalités, hashing au-delà (largeur fixe, creux)",
+    )
+    matrix_mode = st.selectbox(
+        "Matrice encodée",
+        ["auto", "dense", "creuse"],
+        help=f"auto : creuse (CSR) si la densité estimée est < {SPARSE_DENSITY:.0%} et la version dense > {DENSE_MAX_BYTES / 1024**2:.0f} Mo",
+    )
+
+    # largeur et mémoire de la matrice encodée, estimées avant l'entraînement
+    num_cols = X.select_dtypes(include="number").columns.tolist()
+    cat_cols = X.select_dtypes(include=["object", "string", "category"]).columns.tolist()
+    onehot_cols, encoded_cols, n_levels = split_categorical(X, cat_cols, cat_encoding)
+    n_target_columns = 1 if task == "regression" or y.nunique() <= 2 else int(y.nunique())
+    size = estimate_encoded_size(int(len(X) * (1 - test_size)), num_cols, n_levels[onehot_cols], encoded_cols,
+                                 cat_encoding, n_target_columns)
+    sparse_mode = choose_sparse(size, matrix_mode)
+    if native:
+        # une colonne de codes par catégorielle : ni one-hot ni standardisation
+        native_size = estimate_encoded_size(int(len(X) * (1 - test_size)), num_cols + cat_cols, pd.Series(dtype=int), [], "auto")
+        st.caption(
+            f"Catégorielles natives ({len(cat_cols)} colonnes, ≤ {boosting.NATIVE_MAX_CATEGORIES} modalités chacune) : "
+            f"matrice de {native_size['largeur']} colonnes ≈ {native_size['octets_dense'] / 1024**2:,.0f} Mo"
+        )
+    else:
+        st.caption(
+            f"Matrice encodée (entraînement) : {size['largeur']} colonnes, densité ≈ {size['densite']:.1%} — "
+            f"dense ≈ {size['octets_dense'] / 1024**2:,.0f} Mo, creuse ≈ {size['octets_creux'] / 1024**2:,.0f} Mo "
+            f"→ mode {'creux (CSR)' if sparse_mode else 'dense'}"
+        )
 
     # Hyperparamètres exposés
     if model_choice in ["random_forest", "auto"]:
@@ -68,50 +196,74 @@ def run_modeling(df: pd.DataFrame) -> dict:
     else:
         gb_n_estimators = 100; gb_max_depth = 3; gb_lr = 0.1
 
-    if st.button("🚀 Lancer l'entraînement"):
-        # Préprocessing pipeline (construit sans boucle coûteuse)
-        num_cols = X.select_dtypes(include="number").columns.tolist()
-        cat_cols = X.select_dtypes(include=["object", "category"]).columns.tolist()
-        if cat_cols:
-            X[cat_cols] = X[cat_cols].astype(str)
+    if native:
+        hist_max_iter = int(st.number_input("Hist - itérations max (arrêt précoce)", 10, 5000, boosting.MAX_ITER))
+        hist_lr = float(st.number_input("Hist - learning_rate", 0.01, 1.0, 0.1))
+        hist_max_depth = int(st.number_input("Hist - max_depth (0=>None)", 0, 50, 0))
+    else:
+        hist_max_iter = boosting.MAX_ITER; hist_lr = 0.1; hist_max_depth = 0
 
-        num_steps = []
-        if num_cols:
-            num_steps = [("imputer", SimpleImputer(strategy="median"))]
-            if do_scale:
-                num_steps.append(("scaler", StandardScaler()))
+    # Comparaison : familles candidates en validation croisée, budget de temps global
+    with st.expander("🏁 Comparaison de modèles"):
+        base_models = {name: make_model(name, task, random_state, rf_n_estimators, rf_max_depth, gb_n_estimators, gb_max_depth, gb_lr)
+                       for name in ["random_forest", "gradient_boosting", "linear/logistic"]}
+        candidates = comparison.candidate_models(task, base_models, random_state)
+        chosen = st.multiselect("Familles candidates", list(candidates), default=list(candidates))
+        col_cv, col_budget, col_scoring = st.columns(3)
+        cv = int(col_cv.number_input("Plis (validation croisée)", 2, 10, comparison.CV_FOLDS))
+        time_budget = int(col_budget.number_input("Budget de temps (s)", 10, 3600, comparison.TIME_BUDGET_S))
+        scoring = col_scoring.selectbox("Score", comparison.SCORINGS[task])
+        compare = st.button("🏁 Comparer les modèles", disabled=not chosen)
 
-        cat_steps = []
-        if cat_cols:
-            cat_steps = [("imputer", SimpleImputer(strategy="most_frequent")), ("onehot", OneHotEncoder(handle_unknown="ignore", sparse_output=False))]
-
-        transformers = []
-        if num_cols:
-            transformers.append(("num", Pipeline(num_steps), num_cols))
+    if st.button("🚀 Lancer l'entraînement") or compare:
+        # Préprocessing pipeline (construit sans boucle coûteuse)
         if cat_cols:
-            transformers.append(("cat", Pipeline(cat_steps), cat_cols))
-
-        preprocessor = ColumnTransformer(transformers=transformers, remainder="drop", verbose_feature_names_out=False)
+            categories = X[cat_cols].astype(str)
+            if native and not compare:
+                # catégorielles natives : les manquants restent NaN (et non "nan"), laissés au modèle
+                categories = categories.where(X[cat_cols].notna().to_numpy(), np.nan)
+            X[cat_cols] = categories
 
-        # Choix du modèle (sans boucle)
-        if model_choice == "auto":
-            if task == "classification":
-                model = RandomForestClassifier(n_estimators=rf_n_estimators, max_depth=None if rf_max_depth==0 else rf_max_depth, random_state=random_state)
-            else:
-                model = RandomForestRegressor(n_estimators=rf_n_estimators, max_depth=None if rf_max_depth==0 else rf_max_depth, random_state=random_state)
-        elif model_choice == "random_forest":
-            model = RandomForestClassifier(n_estimators=rf_n_estimators, max_depth=None if rf_max_depth==0 else rf_max_depth, random_state=random_state) if task=="classification" else RandomForestRegressor(n_estimators=rf_n_estimators, max_depth=None if rf_max_depth==0 else rf_max_depth, random_state=random_state)
-        elif model_choice == "gradient_boosting":
-            model = GradientBoostingClassifier(n_estimators=gb_n_estimators, max_depth=gb_max_depth, learning_rate=gb_lr, random_state=random_state) if task=="classification" else GradientBoostingRegressor(n_estimators=gb_n_estimators, max_depth=gb_max_depth, learning_rate=gb_lr, random_state=random_state)
+        if native and not compare:
+            preprocessor = boosting.native_preprocessor(num_cols, cat_cols)
         else:
-            model = LogisticRegression(max_iter=1000) if task=="classification" else LinearRegression()
-
-        pipe = Pipeline([("preprocessor", preprocessor), ("model", model)])
+            preprocessor = build_preprocessor(num_cols, onehot_cols, encoded_cols, cat_encoding, do_scale, sparse_mode, task, random_state)
 
         # Split & train
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
-        pipe.fit(X_train, y_train)
-        preds = pipe.predict(X_test)
+        start = time.perf_counter()
+        if compare:
+            bar = st.progress(0.0, text="Ajustement du préprocesseur partagé…")
+            leaderboard, pipe = comparison.compare_models(
+                X_train, y_train, preprocessor, {name: candidates[name] for name in chosen}, task,
+                scoring=scoring, cv=cv, time_budget=time_budget, random_state=random_state,
+                progress=lambda fraction, message: bar.progress(fraction, text=message),
+            )
+            st.write(f"🏆 **Classement** (score : {scoring}, validation croisée sur l'entraînement) :")
+            st.dataframe(leaderboard)
+            if pipe is None:
+                st.error("❌ Aucun candidat n'a pu être évalué dans le budget de temps.")
+                st.stop()
+            model_name = leaderboard.iloc[0]["modele"]
+            st.session_state.update({
+                "best_model": pipe,
+                "best_model_name": model_name,
+                "best_model_score": float(leaderboard.iloc[0]["score_moyen"]),
+                "leaderboard": leaderboard,
+            })
+            fit_seconds = time.perf_counter() - start
+            with execution.limits(1):
+                preds = pipe.predict(X_test)
+        else:
+            model = make_model(model_choice, task, random_state, rf_n_estimators, rf_max_depth, gb_n_estimators, gb_max_depth, gb_lr,
+                               hist_max_iter, hist_lr, hist_max_depth, boosting.categorical_mask(num_cols, cat_cols))
+            model_name = model_choice
+            pipe = Pipeline([("preprocessor", preprocessor), ("model", model)])
+            # budget d'exécution : n_jobs du modèle fixé sur les cœurs accordés, threads BLAS/OpenMP répartis entre ses workers
+            with execution.limits(estimator=model):
+                pipe.fit(X_train, y_train)
+                fit_seconds = time.perf_counter() - start
+                preds = pipe.predict(X_test)
 
         # Évaluation (metrics utilitaires)
         if task == "classification":
@@ -120,6 +272,12 @@ def run_modeling(df: pd.DataFrame) -> dict:
             metrics = regression_metrics(y_test, preds)
 
         metrics_display = _format_metrics(metrics, decimals=4)
+        # temps d'entraînement (comparaison : durée totale) et itérations retenues par l'arrêt précoce
+        metrics_display["temps_entrainement_s"] = round(fit_seconds, 2)
+        if model_name in boosting.HIST_BACKENDS:
+            n_iter = boosting.n_iterations(pipe.named_steps["model"])
+            if n_iter is not None:
+                metrics_display["iterations_retenues"] = int(n_iter)
         st.write("📊 **Metrics (test)** :")
         st.json(metrics_display)
 
@@ -136,6 +294,7 @@ def run_modeling(df: pd.DataFrame) -> dict:
         # Stocker dans session_state pour reporting/evaluation
         st.session_state.update({
             "model": pipe,
+            "current_model_name": model_name,
             "X_train": X_train,
             "X_test": X_test,
             "y_train": y_train,
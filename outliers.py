@@ -0,0 +1,99 @@
+# modules/outliers.py
+"""
+Détection des valeurs aberrantes.
+- Univariée : règle IQR (clôtures de Tukey) et z-score robuste (médiane / MAD) pour toutes
+  les colonnes numériques en une passe vectorisée (par blocs de colonnes).
+- Multivariée (optionnelle) : IsolationForest appris sur un échantillon, appliqué par blocs.
+Les bornes calculées servent ensuite aux corrections (écrêtage, winsorisation, suppression).
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from modules import execution
+
+IQR_K = 1.5            # clôtures de Tukey : [Q1 - k·IQR, Q3 + k·IQR]
+ROBUST_Z = 3.5         # seuil du z-score robuste 0.6745·(x - médiane) / MAD
+WINSOR_QUANTILES = (0.01, 0.99)
+BLOCK_COLS = 32
+IFOREST_SAMPLE_ROWS = 100_000
+IFOREST_CHUNK_ROWS = 200_000
+IFOREST_CONTAMINATION = 0.01   # part attendue de lignes aberrantes
+
+
+def _numeric_columns(df: pd.DataFrame) -> list:
+    return [c for c in df.select_dtypes(include="number").columns if not pd.api.types.is_bool_dtype(df[c])]
+
+
+def outlier_summary(df: pd.DataFrame, columns=None, iqr_k=IQR_K, z_threshold=ROBUST_Z, block_cols=BLOCK_COLS) -> pd.DataFrame:
+    """
+    Quantiles, clôtures et nombres de valeurs aberrantes par colonne numérique (index = colonne) :
+    q1, mediane, q3, mad, borne_basse / borne_haute (IQR), p_bas / p_haut (winsorisation),
+    n_iqr, n_z_robuste.
+    """
+    columns = _numeric_columns(df) if columns is None else list(columns)
+    frames = []
+    q_low, q_high = WINSOR_QUANTILES
+    for start in range(0, len(columns), block_cols):
+        block = columns[start:start + block_cols]
+        values = df[block].to_numpy(dtype="float64", na_value=np.nan)
+        values = np.where(np.isfinite(values), values, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # colonnes entièrement manquantes
+            p_lo, q1, med, q3, p_hi = np.nanquantile(values, [q_low, 0.25, 0.5, 0.75, q_high], axis=0)
+            mad = np.nanmedian(np.abs(values - med), axis=0)
+        iqr = q3 - q1
+        low, high = q1 - iqr_k * iqr, q3 + iqr_k * iqr
+        with np.errstate(invalid="ignore", divide="ignore"):
+            n_iqr = ((values < low) | (values > high)).sum(axis=0)
+            z = 0.6745 * np.abs(values - med) / np.where(mad > 0, mad, np.nan)
+            n_z = (z > z_threshold).sum(axis=0)
+        frames.append(pd.DataFrame({
+            "q1": q1, "mediane": med, "q3": q3, "mad": mad,
+            "borne_basse": low, "borne_haute": high, "p_bas": p_lo, "p_haut": p_hi,
+            "n_iqr": n_iqr.astype(int), "n_z_robuste": n_z.astype(int),
+        }, index=pd.Index(block, name="colonne")))
+    if not frames:
+        return pd.DataFrame(columns=["q1", "mediane", "q3", "mad", "borne_basse", "borne_haute",
+                                     "p_bas", "p_haut", "n_iqr", "n_z_robuste"])
+    return pd.concat(frames)
+
+
+def isolation_forest_mask(df: pd.DataFrame, columns=None, sample_rows=IFOREST_SAMPLE_ROWS,
+                          contamination=IFOREST_CONTAMINATION, random_state=42) -> pd.Series:
+    """
+    Lignes aberrantes au sens multivarié : IsolationForest appris sur un échantillon
+    (manquants remplacés par la médiane), puis appliqué par blocs à toutes les lignes.
+    """
+    columns = _numeric_columns(df) if columns is None else list(columns)
+    if not columns or not len(df):
+        return pd.Series(False, index=df.index)
+    medians = df[columns].median()
+    sample = df[columns].sample(min(sample_rows, len(df)), random_state=random_state)
+    model = IsolationForest(contamination=contamination, random_state=random_state)
+    with execution.limits(estimator=model):
+        model.fit(_prepare(sample, medians))
+        flags = [model.predict(_prepare(df[columns].iloc[i:i + IFOREST_CHUNK_ROWS], medians)) == -1
+                 for i in range(0, len(df), IFOREST_CHUNK_ROWS)]
+    return pd.Series(np.concatenate(flags), index=df.index, name="aberrant_multivarie")
+
+
+def _prepare(frame: pd.DataFrame, medians: pd.Series) -> np.ndarray:
+    values = frame.to_numpy(dtype="float64", na_value=np.nan)
+    values = np.where(np.isfinite(values), values, np.nan)
+    return np.where(np.isnan(values), medians.to_numpy(dtype="float64"), values)
+
+
+def outlier_report(df: pd.DataFrame, multivariate=False, **params) -> dict:
+    """{"colonnes": outlier_summary, "multivarie": masque IsolationForest ou None}."""
+    return {
+        "colonnes": outlier_summary(df, **params),
+        "multivarie": isolation_forest_mask(df) if multivariate else None,
+    }
+
+
+def outlier_mask(s: pd.Series, low, high) -> pd.Series:
+    """Valeurs hors de [low, high] (les manquants ne sont pas aberrants)."""
+    values = pd.to_numeric(s, errors="coerce")
+    return (values < low) | (values > high)
@@ -1,17 +1,89 @@
 # modules/preprocessing.py
 # preprocessing.py
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-from io import BytesIO
+import os
+import gzip
+import uuid
+from modules import encoders, dataset, duplicates, outliers
+from modules.utils import helpers
+
+# Optional imports avec gestion d'erreur
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
 
 # ------------------------
-# Détection anomalies (utilise profile_report)
+# Scanner d'anomalies vectorisé (remplace le profiling complet pour le Prétraitement)
 # ------------------------
-def detect_and_propose_corrections(profile_report, df: pd.DataFrame):
-    desc = profile_report.get_description()
+def scan_anomalies(df: pd.DataFrame, stats=None) -> dict:
+    """
+    Calcule en une passe vectorisée les compteurs utilisés par detect_and_propose_corrections :
+    n_missing, n_unique, n_infinite par colonne et n_duplicates pour la table.
+    Le résultat a la même forme que `ProfileReport.get_description()` (variables / table).
+    - stats : sketches par colonne (`sketches.column_sketches`), éventuellement calculés sur
+      un jeu plus grand que df (hors mémoire) : manquants, infinis et cardinalité (HyperLogLog)
+      en sont lus ; seuls les doublons sont comptés sur df
+    Les variables sont toujours celles de df : une colonne sans sketch est comptée exactement sur df,
+    un sketch de colonne absente de df est ignoré.
+    """
+    # doublons : empreinte 64 bits par ligne (vectorisée) au lieu de comparer les lignes entières
+    n_duplicates = int(duplicates.duplicate_mask(df, verify=False).sum()) if len(df) else 0
+
+    sketched = [c for c in df.columns if c in stats] if stats else []
+    if sketched:
+        variables = {
+            col: {"n_missing": stats[col].n_missing, "n_unique": stats[col].n_unique, "n_infinite": stats[col].n_infinite}
+            for col in sketched
+        }
+        rest = [c for c in df.columns if c not in variables]
+        if rest:
+            variables.update(scan_anomalies(df[rest])["variables"])
+        n_rows = max(stats[c].n for c in sketched)
+        return {"variables": {c: variables[c] for c in df.columns}, "table": {"n": n_rows, "n_duplicates": n_duplicates}}
+
+    n_missing = df.isna().sum()
+    n_unique = df.nunique(dropna=True)
+
+    n_infinite = pd.Series(0, index=df.columns, dtype="int64")
+    float_cols = df.select_dtypes(include="floating").columns
+    if len(float_cols):
+        n_infinite[float_cols] = np.isinf(df[float_cols].to_numpy(dtype="float64", na_value=np.nan)).sum(axis=0)
+
+    variables = {
+        col: {"n_missing": int(n_missing[col]), "n_unique": int(n_unique[col]), "n_infinite": int(n_infinite[col])}
+        for col in df.columns
+    }
+    return {"variables": variables, "table": {"n": len(df), "n_duplicates": n_duplicates}}
+
+
+# ------------------------
+# Détection anomalies (profile_report ydata ou résultat de scan_anomalies)
+# ------------------------
+def detect_and_propose_corrections(profile_report, df: pd.DataFrame, duplicate_subset=None, near_labels=None,
+                                   outliers_report=None):
+    """
+    duplicate_subset : colonnes clés des doublons exacts (recompte sur df ; toutes les colonnes par défaut)
+    near_labels : groupes de quasi-doublons (`duplicates.near_duplicate_clusters`) -> anomalie QUASI-DOUBLONS
+    outliers_report : résultat de `outliers.outlier_report` (calculé sur df si absent)
+    """
+    if profile_report is None:
+        profile_report = scan_anomalies(df)
+    desc = profile_report if isinstance(profile_report, dict) else profile_report.get_description()
     # compatibilité selon version
     vars_desc = desc.get("variables") if isinstance(desc, dict) else getattr(desc, "variables", {})
+    # nombre de lignes décrites (peut couvrir un historique cumulé plus large que df)
+    n_rows = (desc.get("table") or {}).get("n", len(df)) if isinstance(desc, dict) else len(df)
     results = []
 
     # Parcours du dictionnaire produit par profiling (faible coût, petite structure)
@@ -35,9 +107,13 @@ def detect_and_propose_corrections(profile_report, df: pd.DataFrame):
             anomalies.append("Colonne constante")
             corrections.append("Supprimer colonne")
 
-        if len(df) > 0 and n_unique > 0.5 * len(df):
+        # encodages : colonnes textuelles ou catégorielles seulement (un numérique continu est toujours très varié)
+        dtype = df[col].dtype if col in df.columns else None
+        textual = dtype is not None and (isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype)
+                                         or pd.api.types.is_string_dtype(dtype))
+        if textual and n_rows > 0 and n_unique > 0.5 * n_rows:
             anomalies.append("Cardinalité élevée")
-            corrections.append("Encodage alternatif (hashing/target)")
+            corrections.extend(ENCODAGES)
 
         n_infinite = info.get("n_infinite", 0) or 0
         if n_infinite > 0:
@@ -53,7 +129,9 @@ def detect_and_propose_corrections(profile_report, df: pd.DataFrame):
 
     # Doublons purs (table-level) : tenter d'extraire depuis profile_report, fallback sur df
     duplicates_count = None
-    if isinstance(desc, dict):
+    if duplicate_subset:
+        duplicates_count = int(duplicates.duplicate_mask(df, duplicate_subset).sum())
+    elif isinstance(desc, dict):
         # plusieurs chemins possibles selon version
         duplicates_count = desc.get("table", {}).get("n_duplicates") if isinstance(desc.get("table"), dict) else None
         if duplicates_count is None:
@@ -62,160 +140,291 @@ def detect_and_propose_corrections(profile_report, df: pd.DataFrame):
             duplicates_count = desc.get("table", {}).get("n_duplicated") if isinstance(desc.get("table"), dict) else None
 
     if duplicates_count is None:
-        duplicates_count = int(df.duplicated().sum())
+        duplicates_count = int(duplicates.duplicate_mask(df).sum())
 
     if duplicates_count and duplicates_count > 0:
+        key = f" (clé : {', '.join(map(str, duplicate_subset))})" if duplicate_subset else ""
         results.append({
             "colonne": "DOUBLONS",
-            "anomalies": [f"{int(duplicates_count)} doublons purs détectés"],
+            "anomalies": [f"{int(duplicates_count)} doublons purs détectés{key}"],
             "propositions": ["Supprimer doublons purs", "Conserver"]
         })
 
+    # Valeurs aberrantes (IQR / z robuste), ajoutées à l'entrée de la colonne si elle existe
+    if outliers_report is None:
+        outliers_report = outliers.outlier_report(df)
+    by_col = {r["colonne"]: r for r in results}
+    for col, row in outliers_report["colonnes"].iterrows():
+        if row["n_iqr"] > 0 or row["n_z_robuste"] > 0:
+            entry = by_col.get(col)
+            if entry is None:
+                entry = {"colonne": col, "anomalies": [], "propositions": []}
+                results.append(entry)
+            entry["anomalies"].append(f"{int(row['n_iqr'])} valeurs aberrantes (IQR), {int(row['n_z_robuste'])} (z robuste)")
+            entry["propositions"] = list(dict.fromkeys(entry["propositions"] + list(CORRECTIONS_ABERRANTES)))
+    multivariate = outliers_report.get("multivarie")
+    if multivariate is not None and multivariate.any():
+        results.append({
+            "colonne": "ABERRANTS MULTIVARIÉS",
+            "anomalies": [f"{int(multivariate.sum())} lignes aberrantes (IsolationForest)"],
+            "propositions": ["Supprimer lignes aberrantes (IsolationForest)", "Conserver"]
+        })
+
+    if near_labels is not None:
+        n_near = int(duplicates.cluster_duplicate_mask(near_labels).sum())
+        if n_near:
+            n_groups = int(near_labels[near_labels >= 0].nunique())
+            results.append({
+                "colonne": "QUASI-DOUBLONS",
+                "anomalies": [f"{n_near} quasi-doublons dans {n_groups} groupes"],
+                "propositions": ["Supprimer quasi-doublons", "Conserver"]
+            })
+
     return results
 
 
 # ------------------------
 # Application correction avec suivi (optimisée)
 # ------------------------
-def apply_corrections_with_log(df: pd.DataFrame, corrections_dict: dict):
+def _median_value(s: pd.Series, stats=None):
+    """Médiane exacte, ou approchée (KLL) si des sketches sont fournis pour la colonne."""
+    sk = (stats or {}).get(s.name)
+    if sk is not None and sk.kll is not None and sk.kll.n:
+        return sk.median()
+    return s.median()
+
+
+def _mode_value(s: pd.Series, stats=None):
+    """Mode exact, ou approché (Space-Saving) si des sketches sont fournis pour la colonne."""
+    sk = (stats or {}).get(s.name)
+    if sk is not None and sk.mode() is not None:
+        return sk.mode()
+    mode = s.mode()
+    return mode[0] if not mode.empty else None
+
+
+IMPUTATIONS = ("Imputer (moyenne)", "Imputer (médiane)", "Imputer (mode)", "Remplacer par NaN + imputer")
+NON_APPLIQUEES = ("Ne pas corriger", "Conserver")
+ENCODAGES = ("Encodage hashing", "Encodage cible (hors pli)")
+CORRECTIONS_ABERRANTES = ("Écrêter (IQR)", "Winsoriser (1 % / 99 %)", "Supprimer lignes aberrantes")
+
+
+def _infinite_mask(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_float_dtype(s):
+        return pd.Series(np.isinf(s.to_numpy(dtype="float64", na_value=np.nan)), index=s.index)
+    return pd.Series(False, index=s.index)
+
+
+def compile_correction_plan(df: pd.DataFrame, corrections_dict: dict, stats=None, target=None,
+                            duplicate_subset=None, near_labels=None, outliers_report=None, learned=None) -> dict:
     """
-    corrections_dict e.g. {'col1': 'Imputer (moyenne)', 'DOUBLONS': 'Supprimer doublons purs'}
-    Retourne : df corrigé, log_df
+    Compile les corrections choisies en un plan exécutable en une passe :
+    - keep : masque combiné des lignes conservées (doublons, quasi-doublons, "Supprimer lignes")
+    - fill : {colonne: valeur} pour toutes les imputations (un seul fillna)
+    - replace_inf : colonnes dont les infinis deviennent manquants avant imputation
+    - drop_columns : colonnes supprimées
+    - clip : {colonne: (borne basse, borne haute)} pour l'écrêtage / la winsorisation
+    - encode : {colonne: encodage} appliqués en dernier (l'encodage cible requiert `target`)
+    - log : nombres exacts de valeurs modifiées, calculés sur les masques de manquants
+    Les valeurs d'imputation sont apprises sur les lignes conservées, sauf si `learned`
+    ({"fill": valeurs, "encoders": encodeurs ajustés}) les fournit déjà (cleaning.CleaningTransformer).
     """
-    log = []
+    fitted_encoders = (learned or {}).get("encoders", {})
+    dup_log, other_log = [], []
+    keep = pd.Series(True, index=df.index)
+    removed = pd.Series(False, index=df.index)
+    drop_rows, drop_columns, fills, encode, clip, outlier_rows = [], [], [], {}, {}, []
+    bounds = outliers_report["colonnes"] if outliers_report is not None else None
 
-    # Regrouper colonnes par type de correction pour appliquer vectorisé quand possible
-    # Ex: imputer moyenne/mediane/mode pour plusieurs colonnes numériques
-    # Construire des buckets
-    buckets = {}
     for col, corr in corrections_dict.items():
-        buckets.setdefault(corr, []).append(col)
-
-    # Traitement pour doublons (dataset-level)
-    if "Supprimer doublons purs" in buckets:
-        cols = buckets.pop("Supprimer doublons purs")
-        if "DOUBLONS" in cols:
-            before = len(df)
-            df = df.drop_duplicates()
-            after = len(df)
-            log.append({
-                "colonne": "DOUBLONS",
-                "correction_appliquee": "Supprimer doublons purs",
-                "nb_valeurs_modifiees": int(before - after)
-            })
-
-    # Imputation moyenne/mediane en vectorisé pour colonnes numériques uniquement
-    # Moyenne
-    if "Imputer (moyenne)" in buckets:
-        cols = [c for c in buckets.pop("Imputer (moyenne)") if c in df.columns]
-        num_cols = [c for c in cols if pd.api.types.is_numeric_dtype(df[c])]
-        if num_cols:
-            means = df[num_cols].mean()
-            df[num_cols] = df[num_cols].fillna(means)
-            for c in num_cols:
-                log.append({"colonne": c, "correction_appliquee": "Imputer (moyenne)", "nb_valeurs_modifiees": int(df[c].isna().sum() == 0)})  # best-effort
-
-        # non-numériques fallback: per-column mode
-        cat_cols = [c for c in cols if c not in num_cols and c in df.columns]
-        for c in cat_cols:
-            mode_val = df[c].mode()[0] if not df[c].mode().empty else None
-            before_missing = df[c].isna().sum()
-            df[c] = df[c].fillna(mode_val)
-            modified = int(before_missing - df[c].isna().sum())
-            log.append({"colonne": c, "correction_appliquee": "Imputer (moyenne) (fallback mode)", "nb_valeurs_modifiees": modified})
-
-    # Imputer mediane
-    if "Imputer (médiane)" in buckets:
-        cols = [c for c in buckets.pop("Imputer (médiane)") if c in df.columns]
-        num_cols = [c for c in cols if pd.api.types.is_numeric_dtype(df[c])]
-        if num_cols:
-            meds = df[num_cols].median()
-            before = df[num_cols].isna().sum()
-            df[num_cols] = df[num_cols].fillna(meds)
-            after = df[num_cols].isna().sum()
-            for c in num_cols:
-                log.append({"colonne": c, "correction_appliquee": "Imputer (médiane)", "nb_valeurs_modifiees": int(before[c] - after[c])})
-        # categorical fallback
-        cat_cols = [c for c in cols if c not in num_cols]
-        for c in cat_cols:
-            mode_val = df[c].mode()[0] if not df[c].mode().empty else None
-            before_missing = df[c].isna().sum()
-            df[c] = df[c].fillna(mode_val)
-            log.append({"colonne": c, "correction_appliquee": "Imputer (médiane) (fallback mode)", "nb_valeurs_modifiees": int(before_missing - df[c].isna().sum())})
-
-    # Imputer mode
-    if "Imputer (mode)" in buckets:
-        cols = [c for c in buckets.pop("Imputer (mode)") if c in df.columns]
-        for c in cols:
-            before_missing = df[c].isna().sum()
-            mode_val = df[c].mode()[0] if not df[c].mode().empty else None
-            df[c] = df[c].fillna(mode_val)
-            log.append({"colonne": c, "correction_appliquee": "Imputer (mode)", "nb_valeurs_modifiees": int(before_missing - df[c].isna().sum())})
-
-    # Supprimer lignes (per-column)
-    if "Supprimer lignes" in buckets:
-        cols = [c for c in buckets.pop("Supprimer lignes") if c in df.columns]
-        for c in cols:
-            before = len(df)
-            df = df.dropna(subset=[c])
-            after = len(df)
-            log.append({"colonne": c, "correction_appliquee": "Supprimer lignes", "nb_valeurs_modifiees": int(before - after)})
-
-    # Supprimer colonne
-    if "Supprimer colonne" in buckets:
-        cols = [c for c in buckets.pop("Supprimer colonne") if c in df.columns]
-        for c in cols:
-            df = df.drop(columns=[c])
-            log.append({"colonne": c, "correction_appliquee": "Supprimer colonne", "nb_valeurs_modifiees": "colonne supprimée"})
-
-    # Remplacer infinis + imputer
-    if "Remplacer par NaN + imputer" in buckets:
-        cols = [c for c in buckets.pop("Remplacer par NaN + imputer") if c in df.columns]
-        for c in cols:
-            before_neg = df[c].isna().sum()
-            df[c] = df[c].replace([float("inf"), -float("inf")], pd.NA)
-            if pd.api.types.is_numeric_dtype(df[c]):
-                med = df[c].median()
-                df[c] = df[c].fillna(med)
+        if col == "DOUBLONS" and corr == "Supprimer doublons purs":
+            dup = duplicates.duplicate_mask(df, duplicate_subset) & ~removed
+            removed |= dup
+            dup_log.append({"colonne": "DOUBLONS", "correction_appliquee": corr, "nb_valeurs_modifiees": int(dup.sum())})
+        elif col == "QUASI-DOUBLONS" and corr == "Supprimer quasi-doublons":
+            if near_labels is None:
+                other_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": "groupes non calculés"})
+                continue
+            near = duplicates.cluster_duplicate_mask(near_labels.reindex(df.index, fill_value=-1)) & ~removed
+            removed |= near
+            dup_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": int(near.sum())})
+        elif col == "ABERRANTS MULTIVARIÉS" and corr == "Supprimer lignes aberrantes (IsolationForest)":
+            multivariate = outliers_report.get("multivarie") if outliers_report is not None else None
+            if multivariate is None:
+                other_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": "détection non calculée"})
+                continue
+            flagged = multivariate.reindex(df.index, fill_value=False) & ~removed
+            removed |= flagged
+            dup_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": int(flagged.sum())})
+        elif corr in NON_APPLIQUEES:
+            other_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": 0})
+        elif col not in df.columns:
+            other_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": "colonne absente"})
+        elif corr == "Supprimer lignes":
+            drop_rows.append(col)
+        elif corr == "Supprimer colonne":
+            drop_columns.append(col)
+        elif corr in IMPUTATIONS:
+            fills.append((col, corr))
+        elif corr == "Encodage cible (hors pli)" and col not in fitted_encoders and (target is None or target not in df.columns or target == col):
+            other_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": "variable cible requise"})
+        elif corr in ENCODAGES:
+            encode[col] = corr
+        elif corr in CORRECTIONS_ABERRANTES:
+            known = bounds is not None and col in bounds.index
+            row = bounds.loc[col] if known else outliers.outlier_summary(df, columns=[col]).loc[col]
+            if corr == "Supprimer lignes aberrantes":
+                outlier_rows.append((col, row["borne_basse"], row["borne_haute"]))
+            elif corr == "Écrêter (IQR)":
+                clip[col] = (corr, row["borne_basse"], row["borne_haute"])
             else:
-                mode_val = df[c].mode()[0] if not df[c].mode().empty else None
-                df[c] = df[c].fillna(mode_val)
-            log.append({"colonne": c, "correction_appliquee": "Remplacer par NaN + imputer", "nb_valeurs_modifiees": int(df[c].isna().sum() - before_neg)})
-
-    # Encodage / autres => journaliser pour attention
-    for corr, cols in list(buckets.items()):
-        if corr.startswith("Encodage") or corr == "Ne pas corriger":
-            for c in cols:
-                log.append({"colonne": c, "correction_appliquee": corr, "nb_valeurs_modifiees": 0})
+                clip[col] = (corr, row["p_bas"], row["p_haut"])
+        else:
+            other_log.append({"colonne": col, "correction_appliquee": corr, "nb_valeurs_modifiees": "correction inconnue"})
+
+    if target in drop_columns:
+        for c in [c for c, corr in encode.items() if corr == "Encodage cible (hors pli)" and c not in fitted_encoders]:
+            del encode[c]
+            other_log.append({"colonne": c, "correction_appliquee": "Encodage cible (hors pli)", "nb_valeurs_modifiees": "variable cible supprimée"})
+
+    # lignes supprimées : chaque ligne est attribuée à la première colonne qui la retire
+    row_log = []
+    for c in drop_rows:
+        newly = df[c].isna() & ~removed
+        removed |= newly
+        row_log.append({"colonne": c, "correction_appliquee": "Supprimer lignes", "nb_valeurs_modifiees": int(newly.sum())})
+    for c, low, high in outlier_rows:
+        newly = outliers.outlier_mask(df[c], low, high) & ~removed
+        removed |= newly
+        row_log.append({"colonne": c, "correction_appliquee": "Supprimer lignes aberrantes", "nb_valeurs_modifiees": int(newly.sum())})
+    keep &= ~removed
+    all_kept = bool(keep.all())
+
+    clip_bounds, clip_log = {}, []
+    for c, (corr, low, high) in clip.items():
+        if pd.api.types.is_integer_dtype(df[c]):
+            low, high = np.ceil(low), np.floor(high)  # bornes entières : le type de la colonne est conservé
+        s = df[c] if all_kept else df[c][keep]
+        clip_bounds[c] = (low, high)
+        clip_log.append({"colonne": c, "correction_appliquee": corr, "nb_valeurs_modifiees": int(outliers.outlier_mask(s, low, high).sum())})
+
+    fill, replace_inf = {}, []
+    fill_log = []
+    for c, corr in fills:
+        s = df[c] if all_kept else df[c][keep]
+        to_fill = s.isna()
+        numeric = pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+        label = corr
+        if corr == "Remplacer par NaN + imputer":
+            inf = _infinite_mask(s)
+            if inf.any():
+                replace_inf.append(c)
+                to_fill |= inf
+                s = s.mask(inf)
+            method = "median" if numeric else "mode"
+        elif numeric and corr == "Imputer (moyenne)":
+            method = "mean"
+        elif numeric and corr == "Imputer (médiane)":
+            method = "median"
         else:
-            for c in cols:
-                # fallback safe: apply per-column
-                if c in df.columns:
-                    df_before = df[c].copy()
-                    df = apply_correction(df, c, corr)
-                    modified = int(df_before.ne(df[c]).sum()) if c in df.columns else "colonne supprimée"
-                    log.append({"colonne": c, "correction_appliquee": corr, "nb_valeurs_modifiees": modified})
-                else:
-                    log.append({"colonne": c, "correction_appliquee": corr, "nb_valeurs_modifiees": "colonne absente"})
-
-    log_df = pd.DataFrame(log)
-    # formatage propre
-    if "nb_valeurs_modifiees" in log_df.columns:
-        # convertir en int quand possible
-        def safe_int(x):
-            try:
-                return int(x)
-            except:
-                return x
-        log_df["nb_valeurs_modifiees"] = log_df["nb_valeurs_modifiees"].apply(safe_int)
-
-    return df, log_df
+            method = "mode"
+            if corr != "Imputer (mode)":
+                label = f"{corr} (fallback mode)"
+        if learned is not None:
+            value = learned["fill"].get(c)
+        elif method == "mean":
+            value = s.mean()
+        elif method == "median":
+            value = _median_value(s, stats)
+        else:
+            value = _mode_value(s, stats)
+        n_fill = int(to_fill.sum())
+        if value is not None and not pd.isna(value):
+            fill[c] = value
+        else:
+            n_fill = 0  # colonne entièrement manquante : rien à imputer
+        fill_log.append({"colonne": c, "correction_appliquee": label, "nb_valeurs_modifiees": n_fill})
+
+    drop_log = [{"colonne": c, "correction_appliquee": "Supprimer colonne", "nb_valeurs_modifiees": "colonne supprimée"}
+                for c in drop_columns]
+    encode_log = [{"colonne": c, "correction_appliquee": corr, "nb_valeurs_modifiees": int(keep.sum())}
+                  for c, corr in encode.items()]
+    return {
+        "keep": None if all_kept else keep,
+        "fill": fill,
+        "replace_inf": replace_inf,
+        "drop_columns": drop_columns,
+        "encode": encode,
+        "encoders": dict(fitted_encoders),
+        "clip": clip_bounds,
+        "target": target,
+        "log": dup_log + fill_log + clip_log + row_log + drop_log + encode_log + other_log,
+    }
+
+
+def execute_correction_plan(df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+    """
+    Exécute un plan compilé : une sélection lignes/colonnes (seule copie), un fillna en place,
+    puis les encodages (la colonne encodée remplace l'originale, à la même position).
+    """
+    columns = [c for c in df.columns if c not in set(plan["drop_columns"])]
+    out = df.loc[plan["keep"], columns] if plan["keep"] is not None else df[columns].copy()
+    for c in plan["replace_inf"]:
+        out[c] = out[c].mask(_infinite_mask(out[c]))
+    if plan["fill"]:
+        for c, value in plan["fill"].items():
+            # valeur apprise absente des modalités du lot (category) : ajoutée avant le remplissage
+            dtype = out[c].dtype if c in out.columns else None
+            if isinstance(dtype, pd.CategoricalDtype) and pd.notna(value) and value not in dtype.categories:
+                out[c] = out[c].cat.add_categories([value])
+        out.fillna(value=plan["fill"], inplace=True)
+    for c, (low, high) in plan.get("clip", {}).items():
+        out[c] = out[c].clip(low, high)
+    fitted = plan.setdefault("encoders", {})
+    for c, corr in plan.get("encode", {}).items():
+        out = _encode_column(out, c, corr, plan.get("target"), fitted)
+    return out
+
+
+def _encode_column(df: pd.DataFrame, col: str, encoding: str, target=None, fitted=None) -> pd.DataFrame:
+    """
+    Remplace col par son encodage. Encodage cible : encodeur déjà ajusté dans `fitted` si présent
+    (application à un nouveau lot), sinon encodage hors pli sur df ; l'encodeur est ajouté à `fitted`.
+    """
+    if encoding == "Encodage hashing":
+        df[col] = encoders.hash_buckets(df[col])
+        return df
+    fitted = {} if fitted is None else fitted
+    if col in fitted:
+        encoder = fitted[col]
+        encoded = pd.DataFrame(encoder.transform(df[[col]]), index=df.index, columns=encoder.get_feature_names_out())
+    else:
+        encoded, fitted[col] = encoders.target_encode_column(df[col], df[target])
+    position = df.columns.get_loc(col)
+    left, right = df.iloc[:, :position], df.iloc[:, position + 1:]
+    return pd.concat([left, encoded, right], axis=1)
+
+
+def apply_corrections_with_log(df: pd.DataFrame, corrections_dict: dict, stats=None, target=None,
+                               duplicate_subset=None, near_labels=None, outliers_report=None):
+    """
+    corrections_dict e.g. {'col1': 'Imputer (moyenne)', 'DOUBLONS': 'Supprimer doublons purs'}
+    stats : sketches par colonne (optionnel) -> médianes / modes approchés, utilisables
+            quand les valeurs ont été apprises sur un jeu trop gros pour la mémoire
+    target : variable cible, requise par "Encodage cible (hors pli)"
+    duplicate_subset / near_labels : clé des doublons exacts et groupes de quasi-doublons
+    outliers_report : bornes des valeurs aberrantes (`outliers.outlier_report`) utilisées par
+                      l'écrêtage, la winsorisation et la suppression de lignes aberrantes
+    Retourne : df corrigé, log_df
+    """
+    plan = compile_correction_plan(df, corrections_dict, stats, target, duplicate_subset, near_labels, outliers_report)
+    return execute_correction_plan(df, plan), pd.DataFrame(plan["log"])
 
 
 # ------------------------
 # Fallback applicateur (colonne unique)
 # ------------------------
-def apply_correction(df: pd.DataFrame, col: str, correction: str) -> pd.DataFrame:
+def apply_correction(df: pd.DataFrame, col: str, correction: str, target=None) -> pd.DataFrame:
     if col not in df.columns and col != "DOUBLONS":
         return df
 
@@ -251,24 +460,129 @@ def apply_correction(df: pd.DataFrame, col: str, correction: str) -> pd.DataFram
             mode_val = df[col].mode()[0] if not df[col].mode().empty else None
             df[col] = df[col].fillna(mode_val)
 
-    elif correction.startswith("Encodage"):
-        st.warning(f"⚠️ Encodage non encore implémenté pour {col}")
+    elif correction == "Encodage hashing":
+        df = _encode_column(df, col, correction)
+
+    elif correction == "Encodage cible (hors pli)":
+        if target is None or target not in df.columns or target == col:
+            st.warning(f"⚠️ Choisissez une variable cible pour encoder {col}")
+        else:
+            df = _encode_column(df, col, correction, target)
 
     return df
 
 
 # ------------------------
-# Télécharger base corrigée ou log
+# Télécharger base corrigée ou log (exports par blocs, générés au clic)
 # ------------------------
-def download_df(df: pd.DataFrame, label="Télécharger", file_name="data", file_format="csv"):
-    if file_format == "csv":
-        csv_data = df.to_csv(index=False).encode('utf-8')
-        st.download_button(label=f"{label} (CSV)", data=csv_data, file_name=f"{file_name}.csv", mime="text/csv", key=f"{file_name}_csv")
+EXPORT_FORMATS = {
+    # format : (extension, type MIME, libellé)
+    "parquet": (".parquet", "application/octet-stream", "Parquet"),
+    "feather": (".feather", "application/octet-stream", "Feather"),
+    "csv.gz": (".csv.gz", "application/gzip", "CSV gzip"),
+    "csv": (".csv", "text/csv", "CSV"),
+    "excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "Excel"),
+}
+EXPORT_CHUNK_ROWS = 100_000
+EXPORT_MEMORY_MAX_BYTES = 64 * 1024 ** 2   # taille du fichier exporté au-delà de laquelle il est servi par lien, pas en mémoire
+EXPORT_DIR = "outputs/exports"
+EXPORT_DIR_MAX_BYTES = 5 * 1024 ** 3       # exports sur disque, toutes sessions confondues (éviction LRU)
+# fichiers servis par Streamlit (server.enableStaticServing, .streamlit/config.toml) : dossier static/ de l'application
+EXPORT_STATIC_DIR = os.path.join("static", "exports")
+EXPORT_STATIC_URL = "app/static/exports"
+EXCEL_MAX_ROWS = 1_048_575                 # limite d'une feuille Excel (hors en-tête)
+
+
+def _chunks(df: pd.DataFrame, chunk_rows=EXPORT_CHUNK_ROWS):
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def export_df(df: pd.DataFrame, fileobj, file_format="parquet", chunk_rows=EXPORT_CHUNK_ROWS):
+    """Écrit df dans un fichier binaire ouvert, bloc par bloc (un seul bloc converti à la fois)."""
+    if file_format in ("csv", "csv.gz"):
+        sink = gzip.GzipFile(fileobj=fileobj, mode="wb") if file_format == "csv.gz" else fileobj
+        for i, chunk in enumerate(_chunks(df, chunk_rows)):
+            sink.write(chunk.to_csv(index=False, header=(i == 0)).encode("utf-8"))
+        if sink is not fileobj:
+            sink.close()
+    elif file_format in ("parquet", "feather"):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow est requis pour les exports Parquet / Feather (`pip install pyarrow`)")
+        dataset.write_stream(_chunks(df, chunk_rows), fileobj, file_format)
     elif file_format == "excel":
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            df.to_excel(writer, index=False, sheet_name="Sheet1")
-        processed_data = output.getvalue()
-        st.download_button(label=f"{label} (Excel)", data=processed_data, file_name=f"{file_name}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key=f"{file_name}_excel")
+        if len(df) > EXCEL_MAX_ROWS:
+            raise ValueError(f"{len(df)} lignes : au-delà de la limite Excel ({EXCEL_MAX_ROWS}), choisissez Parquet ou CSV")
+        if not XLSXWRITER_AVAILABLE:
+            raise ImportError("xlsxwriter est requis pour l'export Excel (`pip install xlsxwriter`)")
+        # constant_memory : lignes écrites au fil de l'eau (dans l'ordre) au lieu de garder la feuille en mémoire
+        workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True, "nan_inf_to_errors": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+        try:
+            sheet = workbook.add_worksheet("Sheet1")
+            sheet.write_row(0, 0, [str(c) for c in df.columns])
+            row = 1
+            for chunk in _chunks(df, chunk_rows):
+                values = chunk.astype(object).where(chunk.notna(), None)
+                for record in values.itertuples(index=False, name=None):
+                    sheet.write_row(row, 0, record)
+                    row += 1
+        finally:
+            workbook.close()
     else:
-        st.error("Format non supporté. Choisissez 'csv' ou 'excel'.")
+        raise ValueError(f"Format non supporté : {file_format}")
+
+
+def export_path(file_name: str, extension: str, directory=EXPORT_DIR) -> str:
+    """Chemin unique dans le dossier d'export de la session Streamlit (jamais partagé entre utilisateurs)."""
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    directory = helpers.ensure_dir(os.path.join(directory, session_id))
+    return os.path.join(directory, f"{file_name}_{uuid.uuid4().hex[:8]}{extension}")
+
+
+def download_df(df: pd.DataFrame, label="Télécharger", file_name="data", file_format="csv"):
+    """
+    Export préparé seulement au clic, écrit par blocs sur disque. Fichier d'au plus EXPORT_MEMORY_MAX_BYTES :
+    relu pour le bouton de téléchargement ; au-delà, servi tel quel par Streamlit (dossier static/ de la
+    session) via un lien de téléchargement : le fichier n'est jamais relu en mémoire.
+    """
+    if file_format not in EXPORT_FORMATS:
+        st.error(f"Format non supporté. Choisissez parmi : {', '.join(EXPORT_FORMATS)}.")
+        return
+    extension, mime, format_label = EXPORT_FORMATS[file_format]
+    key = f"{file_name}_{file_format}"
+    token = helpers.cached_fingerprint(df)  # export périmé si la base a changé
+
+    if st.button(f"📦 Préparer : {label} ({format_label})", key=f"{key}_prepare"):
+        previous = st.session_state.get(f"export_{key}")
+        if previous and isinstance(previous[1], str) and os.path.exists(previous[1]):
+            os.remove(previous[1])
+        path = export_path(file_name, extension, directory=EXPORT_STATIC_DIR)
+        try:
+            with open(path, "wb") as f:
+                export_df(df, f, file_format)
+            # plafond appliqué à la taille sérialisée (compression comprise), pas à celle du DataFrame
+            if os.path.getsize(path) <= EXPORT_MEMORY_MAX_BYTES:
+                with open(path, "rb") as f:
+                    payload = f.read()
+                os.remove(path)
+            else:
+                payload = path
+                helpers.evict_lru(EXPORT_STATIC_DIR, EXPORT_DIR_MAX_BYTES, recursive=True)
+            st.session_state[f"export_{key}"] = (token, payload)
+        except (ValueError, ImportError) as e:
+            if os.path.exists(path):
+                os.remove(path)
+            st.error(f"❌ Export impossible : {e}")
+
+    prepared = st.session_state.get(f"export_{key}")
+    if prepared and prepared[0] == token:
+        payload = prepared[1]
+        if isinstance(payload, str):
+            if os.path.exists(payload):
+                url = "/".join([EXPORT_STATIC_URL, st.session_state["session_id"], os.path.basename(payload)])
+                st.markdown(f'<a href="{url}" download="{file_name}{extension}">⬇️ {label} ({format_label}) — '
+                            f'{os.path.getsize(payload) / 1e6:,.1f} Mo</a>', unsafe_allow_html=True)
+            else:
+                st.warning("⚠️ Export évincé du disque entre-temps : préparez-le à nouveau.")
+        else:
+            st.download_button(label=f"{label} ({format_label})", data=payload, file_name=f"{file_name}{extension}", mime=mime, key=f"{key}_download")
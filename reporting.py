@@ -5,9 +5,9 @@ import os
 from datetime import datetime
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 from io import BytesIO
 import base64
+from modules import histograms, history
 
 OUT_DIR = "outputs/reports"
 os.makedirs(OUT_DIR, exist_ok=True)
@@ -48,15 +48,15 @@ def generate_report(session_state: dict):
             to_plot = num_cols[:6]
             if to_plot:
                 html.append("<h4>Histogrammes (exemples)</h4>")
+                hists = histograms.get_histograms(df)  # déjà calculés si l'onglet EDA a été ouvert
                 for col in to_plot:
                     fig, ax = plt.subplots()
-                    sns.histplot(df[col].dropna(), kde=True, ax=ax)
-                    ax.set_title(col)
+                    histograms.plot_histogram(hists[col], ax, title=col)
                     html.append(_img_to_base64(fig, width=400))
 
         # 2. Données préparées & log
-        if "clean_data" in session_state:
-            cdf = session_state["clean_data"]
+        cdf = history.corrected_frame(session_state)
+        if cdf is not None:
             html.append(f"<h2 style='color:#1569C7'>2. Données préparées</h2>")
             html.append(f"<p>Dimensions : {cdf.shape[0]} × {cdf.shape[1]}</p>")
             html.append("<h4>Aperçu (5 premières lignes)</h4>")
@@ -70,10 +70,10 @@ def generate_report(session_state: dict):
             num_cols_clean = cdf.select_dtypes(include='number').columns.tolist()[:6]
             if num_cols_clean:
                 html.append("<h4>Histogrammes (préparés) - exemples</h4>")
+                hists_clean = histograms.get_histograms(cdf)
                 for col in num_cols_clean:
                     fig, ax = plt.subplots()
-                    sns.histplot(cdf[col].dropna(), kde=True, ax=ax)
-                    ax.set_title(col)
+                    histograms.plot_histogram(hists_clean[col], ax, title=col)
                     html.append(_img_to_base64(fig, width=400))
 
         # 3. Modèle
@@ -123,8 +123,8 @@ def generate_report(session_state: dict):
         html.append(f"<p>Date génération : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>")
         if "data" in session_state:
             html.append(f"<p>Dimensions dataset initial : {session_state['data'].shape}</p>")
-        if "clean_data" in session_state:
-            html.append(f"<p>Dimensions dataset nettoyé : {session_state['clean_data'].shape}</p>")
+        if cdf is not None:
+            html.append(f"<p>Dimensions dataset nettoyé : {cdf.shape}</p>")
 
         html.append("</body></html>")
 
@@ -0,0 +1,248 @@
+# modules/sketches.py
+"""
+Statistiques approchées par sketches (flux, fusionnables, mémoire bornée) :
+- HyperLogLog pour la cardinalité (nunique)
+- KLL pour les quantiles / la médiane
+- Space-Saving (variante Misra-Gries) pour les valeurs fréquentes / le mode
+Les mises à jour sont vectorisées par bloc ; les erreurs sont paramétrables.
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+CARDINALITY_ERROR = 0.01   # erreur relative type de HyperLogLog
+QUANTILE_ERROR = 0.01      # erreur de rang de KLL
+FREQUENCY_ERROR = 0.001    # erreur sur les effectifs (fraction de n) de Space-Saving
+CHUNK_ROWS = 200_000
+
+
+def _hash64(values) -> np.ndarray:
+    """Empreintes 64 bits vectorisées (mêmes valeurs -> mêmes empreintes)."""
+    return pd.util.hash_array(np.asarray(values))
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Longueur binaire exacte d'entiers uint64 (via deux moitiés de 32 bits, exactes en float64)."""
+    hi = (x >> np.uint64(32)).astype(np.float64)
+    lo = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide="ignore"):
+        bl_hi = np.where(hi > 0, np.floor(np.log2(np.maximum(hi, 1))) + 33, 0)
+        bl_lo = np.where(lo > 0, np.floor(np.log2(np.maximum(lo, 1))) + 1, 0)
+    return np.where(hi > 0, bl_hi, bl_lo).astype(np.int64)
+
+
+class HyperLogLog:
+    """Cardinalité approchée ; erreur relative type ≈ 1.04 / sqrt(2^p)."""
+
+    def __init__(self, relative_error=CARDINALITY_ERROR):
+        self.p = int(min(max(math.ceil(math.log2((1.04 / relative_error) ** 2)), 4), 18))
+        self.m = 1 << self.p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values):
+        h = _hash64(values)
+        if not len(h):
+            return self
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        w = h << np.uint64(self.p)
+        rank = (64 - self.p) - _bit_length(w >> np.uint64(self.p)) + 1
+        np.maximum.at(self.registers, idx, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog"):
+        if other.p != self.p:
+            raise ValueError("HyperLogLog de précisions différentes")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))  # petites cardinalités : comptage linéaire
+        return int(round(raw))
+
+
+class KLLSketch:
+    """
+    Quantiles approchés (KLL) : compacteurs par niveau, le niveau h pèse 2^h.
+    Erreur de rang ≈ 1.7 / k.
+    """
+
+    def __init__(self, rank_error=QUANTILE_ERROR, seed=0):
+        self.k = int(max(math.ceil(1.7 / rank_error), 8))
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        x = np.asarray(values, dtype="float64")
+        x = x[np.isfinite(x)]
+        if x.size:
+            self.n += x.size
+            self.levels[0] = np.concatenate([self.levels[0], x])
+            self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if level.size > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                keep = level[-1:] if level.size % 2 else level[:0]
+                pairs = level[:level.size - (level.size % 2)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        items = np.concatenate(self.levels)
+        if not items.size:
+            return float("nan")
+        weights = np.concatenate([np.full(l.size, 2.0 ** h) for h, l in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, cum = items[order], np.cumsum(weights[order])
+        qs = np.atleast_1d(q)
+        idx = np.searchsorted(cum, qs * cum[-1], side="left")
+        out = items[np.clip(idx, 0, items.size - 1)]
+        return float(out[0]) if np.isscalar(q) else out
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+class SpaceSaving:
+    """
+    Valeurs fréquentes approchées (résumé Misra-Gries / Space-Saving fusionnable) :
+    au plus m compteurs, effectifs sous-estimés d'au plus n / (m + 1).
+    """
+
+    def __init__(self, relative_error=FREQUENCY_ERROR):
+        self.m = int(math.ceil(1 / relative_error))
+        self.counts = {}
+        self.n = 0
+
+    def update(self, values):
+        vc = pd.Series(values).value_counts(dropna=True)  # effectifs exacts du bloc (vectorisé)
+        self.n += int(vc.sum())
+        return self._absorb(dict(zip(vc.index.tolist(), vc.to_numpy().tolist())))
+
+    def _absorb(self, batch: dict):
+        for v, c in batch.items():
+            self.counts[v] = self.counts.get(v, 0) + c
+        if len(self.counts) > self.m:
+            ordered = sorted(self.counts.values(), reverse=True)
+            cut = ordered[self.m]  # (m+1)-ième effectif : soustrait à tous (garantie Misra-Gries)
+            self.counts = {v: c - cut for v, c in self.counts.items() if c > cut}
+        return self
+
+    def merge(self, other: "SpaceSaving"):
+        self.n += other.n
+        return self._absorb(other.counts)
+
+    def top(self, k=5) -> list:
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+    def mode(self):
+        top = self.top(1)
+        return top[0][0] if top else None
+
+
+class ColumnSketch:
+    """Sketches d'une colonne : cardinalité, quantiles (numériques), valeurs fréquentes, manquants."""
+
+    def __init__(self, numeric: bool, cardinality_error=CARDINALITY_ERROR, quantile_error=QUANTILE_ERROR, frequency_error=FREQUENCY_ERROR):
+        self.numeric = numeric
+        self.n = 0
+        self.n_missing = 0
+        self.n_infinite = 0
+        self.hll = HyperLogLog(cardinality_error)
+        self.kll = KLLSketch(quantile_error) if numeric else None
+        self.freq = SpaceSaving(frequency_error)
+
+    def update(self, s: pd.Series):
+        present = s.dropna()
+        self.n += len(s)
+        self.n_missing += len(s) - len(present)
+        self.hll.update(present.to_numpy())
+        self.freq.update(present)
+        if self.numeric:
+            values = present.to_numpy(dtype="float64")
+            self.n_infinite += int(np.isinf(values).sum())
+            self.kll.update(values)
+        return self
+
+    def merge(self, other: "ColumnSketch"):
+        self.n += other.n; self.n_missing += other.n_missing; self.n_infinite += other.n_infinite
+        self.hll.merge(other.hll); self.freq.merge(other.freq)
+        if self.kll is not None and other.kll is not None:
+            self.kll.merge(other.kll)
+        return self
+
+    @property
+    def n_unique(self) -> int:
+        return self.hll.estimate()
+
+    def median(self):
+        return self.kll.median() if self.kll is not None else None
+
+    def quantile(self, q):
+        return self.kll.quantile(q) if self.kll is not None else None
+
+    def mode(self):
+        return self.freq.mode()
+
+
+def column_sketches(source, columns=None, chunk_rows=CHUNK_ROWS, **errors) -> dict:
+    """
+    Sketches de toutes les colonnes d'un DataFrame (par tranches) ou d'une source par blocs
+    (LazyDataset.iter_chunks, générateur) : {colonne: ColumnSketch}.
+    """
+    if isinstance(source, pd.DataFrame):
+        chunks = (source.iloc[i:i + chunk_rows] for i in range(0, len(source), chunk_rows))
+    elif hasattr(source, "iter_chunks"):
+        chunks = source.iter_chunks(chunk_rows, columns=columns)
+    else:
+        chunks = source
+
+    result = {}
+    for chunk in chunks:
+        for col in (columns or chunk.columns):
+            s = chunk[col]
+            if col not in result:
+                numeric = pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+                result[col] = ColumnSketch(numeric, **errors)
+            result[col].update(s)
+    return result
+
+
+def approx_describe(sketches: dict, quantiles=(0.25, 0.5, 0.75)) -> pd.DataFrame:
+    """Équivalent approché de describe() / nunique() / mode() à partir des sketches."""
+    rows = []
+    for col, sk in sketches.items():
+        row = {"colonne": col, "count": sk.n - sk.n_missing, "n_unique≈": sk.n_unique, "mode≈": sk.mode()}
+        if sk.kll is not None:
+            for q, v in zip(quantiles, sk.quantile(list(quantiles))):
+                row[f"{int(q * 100)}%≈"] = v
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("colonne")
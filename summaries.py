@@ -0,0 +1,255 @@
+# modules/summaries.py
+"""
+Résumés de colonnes fusionnables pour le profiling incrémental.
+Chaque lot (ex. extraction mensuelle) est résumé seul puis fusionné dans le résumé
+persisté du jeu de données : le coût dépend de la taille du lot, pas de l'historique.
+Résumé par colonne : effectifs, manquants, infinis, moments (moyenne, M2), min/max,
+cardinalité (HyperLogLog), valeurs fréquentes (Space-Saving) et histogramme sur une grille alignée.
+"""
+
+import os
+import math
+from datetime import datetime
+import joblib
+import numpy as np
+import pandas as pd
+from modules.utils import helpers
+from modules import sketches
+
+SUMMARY_DIR = "outputs/summaries"
+HIST_MAX_BINS = 64         # au-delà, la largeur des bins double (fusion de bins voisins)
+MAX_TRACKED_VALUES = 10_000  # compteurs Space-Saving par colonne (valeurs fréquentes)
+
+
+class ColumnSummary:
+    """Résumé fusionnable d'une colonne."""
+
+    def __init__(self, is_numeric: bool):
+        self.is_numeric = is_numeric
+        self.count = 0           # valeurs présentes (hors manquants)
+        self.n_missing = 0
+        self.n_infinite = 0
+        self.n_finite = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.distinct = sketches.HyperLogLog()                          # cardinalité, fusionnable
+        self.frequent = sketches.SpaceSaving(1 / MAX_TRACKED_VALUES)   # valeurs fréquentes, fusionnable
+        self.hist_origin = None  # grille : bin i = [origin + i*width, origin + (i+1)*width)
+        self.hist_width = None
+        self.hist = {}           # indice de bin -> effectif
+
+    # ------------------------
+    # Construction depuis un lot
+    # ------------------------
+    @classmethod
+    def from_series(cls, s: pd.Series, grid=None) -> "ColumnSummary":
+        is_numeric = pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+        out = cls(is_numeric)
+        missing = s.isna()
+        out.n_missing = int(missing.sum())
+        out.count = int(len(s) - out.n_missing)
+
+        out.distinct.update(s.dropna().to_numpy())
+        out.frequent.update(s)
+
+        if is_numeric:
+            values = s.to_numpy(dtype="float64", na_value=np.nan)
+            finite = values[np.isfinite(values)]
+            out.n_infinite = int(np.isinf(values).sum())
+            out.n_finite = int(finite.size)
+            if finite.size:
+                out.mean = float(finite.mean())
+                out.m2 = float(((finite - out.mean) ** 2).sum())
+                out.min = float(finite.min())
+                out.max = float(finite.max())
+                if grid is not None and grid[0] is not None:
+                    out.hist_origin, out.hist_width = grid
+                else:
+                    out.hist_origin = out.min
+                    out.hist_width = (out.max - out.min) / HIST_MAX_BINS or 1.0
+                idx, cnt = np.unique(np.floor((finite - out.hist_origin) / out.hist_width).astype(np.int64), return_counts=True)
+                out.hist = dict(zip(idx.tolist(), cnt.tolist()))
+                out._coarsen()
+        return out
+
+    def _coarsen(self):
+        """Double la largeur des bins tant que l'étendue dépasse HIST_MAX_BINS (grille toujours alignée)."""
+        while self.hist and max(self.hist) - min(self.hist) + 1 > HIST_MAX_BINS:
+            self.hist = _sum_pairs(self.hist)
+            self.hist_width *= 2
+
+    def _rebin_to(self, origin, width) -> dict:
+        """Projette l'histogramme sur une autre grille (par centre de bin) si les grilles diffèrent."""
+        if self.hist_origin == origin and self.hist_width == width:
+            return dict(self.hist)
+        out = {}
+        for i, c in self.hist.items():
+            center = self.hist_origin + (i + 0.5) * self.hist_width
+            j = int(math.floor((center - origin) / width))
+            out[j] = out.get(j, 0) + c
+        return out
+
+    # ------------------------
+    # Fusion
+    # ------------------------
+    def merge(self, other: "ColumnSummary") -> "ColumnSummary":
+        self.is_numeric = self.is_numeric and other.is_numeric
+        self.count += other.count
+        self.n_missing += other.n_missing
+        self.n_infinite += other.n_infinite
+
+        # moyenne / M2 : formule de Chan et al. (parallèle)
+        n = self.n_finite + other.n_finite
+        if n:
+            delta = other.mean - self.mean
+            self.m2 = self.m2 + other.m2 + delta ** 2 * self.n_finite * other.n_finite / n
+            self.mean = self.mean + delta * other.n_finite / n
+        self.n_finite = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+
+        if other.hist:
+            if self.hist_origin is None:
+                self.hist_origin, self.hist_width, self.hist = other.hist_origin, other.hist_width, dict(other.hist)
+            else:
+                # aligner sur la grille la plus grossière puis additionner
+                while self.hist_width < other.hist_width:
+                    self.hist = _sum_pairs(self.hist)
+                    self.hist_width *= 2
+                for j, c in other._rebin_to(self.hist_origin, self.hist_width).items():
+                    self.hist[j] = self.hist.get(j, 0) + c
+                self._coarsen()
+        return self
+
+    # ------------------------
+    # Lecture
+    # ------------------------
+    @property
+    def n_unique(self) -> int:
+        """Nombre de valeurs distinctes (estimation HyperLogLog, non bornée par MAX_TRACKED_VALUES)."""
+        return self.distinct.estimate()
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n_finite - 1)) if self.n_finite > 1 else float("nan")
+
+    def histogram(self):
+        """(bornes, effectifs) contigus de l'histogramme."""
+        if not self.hist:
+            return np.array([]), np.array([])
+        lo, hi = min(self.hist), max(self.hist)
+        counts = np.array([self.hist.get(i, 0) for i in range(lo, hi + 1)])
+        edges = self.hist_origin + self.hist_width * np.arange(lo, hi + 2)
+        return edges, counts
+
+    def top_values(self, k=5) -> list:
+        return self.frequent.top(k)
+
+
+def _sum_pairs(hist: dict) -> dict:
+    merged = {}
+    for i, c in hist.items():
+        merged[i // 2] = merged.get(i // 2, 0) + c
+    return merged
+
+
+class DatasetSummary:
+    """Résumés de toutes les colonnes d'un jeu de données + historique des lots fusionnés."""
+
+    def __init__(self):
+        self.n_rows = 0
+        self.columns = {}
+        self.batches = []
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, reference: "DatasetSummary" = None, label=None, fingerprint=None) -> "DatasetSummary":
+        out = cls()
+        out.n_rows = len(df)
+        for col in df.columns:
+            grid = None
+            if reference is not None and col in reference.columns:
+                ref = reference.columns[col]
+                grid = (ref.hist_origin, ref.hist_width)
+            out.columns[col] = ColumnSummary.from_series(df[col], grid)
+        out.batches.append({"lot": label or datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "lignes": len(df),
+                            "empreinte": fingerprint or helpers.cached_fingerprint(df)})
+        return out
+
+    def merge(self, other: "DatasetSummary") -> "DatasetSummary":
+        self.n_rows += other.n_rows
+        for col, summary in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(summary)
+            else:
+                # colonne apparue dans ce lot : les lignes précédentes sont manquantes
+                summary.n_missing += self.n_rows - other.n_rows
+                self.columns[col] = summary
+        for col, summary in self.columns.items():
+            if col not in other.columns:
+                summary.n_missing += other.n_rows
+        self.batches.extend(other.batches)
+        return self
+
+    def to_description(self) -> dict:
+        """Même forme que preprocessing.scan_anomalies : utilisable par detect_and_propose_corrections."""
+        variables = {
+            col: {"n_missing": s.n_missing, "n_unique": s.n_unique, "n_infinite": s.n_infinite}
+            for col, s in self.columns.items()
+        }
+        return {"variables": variables, "table": {"n": self.n_rows}}
+
+    def to_frame(self) -> pd.DataFrame:
+        rows = []
+        for col, s in self.columns.items():
+            rows.append({
+                "colonne": col,
+                "n": s.count,
+                "manquants": s.n_missing,
+                "infinis": s.n_infinite,
+                "distinctes": s.n_unique,
+                "moyenne": s.mean if s.n_finite else None,
+                "ecart_type": s.std if s.n_finite else None,
+                "min": s.min if s.n_finite else None,
+                "max": s.max if s.n_finite else None,
+                "valeurs_frequentes": ", ".join(f"{v} ({c})" for v, c in s.top_values(3)),
+            })
+        return pd.DataFrame(rows)
+
+
+# ------------------------
+# Persistance par jeu de données
+# ------------------------
+def _summary_path(dataset_id: str, summary_dir=SUMMARY_DIR) -> str:
+    safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in dataset_id)
+    return os.path.join(summary_dir, f"{safe_id}.pkl")
+
+
+def load_summary(dataset_id: str, summary_dir=SUMMARY_DIR):
+    path = _summary_path(dataset_id, summary_dir)
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+def save_summary(dataset_id: str, summary: DatasetSummary, summary_dir=SUMMARY_DIR) -> str:
+    return helpers.save_model(summary, _summary_path(dataset_id, summary_dir))
+
+
+def update_summary(dataset_id: str, batch: pd.DataFrame, label=None, summary_dir=SUMMARY_DIR) -> DatasetSummary:
+    """
+    Résume le lot seul (sur la grille du résumé existant) et le fusionne dans le résumé persisté.
+    Un lot déjà fusionné (même empreinte de contenu) est refusé : ValueError.
+    """
+    stored = load_summary(dataset_id, summary_dir)
+    fingerprint = helpers.cached_fingerprint(batch)
+    if stored is not None:
+        previous = next((b for b in stored.batches if b.get("empreinte") == fingerprint), None)
+        if previous is not None:
+            raise ValueError(f"lot déjà ajouté au résumé ({previous['lot']})")
+    batch_summary = DatasetSummary.from_frame(batch, reference=stored, label=label, fingerprint=fingerprint)
+    summary = batch_summary if stored is None else stored.merge(batch_summary)
+    save_summary(dataset_id, summary, summary_dir)
+    return summary